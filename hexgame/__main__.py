@@ -1,10 +1,25 @@
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
 from hexgame.color import Color
 from hexgame.board import Board
 from hexgame.player import Player
 from hexgame.unionfind import UnionFind
 from hexgame.game import Game
+from hexgame.tournament import PlayerSpec, TournamentResult, run_tournament
+from hexgame.server import SERVER_DEFAULT_MOVE_TIMEOUT, GameServer, opponent_factory
 
-if __name__ == "__main__":
+PLAYER_MODES = {
+    "random": Player.PlayerMode.AI,
+    "mcts": Player.PlayerMode.MCTS,
+    "alphabeta": Player.PlayerMode.AlphaBeta,
+}
+
+
+def play_keyboard_game() -> None:
     dim_x = 5
     dim_y = 5
     nodes = [(x, y) for y in range(dim_y) for x in range(dim_x)]
@@ -17,3 +32,134 @@ if __name__ == "__main__":
     player_2 = Player(color=Color.Blue, mode=Player.PlayerMode.Keyboard)
     game = Game(board=board, player_1=player_1, player_2=player_2)
     game.start()
+
+
+def tournament(args: argparse.Namespace) -> None:
+    def report(result: TournamentResult) -> None:
+        print(
+            f"{result.games}/{args.games} games, "
+            f"red {result.win_rate(Color.Red):.3f} "
+            f"blue {result.win_rate(Color.Blue):.3f}, "
+            f"{result.games_per_second:.1f} games/s",
+            file=sys.stderr,
+        )
+
+    result = run_tournament(
+        games=args.games,
+        dim_x=args.size,
+        dim_y=args.size,
+        player_1=PlayerSpec(
+            PLAYER_MODES[args.player_1], args.playouts, args.time_limit
+        ),
+        player_2=PlayerSpec(
+            PLAYER_MODES[args.player_2], args.playouts, args.time_limit
+        ),
+        workers=args.workers,
+        seed=args.seed,
+        swap_rule_allowed=not args.no_swap,
+        chunk_size=args.chunk_size,
+        on_progress=report if args.progress else None,
+    )
+    print(json.dumps(result.as_dict(), indent=2))
+
+
+def serve(args: argparse.Namespace) -> None:
+    async def main(executor: ProcessPoolExecutor) -> None:
+        server = GameServer(
+            opponent_factory(
+                PLAYER_MODES[args.opponent],
+                args.playouts,
+                args.time_limit,
+                executor,
+                args.seed,
+            ),
+            dim_x=args.size,
+            dim_y=args.size,
+            swap_rule_allowed=not args.no_swap,
+            human_color=Color[args.color],
+            move_timeout=args.move_timeout,
+        )
+        if args.stdio:
+            await server.serve_stdio()
+            return
+        if args.unix:
+            listener = await server.start_unix(args.unix)
+        else:
+            listener = await server.start_tcp(args.host, args.port)
+        async with listener:
+            await listener.serve_forever()
+
+    with ProcessPoolExecutor(args.workers) as executor:
+        try:
+            asyncio.run(main(executor))
+        except KeyboardInterrupt:
+            pass
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m hexgame")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("play", help="two players on the keyboard (the default)")
+
+    tournament_parser = commands.add_parser(
+        "tournament", help="headless games between AI players on all the cores"
+    )
+    tournament_parser.add_argument("--games", type=int, default=100)
+    tournament_parser.add_argument("--size", type=int, default=11)
+    tournament_parser.add_argument("--player-1", choices=PLAYER_MODES, default="random")
+    tournament_parser.add_argument("--player-2", choices=PLAYER_MODES, default="random")
+    tournament_parser.add_argument(
+        "--playouts", type=int, default=100, help="per move budget of mcts players"
+    )
+    tournament_parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=None,
+        help="per move budget of search players, in seconds",
+    )
+    tournament_parser.add_argument(
+        "--workers", type=int, default=None, help="default: all the cores"
+    )
+    tournament_parser.add_argument("--seed", type=int, default=0)
+    tournament_parser.add_argument("--chunk-size", type=int, default=16)
+    tournament_parser.add_argument("--no-swap", action="store_true")
+    tournament_parser.add_argument("--progress", action="store_true")
+
+    serve_parser = commands.add_parser(
+        "serve", help="host games against an AI player for remote clients"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--unix", help="listen on this unix socket instead")
+    serve_parser.add_argument(
+        "--stdio", action="store_true", help="play one game on stdin and stdout"
+    )
+    serve_parser.add_argument("--size", type=int, default=11)
+    serve_parser.add_argument("--opponent", choices=PLAYER_MODES, default="mcts")
+    serve_parser.add_argument("--color", choices=["Red", "Blue"], default="Red")
+    serve_parser.add_argument("--playouts", type=int, default=100)
+    serve_parser.add_argument("--time-limit", type=float, default=None)
+    serve_parser.add_argument(
+        "--move-timeout",
+        type=float,
+        default=SERVER_DEFAULT_MOVE_TIMEOUT,
+        help="seconds a client has for each move before forfeiting",
+    )
+    serve_parser.add_argument(
+        "--workers", type=int, default=None, help="default: all the cores"
+    )
+    serve_parser.add_argument("--seed", type=int, default=None)
+    serve_parser.add_argument("--no-swap", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    match args.command:
+        case "tournament":
+            tournament(args)
+        case "serve":
+            serve(args)
+        case _:
+            play_keyboard_game()
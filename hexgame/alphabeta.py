@@ -0,0 +1,325 @@
+"""alphabeta.py: negamax alpha-beta search for a game of hex"""
+import time
+from functools import lru_cache
+from typing import Optional
+
+from hexgame.board import Board, coords_table
+from hexgame.color import Color
+from hexgame.distance import ConnectionDistance
+from hexgame.transposition import (
+    NO_MOVE,
+    TT_DEFAULT_SIZE_MB,
+    Bound,
+    TranspositionTable,
+)
+
+__author__ = "Gianpiero Cea"
+
+ALPHABETA_DEFAULT_TIME_LIMIT = 1.0
+
+# value of a won position, wins found sooner score higher
+WIN_VALUE = 1_000_000.0
+# values beyond this one are wins or losses, not evaluations
+_WIN_BOUND = WIN_VALUE / 2
+
+
+def _value_to_table(value: float, ply: int) -> float:
+    """
+    Wins and losses are stored counted from the node rather than from
+    the root, as the same position may be met again at another ply
+    """
+    if value >= _WIN_BOUND:
+        return value + ply
+    if value <= -_WIN_BOUND:
+        return value - ply
+    return value
+
+
+def _value_from_table(value: float, ply: int) -> float:
+    if value >= _WIN_BOUND:
+        return value - ply
+    if value <= -_WIN_BOUND:
+        return value + ply
+    return value
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time is up
+    """
+
+
+class SearchInfo:
+    """
+    What the last search did: the deepest iteration completed,
+    its value (for the side to move) and principal variation
+    """
+
+    def __init__(
+        self,
+        depth: int,
+        value: float,
+        pv: list[tuple[int, int]],
+        nodes: int,
+        seconds: float,
+    ) -> None:
+        self.depth = depth
+        self.value = value
+        self.pv = pv
+        self.nodes = nodes
+        self.seconds = seconds
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"SearchInfo(depth={self.depth}, value={self.value}, pv={self.pv}, "
+            f"nodes={self.nodes}, seconds={self.seconds:.3f}, "
+            f"nodes_per_second={self.nodes_per_second:.0f})"
+        )
+
+
+@lru_cache(maxsize=None)
+def centre_distance(dim_x: int, dim_y: int) -> tuple[float, ...]:
+    """
+    The hex distance of every cell, by flat index, from the centre
+    of the board: moves near the centre are tried first among equals
+    """
+    centre_x, centre_y = (dim_x - 1) / 2, (dim_y - 1) / 2
+    distances = []
+    for y in range(dim_y):
+        for x in range(dim_x):
+            dx, dy = x - centre_x, y - centre_y
+            # (1, 1) is a neighbour, (1, -1) is not
+            if dx * dy >= 0:
+                distances.append(max(abs(dx), abs(dy)))
+            else:
+                distances.append(abs(dx) + abs(dy))
+    return tuple(distances)
+
+
+class AlphaBeta:
+    """
+    Negamax alpha-beta search with iterative deepening.
+
+    Every iteration searches one ply deeper than the previous one, until
+    @param max_depth is reached or @param time_limit seconds are up; the
+    result of the last completed iteration is played. Moves are ordered
+    by the best move stored in the transposition table (the principal
+    variation of the previous iteration comes first) and then by the
+    moves that shorten the connection of the side to move, then by the
+    history heuristic, so later iterations get most of their cutoffs
+    early. Leaves are scored by the difference of the connection
+    distances of the two colors, which are kept up to date move by move.
+
+    The transposition table and the history scores are kept from one
+    search to the next
+    """
+
+    def __init__(
+        self,
+        time_limit: Optional[float] = ALPHABETA_DEFAULT_TIME_LIMIT,
+        max_depth: Optional[int] = None,
+        tt_size_mb: float = TT_DEFAULT_SIZE_MB,
+    ) -> None:
+        if time_limit is None and max_depth is None:
+            raise ValueError("AlphaBeta needs a time limit or a maximum depth")
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = TranspositionTable(tt_size_mb)
+        # history[color.value][flat index] grows every time
+        # the move causes a cutoff
+        self._history: list[list[int]] = [[], [], []]
+        self._nodes: int = 0
+        self._root_move: Optional[tuple[int, int]] = None
+        self._distances: Optional[ConnectionDistance] = None
+        self._deadline: Optional[float] = None
+        self.info: Optional[SearchInfo] = None
+
+    def search(self, board: Board, color: Color) -> tuple[int, int]:
+        """
+        Returns the move that color should play on @param board,
+        which is left as it was found
+        """
+        start = time.perf_counter()
+        self._deadline = (
+            start + self.time_limit if self.time_limit is not None else None
+        )
+        self._nodes = 0
+        size = board.dim_x * board.dim_y
+        for history in self._history:
+            if len(history) != size:
+                history[:] = [0] * size
+        self.table.new_search()
+        self._distances = ConnectionDistance(board)
+
+        moves = board.possible_moves
+        if not moves:
+            raise ValueError("Cannot search-no move can be played")
+        # until a search finishes, the move it would try first
+        best_move = self._ordered_moves(
+            board,
+            color,
+            self._history[color.value],
+            self.table.best_move(board.zobrist_hash),
+        )[0][1]
+        self.info = SearchInfo(0, 0.0, [best_move], 0, 0.0)
+        max_depth = self.max_depth if self.max_depth is not None else len(moves)
+        for depth in range(1, max_depth + 1):
+            self._root_move = None
+            try:
+                value = self._negamax(board, color, depth, -WIN_VALUE, WIN_VALUE, 0)
+            except SearchTimeout:
+                # the root moves are searched best first: one that beat
+                # them before the time ran out is the better move
+                if self._root_move is not None and self._root_move != best_move:
+                    best_move = self._root_move
+                    self.info.pv = [best_move]
+                break
+            best_move = self._root_move
+            pv = self._principal_variation(board, color, depth)
+            if not pv or pv[0] != best_move:
+                pv = [best_move]
+            self.info = SearchInfo(
+                depth, value, pv, self._nodes, time.perf_counter() - start
+            )
+            if abs(value) >= WIN_VALUE - size:
+                # a forced win or loss: deeper searches cannot change it
+                break
+        self.info.nodes = self._nodes
+        self.info.seconds = time.perf_counter() - start
+        return best_move
+
+    def _negamax(
+        self,
+        board: Board,
+        color: Color,
+        depth: int,
+        alpha: float,
+        beta: float,
+        ply: int,
+    ) -> float:
+        """
+        Value of @param board for color, the side to move
+        """
+        self._nodes += 1
+        # a node costs far more than a look at the clock
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
+
+        key = board.zobrist_hash
+        entry = self.table.probe(key)
+        tt_move = NO_MOVE
+        if entry is not None:
+            tt_move = entry.move
+            # the root is always searched, to know its best move
+            if entry.depth >= depth and ply > 0:
+                value = _value_from_table(entry.value, ply)
+                match entry.bound:
+                    case Bound.Exact:
+                        return value
+                    case Bound.Lower:
+                        alpha = max(alpha, value)
+                    case Bound.Upper:
+                        beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        if depth == 0:
+            return self._evaluate(board, color)
+
+        alpha_start = alpha
+        best_value = -WIN_VALUE
+        best_move = NO_MOVE
+        history = self._history[color.value]
+        opponent = color.opponent
+        distances = self._distances
+        for index, move in self._ordered_moves(board, color, history, tt_move):
+            board.place_stone(*move, color)
+            if board._has_color_won(color):
+                board.undo()
+                value = WIN_VALUE - ply - 1
+            else:
+                distances.update(move)
+                try:
+                    value = -self._negamax(
+                        board, opponent, depth - 1, -beta, -alpha, ply + 1
+                    )
+                finally:
+                    board.undo()
+                    distances.update(move)
+            if value > best_value:
+                best_value = value
+                best_move = index
+                if ply == 0:
+                    self._root_move = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                history[index] += depth * depth
+                break
+
+        if best_value <= alpha_start:
+            bound = Bound.Upper
+        elif best_value >= beta:
+            bound = Bound.Lower
+        else:
+            bound = Bound.Exact
+        self.table.store(
+            key, depth, _value_to_table(best_value, ply), bound, best_move
+        )
+        return best_value
+
+    def _ordered_moves(
+        self, board: Board, color: Color, history: list[int], tt_move: int
+    ) -> list[tuple[int, tuple[int, int]]]:
+        """
+        The possible moves with their flat index, the stored best move
+        first, then by the connection distance of color after the move,
+        decreasing history score and distance from the centre
+        """
+        dim_x = board.dim_x
+        centre = centre_distance(dim_x, board.dim_y)
+        after = self._distances.distances_after_move(color)
+        moves = [(y * dim_x + x, (x, y)) for x, y in board.possible_moves]
+        moves.sort(
+            key=lambda move: (
+                move[0] != tt_move,
+                after[move[0]],
+                -history[move[0]],
+                centre[move[0]],
+                move[0],
+            )
+        )
+        return moves
+
+    def _evaluate(self, board: Board, color: Color) -> float:
+        """
+        Static value of @param board for color: how many fewer
+        cells color needs to connect than its opponent
+        """
+        return self._distances.evaluate(color)
+
+    def _principal_variation(
+        self, board: Board, color: Color, depth: int
+    ) -> list[tuple[int, int]]:
+        """
+        Follows the best moves stored in the transposition table
+        from @param board, for at most depth moves
+        """
+        coords = coords_table(board.dim_x, board.dim_y)
+        pv: list[tuple[int, int]] = []
+        for _ in range(depth):
+            index = self.table.best_move(board.zobrist_hash)
+            if index == NO_MOVE or not board.is_legal_move(coords[index]):
+                break
+            board.place_stone(*coords[index], color)
+            pv.append(coords[index])
+            if board._has_color_won(color):
+                break
+            color = color.opponent
+        for _ in pv:
+            board.undo()
+        return pv
@@ -0,0 +1,312 @@
+"""bench.py: timings of the hot paths of a game of hex"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.player import Player
+from hexgame.unionfind import UnionFind
+
+__author__ = "Gianpiero Cea"
+
+"""
+ Usage:
+     python -m hexgame.bench --output bench.json
+     python -m hexgame.bench --baseline bench.json
+
+ Every benchmark is run again and again until BENCH_MIN_TIME seconds
+ are timed, which gives the time of one run; the best of --repeat such
+ timings is kept. With --baseline the timings per operation are compared
+ with the ones of an earlier report and the exit code is 1 if any of
+ them got slower by more than --threshold.
+"""
+
+BENCH_DEFAULT_SIZES = (5, 11, 19, 27)
+BENCH_DEFAULT_REPEAT = 5
+BENCH_MIN_TIME = 0.05
+# a benchmark slower than its baseline by more than this fraction regresses
+BENCH_DEFAULT_THRESHOLD = 0.10
+
+
+class Benchmark(NamedTuple):
+    """
+    prepare(size, rng) builds the untimed state of one run
+    and run(state) is the timed part, doing ops(size) operations
+    """
+
+    name: str
+    prepare: Callable[[int, random.Random], Any]
+    run: Callable[[Any], None]
+    ops: Callable[[int], int]
+
+
+class BenchResult(NamedTuple):
+    name: str
+    size: int
+    ops: int
+    # the best of the repeats, for all the ops of a run
+    seconds: float
+
+    @property
+    def per_op_us(self) -> float:
+        return self.seconds / self.ops * 1e6
+
+    @property
+    def ops_per_second(self) -> float:
+        return self.ops / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "size": self.size,
+            "ops": self.ops,
+            "seconds": self.seconds,
+            "per_op_us": self.per_op_us,
+            "ops_per_second": self.ops_per_second,
+        }
+
+
+def _half_filled_board(size: int, rng: random.Random) -> Board:
+    board = Board.create(dim_x=size, dim_y=size, swap_rule_allowed=False)
+    color = Color.Red
+    for _ in range(size * size // 2):
+        board.place_stone(*board.random_move(rng), color)
+        color = color.opponent
+    return board
+
+
+def _prepare_place_stone(
+    size: int, rng: random.Random
+) -> tuple[Board, list[tuple[int, int]]]:
+    moves = [(x, y) for y in range(size) for x in range(size)]
+    rng.shuffle(moves)
+    return Board.create(dim_x=size, dim_y=size, swap_rule_allowed=False), moves
+
+
+def _run_place_stone(state: tuple[Board, list[tuple[int, int]]]) -> None:
+    board, moves = state
+    color = Color.Red
+    for x, y in moves:
+        board.place_stone(x, y, color)
+        color = color.opponent
+
+
+def _run_find_neighbours(board: Board) -> None:
+    for y in range(board.dim_y):
+        for x in range(board.dim_x):
+            board.find_neighbours((x, y))
+
+
+def _run_has_color_won(board: Board) -> None:
+    for _ in range(100):
+        board._has_color_won(Color.Red)
+        board._has_color_won(Color.Blue)
+
+
+def _run_empty_positions(board: Board) -> None:
+    for _ in range(100):
+        board.empty_positions
+
+
+def _run_board_copy(board: Board) -> None:
+    for _ in range(100):
+        board.copy()
+
+
+def _prepare_union_find(
+    size: int, rng: random.Random
+) -> tuple[UnionFind, list[tuple[int, int]]]:
+    nodes = list(range(size * size))
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in nodes]
+    return UnionFind(nodes), pairs
+
+
+def _run_union_find(state: tuple[UnionFind, list[tuple[int, int]]]) -> None:
+    uf, pairs = state
+    for a, b in pairs:
+        uf.union(a, b)
+    for a, b in pairs:
+        uf.find(a)
+        uf.find(b)
+
+
+def _prepare_random_game(size: int, rng: random.Random) -> Game:
+    return Game(
+        board=Board.create(dim_x=size, dim_y=size),
+        player_1=Player(Color.Red, rng=rng),
+        player_2=Player(Color.Blue, rng=rng),
+    )
+
+
+BENCHMARKS: tuple[Benchmark, ...] = (
+    Benchmark(
+        "board_create",
+        lambda size, rng: size,
+        lambda size: Board.create(dim_x=size, dim_y=size),
+        lambda size: 1,
+    ),
+    Benchmark(
+        "place_stone", _prepare_place_stone, _run_place_stone, lambda size: size * size
+    ),
+    Benchmark(
+        "find_neighbours",
+        _half_filled_board,
+        _run_find_neighbours,
+        lambda size: size * size,
+    ),
+    Benchmark(
+        "has_color_won", _half_filled_board, _run_has_color_won, lambda size: 200
+    ),
+    Benchmark(
+        "empty_positions", _half_filled_board, _run_empty_positions, lambda size: 100
+    ),
+    Benchmark("board_copy", _half_filled_board, _run_board_copy, lambda size: 100),
+    Benchmark(
+        "union_find",
+        _prepare_union_find,
+        _run_union_find,
+        lambda size: 3 * size * size,
+    ),
+    Benchmark("random_game", _prepare_random_game, Game.run, lambda size: 1),
+)
+
+
+def run_benchmarks(
+    sizes: tuple[int, ...] = BENCH_DEFAULT_SIZES,
+    repeat: int = BENCH_DEFAULT_REPEAT,
+    only: Optional[list[str]] = None,
+    seed: int = 0,
+) -> list[BenchResult]:
+    """
+    Times every benchmark (or the ones named in @param only) on
+    every board size, keeping the best of @param repeat runs
+    """
+    results = []
+    for benchmark in BENCHMARKS:
+        if only and benchmark.name not in only:
+            continue
+        for size in sizes:
+            rng = random.Random(f"{seed}:{benchmark.name}:{size}")
+            best = float("inf")
+            for _ in range(repeat):
+                runs = 0
+                timed = 0.0
+                while timed < BENCH_MIN_TIME:
+                    state = benchmark.prepare(size, rng)
+                    start = time.perf_counter()
+                    benchmark.run(state)
+                    timed += time.perf_counter() - start
+                    runs += 1
+                best = min(best, timed / runs)
+            results.append(BenchResult(benchmark.name, size, benchmark.ops(size), best))
+    return results
+
+
+def report(results: list[BenchResult], repeat: int) -> dict:
+    """
+    The machine readable report of a run
+    """
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": [result.as_dict() for result in results],
+    }
+
+
+class Comparison(NamedTuple):
+    name: str
+    size: int
+    baseline_us: float
+    current_us: float
+
+    @property
+    def change(self) -> float:
+        """
+        Relative change of the time per operation, positive when slower
+        """
+        return self.current_us / self.baseline_us - 1.0
+
+
+def compare(results: list[BenchResult], baseline: dict) -> list[Comparison]:
+    """
+    Pairs the results with the ones of a @param baseline report
+    by name and board size, skipping the ones missing from it
+    """
+    baseline_us = {
+        (entry["name"], entry["size"]): entry["per_op_us"]
+        for entry in baseline["results"]
+    }
+    return [
+        Comparison(
+            result.name,
+            result.size,
+            baseline_us[result.name, result.size],
+            result.per_op_us,
+        )
+        for result in results
+        if (result.name, result.size) in baseline_us
+    ]
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m hexgame.bench")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(BENCH_DEFAULT_SIZES)
+    )
+    parser.add_argument("--repeat", type=int, default=BENCH_DEFAULT_REPEAT)
+    parser.add_argument(
+        "--only", nargs="+", choices=[benchmark.name for benchmark in BENCHMARKS]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument(
+        "--baseline",
+        help="JSON report to compare with, exits with 1 on regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=BENCH_DEFAULT_THRESHOLD,
+        help="slowdown (as a fraction) that counts as a regression",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    results = run_benchmarks(tuple(args.sizes), args.repeat, args.only, args.seed)
+    document = report(results, args.repeat)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(document, output, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = 0
+    for comparison in compare(results, baseline):
+        regressed = comparison.change > args.threshold
+        regressions += regressed
+        print(
+            f"{comparison.name:>16} {comparison.size:>3}x{comparison.size:<3} "
+            f"{comparison.baseline_us:>12.2f}us -> {comparison.current_us:>12.2f}us "
+            f"{comparison.change:>+8.1%}{'  REGRESSION' if regressed else ''}",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
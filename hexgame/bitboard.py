@@ -0,0 +1,423 @@
+"""bitboard.py: A board to play a game of hex on, backed by bitmasks"""
+import random
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import compress
+from typing import Iterator, NamedTuple, Optional
+
+from hexgame.board import BOARD_DEFAULT_X_DIM, BOARD_DEFAULT_Y_DIM
+from hexgame.cell import Cell, cell_table
+from hexgame.color import Color
+from hexgame.zobrist import ZobristKeys, state_key, zobrist_keys
+
+__author__ = "Gianpiero Cea"
+
+# turns the ascii digits of bin() into 0/1 selector bytes
+_BIN_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+"""
+ A bitboard stores the same position as a Board, but instead of
+ a matrix of Cell objects it keeps one packed integer per color:
+ bit k of the red (blue) mask is set iff the cell with index k
+ holds a red (blue) stone.
+
+ Cells are packed row by row (y major) with a stride of dim_x + 1,
+ so cell (x, y) is bit y * (dim_x + 1) + x. The extra column
+ x = dim_x is a guard column that is always empty: shifting a mask
+ by one never wraps a stone onto the next row, it only lands in the
+ guard column, which is then masked away.
+
+ With this layout the six hex neighbours of a cell are a fixed set
+ of shifts:
+     (x + 1, y)     -> << 1
+     (x - 1, y)     -> >> 1
+     (x, y + 1)     -> << stride
+     (x, y - 1)     -> >> stride
+     (x + 1, y + 1) -> << (stride + 1)
+     (x - 1, y - 1) -> >> (stride + 1)
+"""
+
+
+class BitMasks(NamedTuple):
+    """
+    The constant masks describing a board of a given size
+    """
+
+    stride: int
+    full: int
+    bottom: int
+    top: int
+    left: int
+    right: int
+    # maps a bit index to its (x, y) coordinates,
+    # None for the bits of the guard column
+    coords: tuple[Optional[tuple[int, int]], ...]
+
+
+@lru_cache(maxsize=None)
+def bit_masks(dim_x: int, dim_y: int) -> BitMasks:
+    """
+    Computes (once per board size) the masks of a dim_x * dim_y board
+    """
+    stride = dim_x + 1
+    row = (1 << dim_x) - 1
+    full = 0
+    left = 0
+    for y in range(dim_y):
+        full |= row << (y * stride)
+        left |= 1 << (y * stride)
+    bottom = row if dim_y > 0 else 0
+    top = row << ((dim_y - 1) * stride) if dim_y > 0 else 0
+    right = left << (dim_x - 1) if dim_x > 0 else 0
+    coords = tuple(
+        (x, y) if x < dim_x else None for y in range(dim_y) for x in range(stride)
+    )
+    return BitMasks(stride, full, bottom, top, left, right, coords)
+
+
+class BitBoard:
+    """
+    A drop in replacement of Board that plays on bitmasks.
+    Placement, emptiness tests, neighbourhoods and border tests
+    are all shift/and/or operations on two integers.
+    """
+
+    def __init__(
+        self,
+        dim_x: int = BOARD_DEFAULT_X_DIM,
+        dim_y: int = BOARD_DEFAULT_Y_DIM,
+        swap_rule_allowed: bool = True,
+    ) -> None:
+        self.dim_x: int = dim_x
+        self.dim_y: int = dim_y
+        self._masks: BitMasks = bit_masks(dim_x, dim_y)
+        self._cells: tuple[tuple[Cell, ...], ...] = cell_table(dim_x, dim_y)
+        self._red: int = 0
+        self._blue: int = 0
+        self._swap_rule_allowed: bool = swap_rule_allowed
+        self._number_of_moves_made: int = 0
+        # the red and blue masks and the hash before each move made
+        self._undo_log: list[tuple[int, int, int]] = []
+        # same Zobrist hash as the one of a Board with the same position
+        self._zobrist: ZobristKeys = zobrist_keys(dim_x, dim_y)
+        self._hash: int = state_key(self._zobrist, 0, False)
+
+    def _bit(self, x: int, y: int) -> int:
+        return 1 << (y * self._masks.stride + x)
+
+    def __getitem__(self, coord: tuple) -> Cell:
+        x, y = coord
+        if not self.has_cell((x, y)):
+            raise IndexError(f"Cell {(x, y)} out of range")
+        bit = self._bit(x, y)
+        if self._red & bit:
+            color = Color.Red
+        elif self._blue & bit:
+            color = Color.Blue
+        else:
+            color = Color.Empty
+        return self._cells[color.value][y * self.dim_x + x]
+
+    def __setitem__(self, coord: tuple, val: Cell):
+        x, y = coord
+        assert val.x == x
+        assert val.y == y
+        bit = self._bit(x, y)
+        cells = self._zobrist.cells
+        index = y * self.dim_x + x
+        self._hash ^= (
+            cells[self[x, y].color.value][index] ^ cells[val.color.value][index]
+        )
+        self._red &= ~bit
+        self._blue &= ~bit
+        match val.color:
+            case Color.Red:
+                self._red |= bit
+            case Color.Blue:
+                self._blue |= bit
+
+    def copy(self) -> "BitBoard":
+        """
+        An independent copy of the board, undo log included
+        """
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._undo_log = self._undo_log[:]
+        return clone
+
+    def __repr__(self) -> str:
+        return "BitBoard({dim_x}x{dim_y}, red={red:#x}, blue={blue:#x})".format_map(
+            {
+                "dim_x": self.dim_x,
+                "dim_y": self.dim_y,
+                "red": self._red,
+                "blue": self._blue,
+            }
+        )
+
+    def __str__(self) -> str:
+        """
+        Same left-slanted romboidal visualisation as Board.__str__
+        """
+        board_str = ""
+        for y in reversed(range(self.dim_y)):
+            new_line = " " * (self.dim_y - y - 1)
+            for x in range(self.dim_x):
+                bit = self._bit(x, y)
+                if self._red & bit:
+                    cell_str = "R"
+                elif self._blue & bit:
+                    cell_str = "b"
+                else:
+                    cell_str = "-"
+                new_line += cell_str + " "
+            new_line += "\n"
+            board_str += new_line
+        return board_str
+
+    def neighbours_mask(self, mask: int) -> int:
+        """
+        Returns the mask of all the cells adjacent to at least
+        one cell of @param mask (cells of mask itself may be included)
+        """
+        stride = self._masks.stride
+        return (
+            (mask << 1)
+            | (mask >> 1)
+            | (mask << stride)
+            | (mask >> stride)
+            | (mask << (stride + 1))
+            | (mask >> (stride + 1))
+        ) & self._masks.full
+
+    def place_stone(self, i: int, j: int, color: Color) -> None:
+        """
+        place a stone at cell i,j on the board if this is empty
+        """
+        if not self.has_cell((i, j)):
+            raise ValueError(
+                "Cannot place stone at cell {cell}-"
+                "out of range".format_map({"cell": (i, j)})
+            )
+        bit = self._bit(i, j)
+        cells = self._zobrist.cells
+        index = j * self.dim_x + i
+        self._undo_log.append((self._red, self._blue, self._hash))
+        self._hash ^= self._state_key()
+        if (self._red | self._blue) & bit:
+            if not (self._swap_rule_allowed and self._number_of_moves_made == 1):
+                self._red, self._blue, self._hash = self._undo_log.pop()
+                raise ValueError(
+                    "Cannot place stone at cell {cell}-"
+                    "already occupied".format_map({"cell": (i, j)})
+                )
+            previous = Color.Red if self._red & bit else Color.Blue
+            self._hash ^= cells[previous.value][index]
+            self._red &= ~bit
+            self._blue &= ~bit
+        match color:
+            case Color.Red:
+                self._red |= bit
+            case Color.Blue:
+                self._blue |= bit
+        self._hash ^= cells[color.value][index]
+        self._number_of_moves_made += 1
+        self._hash ^= self._state_key()
+
+    def undo(self) -> None:
+        """
+        Takes back the last move made with place_stone
+        """
+        if not self._undo_log:
+            raise ValueError("Cannot undo-no move has been made")
+        self._red, self._blue, self._hash = self._undo_log.pop()
+        self._number_of_moves_made -= 1
+
+    def _state_key(self) -> int:
+        return state_key(self._zobrist, self._number_of_moves_made, self.swap_available)
+
+    @property
+    def zobrist_hash(self) -> int:
+        """
+        64 bit hash of the position, see Board.zobrist_hash
+        """
+        return self._hash
+
+    @contextmanager
+    def probe_stone(self, i: int, j: int, color: Color) -> Iterator["BitBoard"]:
+        """
+        Places a stone for the duration of a with block
+        and undoes the move on exit
+        """
+        self.place_stone(i, j, color)
+        try:
+            yield self
+        finally:
+            self.undo()
+
+    def stones(self, color: Color) -> int:
+        """
+        Returns the mask of the stones of the given color
+        """
+        match color:
+            case Color.Red:
+                return self._red
+            case Color.Blue:
+                return self._blue
+            case Color.Empty:
+                return self._masks.full & ~(self._red | self._blue)
+        raise ValueError(f"Not recognised color {color}")
+
+    def _border_masks(self, color: Color) -> tuple[int, int]:
+        match color:
+            case Color.Red:
+                return self._masks.bottom, self._masks.top
+            case Color.Blue:
+                return self._masks.left, self._masks.right
+        raise ValueError(f"Not recognised color {color}")
+
+    def _has_color_won(self, color: Color) -> bool:
+        """
+        Returns true iff there exist a continous path of stones of that color
+        from the two of it's borders.
+        The stones touching the first border are flooded through
+        the neighbour shifts until the second border is reached
+        or the flood stops growing.
+        """
+        stones = self.stones(color)
+        border_1, border_2 = self._border_masks(color)
+        stride = self._masks.stride
+        diagonal = stride + 1
+        reached = stones & border_1
+        while reached:
+            if reached & border_2:
+                return True
+            # stones never sit on the guard column,
+            # so there is no need to mask the shifts with full
+            grown = (
+                reached
+                | (reached << 1)
+                | (reached >> 1)
+                | (reached << stride)
+                | (reached >> stride)
+                | (reached << diagonal)
+                | (reached >> diagonal)
+            ) & stones
+            if grown == reached:
+                break
+            reached = grown
+        return False
+
+    def has_cell(self, coords: tuple[int, int]) -> bool:
+        x, y = coords
+        return (0 <= x < self.dim_x) and (0 <= y < self.dim_y)
+
+    def is_border_cell(self, coords: tuple[int, int]) -> bool:
+        x, y = coords
+        return x == 0 or x == (self.dim_x - 1) or y == 0 or y == (self.dim_y - 1)
+
+    def is_red_border_cell(self, coords: tuple[int, int]) -> bool:
+        x, y = coords
+        return y == 0 or y == (self.dim_y - 1)
+
+    def is_blue_border_cell(self, coords: tuple[int, int]) -> bool:
+        x, y = coords
+        return x == 0 or x == (self.dim_x - 1)
+
+    def _cells_of_mask(self, mask: int, color: Color) -> list[Cell]:
+        return [Cell(x, y, color) for x, y in self._coords_of_mask(mask)]
+
+    def _coords_of_mask(self, mask: int) -> list[tuple[int, int]]:
+        """
+        Lists the coordinates of the set bits of @param mask,
+        lowest bit first (that is, y major order).
+        The binary digits of the mask are used as selectors
+        so that the whole scan runs in C.
+        """
+        selectors = bin(mask)[:1:-1].encode().translate(_BIN_DIGITS)
+        return list(compress(self._masks.coords, selectors))
+
+    def get_borders(self, color: Color) -> tuple[list[Cell], list[Cell]]:
+        """
+        Returns a tuple containing the two lists of cells of a given color
+        that lie on the two borders of that color
+        """
+        stones = self.stones(color)
+        border_1, border_2 = self._border_masks(color)
+        return (
+            self._cells_of_mask(stones & border_1, color),
+            self._cells_of_mask(stones & border_2, color),
+        )
+
+    def find_neighbours(self, coords: tuple[int, int]) -> set[Cell]:
+        """
+        find_neighbours function finds all neighbouring cells
+        in the board to the cell defined by @param coords
+        """
+        x, y = coords
+        nbrs = self.neighbours_mask(self._bit(x, y))
+        return (
+            set(self._cells_of_mask(nbrs & self._red, Color.Red))
+            | set(self._cells_of_mask(nbrs & self._blue, Color.Blue))
+            | set(self._cells_of_mask(nbrs & self.stones(Color.Empty), Color.Empty))
+        )
+
+    @property
+    def swap_available(self) -> bool:
+        return self._number_of_moves_made == 1 and self._swap_rule_allowed
+
+    @property
+    def possible_moves(self) -> list[tuple[int, int]]:
+        if self.swap_available:
+            return self._coords_of_mask(self._masks.full)
+        else:
+            return self.empty_positions
+
+    @property
+    def empty_positions(self) -> list[tuple[int, int]]:
+        """
+        Returns all the positions (i,j) for which the
+        (i,j) cell is empty
+        """
+        return self._coords_of_mask(self.stones(Color.Empty))
+
+    def iter_empty_positions(self) -> Iterator[tuple[int, int]]:
+        return iter(self.empty_positions)
+
+    @property
+    def number_of_empty_positions(self) -> int:
+        return self.stones(Color.Empty).bit_count()
+
+    def is_empty_position(self, coords: tuple[int, int]) -> bool:
+        x, y = coords
+        return self.has_cell(coords) and not (
+            (self._red | self._blue) & self._bit(x, y)
+        )
+
+    def is_legal_move(self, coords: tuple[int, int]) -> bool:
+        if self.swap_available:
+            return self.has_cell(coords)
+        return self.is_empty_position(coords)
+
+    def random_move(self, rng: Optional[random.Random] = None) -> tuple[int, int]:
+        """
+        Draws one of possible_moves uniformly at random.
+        Random cells are tried until an empty one comes up, which
+        takes O(1) tries unless the board is nearly full, in which
+        case the empty positions are listed instead
+        """
+        rng = rng if rng is not None else random
+        cells = self.dim_x * self.dim_y
+        if self.swap_available:
+            index = rng.randrange(cells)
+            return (index % self.dim_x, index // self.dim_x)
+        occupied = self._red | self._blue
+        for _ in range(8 if cells else 0):
+            index = rng.randrange(cells)
+            x, y = index % self.dim_x, index // self.dim_x
+            if not occupied & self._bit(x, y):
+                return (x, y)
+        empty_positions = self.empty_positions
+        if not empty_positions:
+            raise ValueError("Cannot draw a move-the board is full")
+        return rng.choice(empty_positions)
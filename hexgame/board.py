@@ -1,11 +1,28 @@
 """board.py: A board to play a game of hex on"""
-from hexgame.cell import Cell
+import random
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from hexgame.cell import Cell, cell_table
 from hexgame.color import Color
 from hexgame.unionfind import UnionFind
+from hexgame.zobrist import ZobristKeys, state_key, zobrist_keys
 
 
 BOARD_DEFAULT_X_DIM = BOARD_DEFAULT_Y_DIM = int(11)
 
+# virtual nodes of the connected components that stand for
+# the four borders of the board, they are never cells of a board
+RED_BOTTOM = (-1, 0)
+RED_TOP = (-1, 1)
+BLUE_LEFT = (-2, 0)
+BLUE_RIGHT = (-2, 1)
+
+# the offsets from a cell (x, y) to its six neighbours
+HEX_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (1, 1), (-1, -1), (0, -1))
+
 __author__ = "Gianpiero Cea"
 
 """
@@ -24,6 +41,47 @@ __author__ = "Gianpiero Cea"
 """
 
 
+@lru_cache(maxsize=None)
+def neighbour_coords_table(
+    dim_x: int, dim_y: int
+) -> tuple[tuple[tuple[int, int], ...], ...]:
+    """
+    The hex adjacency of a dim_x * dim_y board, computed once per
+    board size and shared by all the boards of that size.
+    Entry y * dim_x + x holds the coordinates of the neighbours
+    of cell (x, y) that lie on the board
+    """
+    return tuple(
+        tuple(
+            (x + dx, y + dy)
+            for dx, dy in HEX_DIRECTIONS
+            if 0 <= x + dx < dim_x and 0 <= y + dy < dim_y
+        )
+        for y in range(dim_y)
+        for x in range(dim_x)
+    )
+
+
+@lru_cache(maxsize=None)
+def neighbour_table(dim_x: int, dim_y: int) -> tuple[tuple[int, ...], ...]:
+    """
+    Same as neighbour_coords_table, with every cell (x, y)
+    given by its flat index y * dim_x + x
+    """
+    return tuple(
+        tuple(y * dim_x + x for x, y in nbrs)
+        for nbrs in neighbour_coords_table(dim_x, dim_y)
+    )
+
+
+@lru_cache(maxsize=None)
+def coords_table(dim_x: int, dim_y: int) -> tuple[tuple[int, int], ...]:
+    """
+    Maps the flat index y * dim_x + x back to the cell (x, y)
+    """
+    return tuple((x, y) for y in range(dim_y) for x in range(dim_x))
+
+
 class Board:
     def __init__(
         self,
@@ -35,12 +93,153 @@ class Board:
     ) -> None:
         self.dim_x: int = dim_x
         self.dim_y: int = dim_y
+        # the canonical cells of this board size, placing a stone
+        # just points the board to one of them
+        self._cells: tuple[tuple[Cell, ...], ...] = cell_table(dim_x, dim_y)
         self._board: list[list[Cell]] = self._make_board(dim_x, dim_y)
+        self._neighbour_coords: tuple[tuple[tuple[int, int], ...], ...] = (
+            neighbour_coords_table(dim_x, dim_y)
+        )
 
         self._red_conn_comp: UnionFind[tuple[int, int]] = red_conn_comp
         self._blue_conn_comp: UnionFind[tuple[int, int]] = blue_conn_comp
+        # every border stone gets joined to the virtual node of its
+        # border, so a color has won iff its two virtual nodes are joined
+        for node in (RED_BOTTOM, RED_TOP):
+            red_conn_comp.add(node)
+        for node in (BLUE_LEFT, BLUE_RIGHT):
+            blue_conn_comp.add(node)
+        # the connected components record their unions so that undo
+        # can roll them back
+        red_conn_comp.track_history()
+        blue_conn_comp.track_history()
         self._swap_rule_allowed: bool = swap_rule_allowed
         self._number_of_moves_made: int = 0
+        # one entry per move made: the cell coordinates, the cell
+        # that was there before and the red and blue checkpoints
+        self._undo_log: list[tuple[int, int, Cell, int, int]] = []
+        # the flat indices of the empty cells, in no particular order,
+        # and the slot of each index in it (-1 if the cell is occupied),
+        # so that cells are added, removed and sampled in O(1)
+        self._coords: tuple[tuple[int, int], ...] = coords_table(dim_x, dim_y)
+        self._empty: list[int] = list(range(dim_x * dim_y))
+        self._empty_slot: list[int] = list(range(dim_x * dim_y))
+        # Zobrist hash of the stones, the side to move and the swap state
+        self._zobrist: ZobristKeys = zobrist_keys(dim_x, dim_y)
+        self._hash: int = state_key(self._zobrist, 0, False)
+
+    @classmethod
+    def create(
+        cls,
+        dim_x: int = BOARD_DEFAULT_X_DIM,
+        dim_y: int = BOARD_DEFAULT_Y_DIM,
+        swap_rule_allowed: bool = True,
+        union_find: type[UnionFind] = UnionFind,
+    ) -> "Board":
+        """
+        Builds an empty dim_x * dim_y board together with its
+        red and blue connected components.
+        @param union_find is the UnionFind class to use, e.g.
+        IndexedUnionFind to have them backed by integer arrays.
+        The nodes are listed row by row, so that cell (x, y)
+        is mapped to the index y * dim_x + x
+        """
+        nodes = [(x, y) for y in range(dim_y) for x in range(dim_x)]
+        return cls(
+            red_conn_comp=union_find(nodes),
+            blue_conn_comp=union_find(nodes),
+            dim_x=dim_x,
+            dim_y=dim_y,
+            swap_rule_allowed=swap_rule_allowed,
+        )
+
+    def copy(self) -> "Board":
+        """
+        An independent copy of the board, undo log included, made of
+        shallow copies of its flat lists and of its connected components.
+        The tables shared by the boards of a size stay shared
+        """
+        clone = object.__new__(type(self))
+        clone.dim_x = self.dim_x
+        clone.dim_y = self.dim_y
+        clone._cells = self._cells
+        clone._board = [column[:] for column in self._board]
+        clone._neighbour_coords = self._neighbour_coords
+        clone._red_conn_comp = self._red_conn_comp.copy()
+        clone._blue_conn_comp = self._blue_conn_comp.copy()
+        clone._swap_rule_allowed = self._swap_rule_allowed
+        clone._number_of_moves_made = self._number_of_moves_made
+        clone._undo_log = self._undo_log[:]
+        clone._coords = self._coords
+        clone._empty = self._empty[:]
+        clone._empty_slot = self._empty_slot[:]
+        clone._zobrist = self._zobrist
+        clone._hash = self._hash
+        return clone
+
+    def __copy__(self) -> "Board":
+        return self.copy()
+
+    def __deepcopy__(self, memo: dict) -> "Board":
+        return self.copy()
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the cells as one byte of color per cell and the undo
+        log and empty cells as integer arrays, instead of Cell objects.
+        The shared tables are rebuilt from the size on unpickling
+        """
+        dim_x = self.dim_x
+        undo_log = array("i")
+        for i, j, previous, red_checkpoint, blue_checkpoint in self._undo_log:
+            undo_log.extend(
+                (i, j, previous.color.value, red_checkpoint, blue_checkpoint)
+            )
+        colors = bytearray(dim_x * self.dim_y)
+        for x, column in enumerate(self._board):
+            for y, cell in enumerate(column):
+                colors[y * dim_x + x] = cell.color.value
+        return {
+            "dim_x": dim_x,
+            "dim_y": self.dim_y,
+            "swap_rule_allowed": self._swap_rule_allowed,
+            "number_of_moves_made": self._number_of_moves_made,
+            "hash": self._hash,
+            "colors": bytes(colors),
+            "empty": array("i", self._empty),
+            "undo_log": undo_log,
+            "red_conn_comp": self._red_conn_comp,
+            "blue_conn_comp": self._blue_conn_comp,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        dim_x = self.dim_x = state["dim_x"]
+        dim_y = self.dim_y = state["dim_y"]
+        self._cells = cell_table(dim_x, dim_y)
+        colors = state["colors"]
+        self._board = [
+            [self._cells[colors[y * dim_x + x]][y * dim_x + x] for y in range(dim_y)]
+            for x in range(dim_x)
+        ]
+        self._neighbour_coords = neighbour_coords_table(dim_x, dim_y)
+        self._red_conn_comp = state["red_conn_comp"]
+        self._blue_conn_comp = state["blue_conn_comp"]
+        self._swap_rule_allowed = state["swap_rule_allowed"]
+        self._number_of_moves_made = state["number_of_moves_made"]
+        undo_log = state["undo_log"]
+        self._undo_log = [
+            (i, j, self._cells[color][j * dim_x + i], red_checkpoint, blue_checkpoint)
+            for i, j, color, red_checkpoint, blue_checkpoint in zip(
+                *(undo_log[k::5] for k in range(5))
+            )
+        ]
+        self._coords = coords_table(dim_x, dim_y)
+        self._empty = list(state["empty"])
+        self._empty_slot = [-1] * (dim_x * dim_y)
+        for slot, index in enumerate(self._empty):
+            self._empty_slot[index] = slot
+        self._zobrist = zobrist_keys(dim_x, dim_y)
+        self._hash = state["hash"]
 
     def __getitem__(self, coord: tuple) -> Cell:
         x, y = coord
@@ -51,7 +250,14 @@ class Board:
         # TODO: I am not liking this..check later if we should drop x,y in cell
         assert val.x == x
         assert val.y == y
+        index = y * self.dim_x + x
+        was_empty = self._board[x][y].color == Color.Empty
+        self._toggle_stone_hash(index, self._board[x][y].color, val.color)
         self._board[x][y] = val
+        if was_empty and val.color != Color.Empty:
+            self._remove_empty(index)
+        elif not was_empty and val.color == Color.Empty:
+            self._add_empty(index)
 
     def __repr__(self) -> str:
         # TODO: change the Cell repr to be simpler
@@ -99,7 +305,10 @@ class Board:
         """
         represents a dim_x * dim_y board of hexagonal cells
         """
-        return [[Cell(x, y) for y in range(dim_y)] for x in range(dim_x)]
+        empty_cells = self._cells[Color.Empty.value]
+        return [
+            [empty_cells[y * dim_x + x] for y in range(dim_y)] for x in range(dim_x)
+        ]
 
     def _update_conn_comp(self, i, j, color) -> None:
         """
@@ -112,11 +321,20 @@ class Board:
             case Color.Blue:
                 conn_comp = self.blue_conn_comp
 
-        all_nbrs = self.find_neighbours((i, j))
-        nbrs = set((nbr.x, nbr.y) for nbr in all_nbrs if nbr.color == color)
+        board = self._board
+        for x, y in self._neighbour_coords[j * self.dim_x + i]:
+            if board[x][y].color == color:
+                conn_comp.union((i, j), (x, y))
 
-        for nbr in nbrs:
-            conn_comp.union((i, j), nbr)
+        border_1, border_2 = self._virtual_borders(color)
+        if color == Color.Red:
+            on_border_1, on_border_2 = j == 0, j == self.dim_y - 1
+        else:
+            on_border_1, on_border_2 = i == 0, i == self.dim_x - 1
+        if on_border_1:
+            conn_comp.union((i, j), border_1)
+        if on_border_2:
+            conn_comp.union((i, j), border_2)
 
     def place_stone(self, i: int, j: int, color: Color) -> None:
         """
@@ -127,9 +345,28 @@ class Board:
             if self[i, j].is_empty or (
                 self._swap_rule_allowed and self._number_of_moves_made == 1
             ):
-                self[i, j] = Cell(x=i, y=j, color=color)
+                previous = self._board[i][j]
+                self._undo_log.append(
+                    (
+                        i,
+                        j,
+                        previous,
+                        self._red_conn_comp.checkpoint(),
+                        self._blue_conn_comp.checkpoint(),
+                    )
+                )
+                index = j * self.dim_x + i
+                if previous.is_empty:
+                    self._remove_empty(index)
+                else:
+                    # swap move: the first stone leaves its components
+                    self._remove_first_stone(previous)
+                self._board[i][j] = self._cells[color.value][index]
                 self._update_conn_comp(i, j, color)
+                self._hash ^= self._state_key()
+                self._toggle_stone_hash(index, previous.color, color)
                 self._number_of_moves_made += 1
+                self._hash ^= self._state_key()
             else:
                 raise ValueError(
                     "Cannot place stone at cell {cell}-"
@@ -141,20 +378,113 @@ class Board:
                 "out of range".format_map({"cell": (i, j)})
             )
 
+    def _remove_first_stone(self, stone: Cell) -> None:
+        """
+        Takes the stone placed by the first move out of the connected
+        components of its color, by rolling them back to the checkpoint
+        taken just before it was placed
+        """
+        if not self._undo_log or self._undo_log[0][:2] != (stone.x, stone.y):
+            return
+        _, _, _, red_checkpoint, blue_checkpoint = self._undo_log[0]
+        match stone.color:
+            case Color.Red:
+                self._red_conn_comp.rollback(red_checkpoint)
+            case Color.Blue:
+                self._blue_conn_comp.rollback(blue_checkpoint)
+
+    def undo(self) -> None:
+        """
+        Takes back the last move made with place_stone, restoring the
+        cell, the connected components and the number of moves made.
+        Swap moves are undone by putting the first stone back
+        """
+        if not self._undo_log:
+            raise ValueError("Cannot undo-no move has been made")
+        i, j, previous, red_checkpoint, blue_checkpoint = self._undo_log.pop()
+        self._red_conn_comp.rollback(red_checkpoint)
+        self._blue_conn_comp.rollback(blue_checkpoint)
+        index = j * self.dim_x + i
+        self._hash ^= self._state_key()
+        self._toggle_stone_hash(index, self._board[i][j].color, previous.color)
+        self._board[i][j] = previous
+        self._number_of_moves_made -= 1
+        self._hash ^= self._state_key()
+        if previous.is_empty:
+            self._add_empty(index)
+        else:
+            self._update_conn_comp(i, j, previous.color)
+
+    def _state_key(self) -> int:
+        return state_key(self._zobrist, self._number_of_moves_made, self.swap_available)
+
+    def _toggle_stone_hash(self, index: int, old: Color, new: Color) -> None:
+        """
+        Updates the hash for cell @param index turning from color old to new
+        """
+        cells = self._zobrist.cells
+        self._hash ^= cells[old.value][index] ^ cells[new.value][index]
+
+    @property
+    def zobrist_hash(self) -> int:
+        """
+        64 bit hash of the position: the stones on the board,
+        the side to move and whether the swap move is available.
+        It is kept up to date by place_stone and undo
+        """
+        return self._hash
+
+    def _remove_empty(self, index: int) -> None:
+        """
+        Swap-removes cell @param index from the empty cells
+        """
+        slot = self._empty_slot[index]
+        last = self._empty.pop()
+        if last != index:
+            self._empty[slot] = last
+            self._empty_slot[last] = slot
+        self._empty_slot[index] = -1
+
+    def _add_empty(self, index: int) -> None:
+        self._empty_slot[index] = len(self._empty)
+        self._empty.append(index)
+
+    @contextmanager
+    def probe_stone(self, i: int, j: int, color: Color) -> Iterator["Board"]:
+        """
+        Places a stone for the duration of a with block
+        and undoes the move on exit:
+
+            with board.probe_stone(i, j, color):
+                won = board._has_color_won(color)
+        """
+        self.place_stone(i, j, color)
+        try:
+            yield self
+        finally:
+            self.undo()
+
     def _has_color_won(self, color: Color) -> bool:
         """
         Returns true iff there exist a continous path of stones of that color
-        from the two of it's borders
+        from the two of it's borders, that is iff the two virtual
+        border nodes are in the same connected component
         """
-        border_1, border_2 = self.get_borders(color)
+        border_1, border_2 = self._virtual_borders(color)
         conn_comp = self.get_conn_comp(color)
-        for node_1 in border_1:
-            for node_2 in border_2:
-                if conn_comp.find((node_1.x, node_1.y)) == conn_comp.find(
-                    (node_2.x, node_2.y)
-                ):
-                    return True
-        return False
+        return conn_comp.find(border_1) == conn_comp.find(border_2)
+
+    def _virtual_borders(self, color: Color) -> tuple[tuple[int, int], tuple[int, int]]:
+        """
+        Returns the two virtual nodes standing for the borders
+        of a given color
+        """
+        match color:
+            case Color.Red:
+                return (RED_BOTTOM, RED_TOP)
+            case Color.Blue:
+                return (BLUE_LEFT, BLUE_RIGHT)
+        raise ValueError(f"Not recognised color {color}")
 
     def has_cell(self, coords: tuple[int, int]) -> bool:
         """
@@ -230,34 +560,39 @@ class Board:
         x, y = coords
         return x == 0 or x == (self.dim_x - 1)
 
+    def index(self, coords: tuple[int, int]) -> int:
+        """
+        Returns the flat index y * dim_x + x of the cell (x, y),
+        the one used by neighbour_table and Board.create
+        """
+        x, y = coords
+        return y * self.dim_x + x
+
+    def iter_neighbours(self, coords: tuple[int, int]) -> Iterator[tuple[int, int]]:
+        """
+        Iterates over the coordinates of the neighbours of the cell
+        defined by @param coords, reading the precomputed adjacency
+        """
+        x, y = coords
+        return iter(self._neighbour_coords[y * self.dim_x + x])
+
     def find_neighbours(self, coords: tuple[int, int]) -> set[Cell]:
         """
         find_neighbours function finds all neighbouring cells
         in the board to the cell defined by @param coords
-        @return list of neighbouring cells
+        @return set of neighbouring cells
         """
-
         x, y = coords
-
-        # this is a theoretical neighborood in the
-        # sense that some of this cell might be out of the board
-        theoretical_nbrd = set(
-            (
-                Cell(x + 1, y),
-                Cell(x - 1, y),
-                Cell(x, y + 1),
-                Cell(x + 1, y + 1),
-                Cell(x - 1, y - 1),
-                Cell(x, y - 1),
-            )
-        )
-
-        nbrd = {
-            self[cell.x, cell.y]
-            for cell in theoretical_nbrd
-            if self.has_cell((cell.x, cell.y))
-        }
-        return nbrd
+        if self.has_cell(coords):
+            nbrs = self._neighbour_coords[y * self.dim_x + x]
+        else:
+            # only the neighbours of the board cells are precomputed
+            nbrs = [
+                (x + dx, y + dy)
+                for dx, dy in HEX_DIRECTIONS
+                if self.has_cell((x + dx, y + dy))
+            ]
+        return {self._board[nbr_x][nbr_y] for nbr_x, nbr_y in nbrs}
 
     @property
     def red_conn_comp(self) -> UnionFind[tuple[int, int]]:
@@ -267,12 +602,17 @@ class Board:
     def blue_conn_comp(self) -> UnionFind[tuple[int, int]]:
         return self._blue_conn_comp
 
+    @property
+    def swap_available(self) -> bool:
+        """
+        True iff the next move may be played on the first stone
+        """
+        return self._number_of_moves_made == 1 and self._swap_rule_allowed
+
     @property
     def possible_moves(self) -> list[tuple[int, int]]:
-        if self._number_of_moves_made == 1 and self._swap_rule_allowed:
-            return [
-                (x, y) for y, row in enumerate(self._board) for x, _ in enumerate(row)
-            ]
+        if self.swap_available:
+            return list(self._coords)
         else:
             return self.empty_positions
 
@@ -280,15 +620,69 @@ class Board:
     def empty_positions(self) -> list[tuple[int, int]]:
         """
         Returns all the positions (i,j) for which the
-        (i,j) cell is empty
+        (i,j) cell is empty, in no particular order
         """
-        # TODO:reimplement this with self.__iter__
-        return [
-            (x, y)
-            for y, row in enumerate(self._board)
-            for x, _ in enumerate(row)
-            if self[x, y].is_empty
-        ]
+        coords = self._coords
+        return [coords[index] for index in self._empty]
+
+    def iter_empty_positions(self) -> Iterator[tuple[int, int]]:
+        """
+        Iterates over the empty positions without copying them,
+        the board must not change during the iteration
+        """
+        return map(self._coords.__getitem__, self._empty)
+
+    @property
+    def number_of_empty_positions(self) -> int:
+        return len(self._empty)
+
+    def stones(self) -> list[tuple[int, Color]]:
+        """
+        The flat index and color of every stone on the board.
+        The stones are read from the undo log, in O(stones), unless
+        some were set through __setitem__: then all cells are scanned
+        """
+        dim_x = self.dim_x
+        board = self._board
+        stones = {}
+        for i, j, *_ in self._undo_log:
+            color = board[i][j].color
+            if color != Color.Empty:
+                stones[j * dim_x + i] = color
+        if len(stones) != dim_x * self.dim_y - len(self._empty):
+            coords = self._coords
+            stones = {
+                index: board[x][y].color
+                for index, (x, y) in enumerate(coords)
+                if board[x][y].color != Color.Empty
+            }
+        return list(stones.items())
+
+    def is_empty_position(self, coords: tuple[int, int]) -> bool:
+        """
+        O(1) test of the emptiness of the cell @param coords
+        """
+        x, y = coords
+        return self.has_cell(coords) and self._empty_slot[y * self.dim_x + x] >= 0
+
+    def is_legal_move(self, coords: tuple[int, int]) -> bool:
+        """
+        O(1) test of whether @param coords is one of possible_moves
+        """
+        if self.swap_available:
+            return self.has_cell(coords)
+        return self.is_empty_position(coords)
+
+    def random_move(self, rng: Optional[random.Random] = None) -> tuple[int, int]:
+        """
+        Draws in O(1) one of possible_moves uniformly at random
+        """
+        rng = rng if rng is not None else random
+        if self.swap_available:
+            return self._coords[rng.randrange(len(self._coords))]
+        if not self._empty:
+            raise ValueError("Cannot draw a move-the board is full")
+        return self._coords[self._empty[rng.randrange(len(self._empty))]]
 
 
 if __name__ == "__main__":
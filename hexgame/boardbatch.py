@@ -0,0 +1,206 @@
+"""boardbatch.py: many boards of hex played at once with numpy"""
+from typing import Optional
+
+import numpy as np
+
+from hexgame.board import BOARD_DEFAULT_X_DIM, BOARD_DEFAULT_Y_DIM, HEX_DIRECTIONS
+from hexgame.color import Color
+
+__author__ = "Gianpiero Cea"
+
+EMPTY = np.int8(Color.Empty.value)
+RED = np.int8(Color.Red.value)
+BLUE = np.int8(Color.Blue.value)
+
+
+def _shift_slices(dx: int, dy: int) -> tuple[tuple[slice, ...], tuple[slice, ...]]:
+    """
+    The slices that move the value of every cell (x, y) onto
+    its neighbour (x + dx, y + dy), for arrays shaped (n, dim_x, dim_y)
+    """
+
+    def axis(d: int) -> tuple[slice, slice]:
+        if d > 0:
+            return slice(d, None), slice(None, -d)
+        if d < 0:
+            return slice(None, d), slice(-d, None)
+        return slice(None), slice(None)
+
+    target_x, source_x = axis(dx)
+    target_y, source_y = axis(dy)
+    return (
+        (slice(None), target_x, target_y),
+        (slice(None), source_x, source_y),
+    )
+
+
+# the hex adjacency of Board.find_neighbours as array slices
+_NEIGHBOUR_SLICES = tuple(_shift_slices(dx, dy) for dx, dy in HEX_DIRECTIONS)
+
+
+class BoardBatch:
+    """
+    N boards of the same size held in one (N, dim_x, dim_y) int8 array,
+    where each entry is the Color value of the cell.
+    Moves, legal move masks and winners are computed for all
+    the boards at once.
+
+    Red always moves first, so board k has Red to move
+    iff moves_made[k] is even
+    """
+
+    def __init__(
+        self,
+        n_boards: int,
+        dim_x: int = BOARD_DEFAULT_X_DIM,
+        dim_y: int = BOARD_DEFAULT_Y_DIM,
+        swap_rule_allowed: bool = True,
+    ) -> None:
+        self.dim_x: int = dim_x
+        self.dim_y: int = dim_y
+        self.cells: np.ndarray = np.zeros((n_boards, dim_x, dim_y), dtype=np.int8)
+        self.moves_made: np.ndarray = np.zeros(n_boards, dtype=np.int32)
+        self._swap_rule_allowed: bool = swap_rule_allowed
+
+    def __len__(self) -> int:
+        return self.cells.shape[0]
+
+    @property
+    def to_move(self) -> np.ndarray:
+        """
+        The Color value of the side to move on every board
+        """
+        return np.where(self.moves_made % 2 == 0, RED, BLUE).astype(np.int8)
+
+    def legal_moves_mask(self) -> np.ndarray:
+        """
+        (N, dim_x, dim_y) boolean mask of the moves that can be played:
+        the empty cells, or every cell when the swap rule applies
+        """
+        legal = self.cells == EMPTY
+        if self._swap_rule_allowed:
+            legal |= (self.moves_made == 1)[:, None, None]
+        return legal
+
+    def place_stones(
+        self,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        colors: Optional[np.ndarray] = None,
+        boards: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Plays move (xs[k], ys[k]) on board boards[k] (by default
+        on every board), with colors[k] or with the side to move
+        """
+        boards = np.arange(len(self)) if boards is None else np.asarray(boards)
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        if colors is None:
+            colors = self.to_move[boards]
+        in_range = (0 <= xs) & (xs < self.dim_x) & (0 <= ys) & (ys < self.dim_y)
+        if not in_range.all():
+            raise ValueError(
+                "Cannot place stone on boards {boards}-out of range".format_map(
+                    {"boards": boards[~in_range].tolist()}
+                )
+            )
+        legal = self.legal_moves_mask()[boards, xs, ys]
+        if not legal.all():
+            raise ValueError(
+                "Cannot place stone on boards {boards}-already occupied".format_map(
+                    {"boards": boards[~legal].tolist()}
+                )
+            )
+        self.cells[boards, xs, ys] = colors
+        self.moves_made[boards] += 1
+
+    def random_moves(self, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Draws one uniformly random legal move per board,
+        (-1, -1) for the boards without legal moves
+        """
+        legal = self.legal_moves_mask().reshape(len(self), -1)
+        scores = np.where(legal, rng.random(legal.shape), -1.0)
+        flat = scores.argmax(axis=1)
+        flat[~legal.any(axis=1)] = -1
+        xs, ys = np.divmod(flat, self.dim_y)
+        xs[flat < 0] = -1
+        ys[flat < 0] = -1
+        return xs, ys
+
+    def step_random(self, rng: np.random.Generator) -> np.ndarray:
+        """
+        Plays one random move on every board that has no winner yet
+        and returns the winners after the move
+        """
+        playing = np.flatnonzero(self.winners() == EMPTY)
+        if len(playing):
+            xs, ys = self.random_moves(rng)
+            playing = playing[xs[playing] >= 0]
+            self.place_stones(xs[playing], ys[playing], boards=playing)
+        return self.winners()
+
+    def random_fill(self, rng: np.random.Generator) -> np.ndarray:
+        """
+        Fills every empty cell of every board, alternating colors
+        in a random order starting with the side to move, and returns
+        the winners. A full board always has exactly one winner, so
+        this finishes a random game in one vectorized pass
+        (the swap rule is not used).
+        """
+        empty = (self.cells == EMPTY).reshape(len(self), -1)
+        keys = np.where(empty, rng.random(empty.shape), np.inf)
+        # rank[k, c] is the turn at which cell c of board k gets filled
+        rank = np.empty_like(keys, dtype=np.int64)
+        order = keys.argsort(axis=1)
+        rank[np.arange(len(self))[:, None], order] = np.arange(empty.shape[1])
+        to_move = self.to_move[:, None]
+        colors = np.where(rank % 2 == 0, to_move, RED + BLUE - to_move)
+        flat = self.cells.reshape(len(self), -1)
+        flat[empty] = colors[empty]
+        self.moves_made += empty.sum(axis=1, dtype=np.int32)
+        return self.winners()
+
+    def has_color_won(self, color: Color) -> np.ndarray:
+        """
+        Boolean (N,) array, true for the boards where color connects
+        its two borders. The stones on the first border are flooded
+        through the hex adjacency until the flood stops growing
+        """
+        stones = self.cells == np.int8(color.value)
+        if stones.shape[1] == 0 or stones.shape[2] == 0:
+            return np.zeros(len(self), dtype=bool)
+        reached = np.zeros_like(stones)
+        match color:
+            case Color.Red:
+                reached[:, :, 0] = stones[:, :, 0]
+                goal = (slice(None), slice(None), -1)
+            case Color.Blue:
+                reached[:, 0, :] = stones[:, 0, :]
+                goal = (slice(None), -1, slice(None))
+            case _:
+                raise ValueError(f"Not recognised color {color}")
+
+        # only keep flooding the boards that are still growing
+        active = np.flatnonzero(reached.any(axis=(1, 2)))
+        while len(active):
+            front = reached[active]
+            grown = front.copy()
+            for target, source in _NEIGHBOUR_SLICES:
+                grown[target] |= front[source]
+            grown &= stones[active]
+            changed = (grown != front).any(axis=(1, 2))
+            reached[active] = grown
+            active = active[changed]
+        return reached[goal].any(axis=1)
+
+    def winners(self) -> np.ndarray:
+        """
+        (N,) int8 array with the Color value of the winner
+        of every board, Color.Empty where nobody has won yet
+        """
+        winners = np.full(len(self), EMPTY, dtype=np.int8)
+        winners[self.has_color_won(Color.Red)] = RED
+        winners[self.has_color_won(Color.Blue)] = BLUE
+        return winners
@@ -1,17 +1,49 @@
 """ cell.py: A single hexagonal cell that makes up a hex board """
+from functools import lru_cache
+
 from hexgame.color import Color
 
 __author__ = "Gianpiero Cea"
 
 
 class Cell:
+    """
+    Cells are immutable flyweights: there is a single Cell instance
+    for every (x, y, color), so Cell(x, y, color) never allocates
+    once that cell has been seen, and boards can share their cells.
+    """
+
+    __slots__ = ("x", "y", "color", "_is_empty", "_hash")
     __match_args__ = ("x", "y", "color")
 
-    def __init__(self, x: int, y: int, color: Color = Color.Empty):
-        self._is_empty: bool = color == Color.Empty
-        self.color: Color = color
-        self.x: int = x
-        self.y: int = y
+    # the canonical instances, keyed by (x, y, color)
+    _interned: dict[tuple[int, int, Color], "Cell"] = {}
+
+    def __new__(cls, x: int, y: int, color: Color = Color.Empty) -> "Cell":
+        key = (x, y, color)
+        cell = cls._interned.get(key)
+        if cell is None:
+            cell = super().__new__(cls)
+            object.__setattr__(cell, "x", x)
+            object.__setattr__(cell, "y", y)
+            object.__setattr__(cell, "color", color)
+            object.__setattr__(cell, "_is_empty", color == Color.Empty)
+            object.__setattr__(cell, "_hash", hash((x, y, color.value)))
+            cls._interned[key] = cell
+        return cell
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"Cell is immutable, cannot set {name}")
+
+    def __reduce__(self):
+        # unpickling goes through __new__, so it gets the canonical instance
+        return (Cell, (self.x, self.y, self.color))
+
+    def __copy__(self) -> "Cell":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "Cell":
+        return self
 
     def __repr__(self) -> str:
         return "({x},{y})- Color:{color}".format_map(
@@ -23,11 +55,27 @@ class Cell:
         return self.__repr__()
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return self._hash
 
-    def __eq__(self, __o: "Cell") -> bool:
+    def __eq__(self, __o: object) -> bool:
+        if self is __o:
+            return True
+        if not isinstance(__o, Cell):
+            return NotImplemented
         return self.x == __o.x and self.y == __o.y and self.color == __o.color
 
     @property
     def is_empty(self) -> bool:
         return self._is_empty
+
+
+@lru_cache(maxsize=None)
+def cell_table(dim_x: int, dim_y: int) -> tuple[tuple[Cell, ...], ...]:
+    """
+    All the cells of a dim_x * dim_y board, computed once per board size.
+    table[color.value][y * dim_x + x] is the cell (x, y) of that color
+    """
+    return tuple(
+        tuple(Cell(x, y, color) for y in range(dim_y) for x in range(dim_x))
+        for color in sorted(Color, key=lambda color: color.value)
+    )
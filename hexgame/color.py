@@ -8,3 +8,15 @@ class Color(enum.Enum):
     Empty = 0
     Red = 1
     Blue = 2
+
+    @property
+    def opponent(self) -> "Color":
+        """
+        The color playing against this one
+        """
+        match self:
+            case Color.Red:
+                return Color.Blue
+            case Color.Blue:
+                return Color.Red
+        raise ValueError(f"{self} has no opponent")
@@ -0,0 +1,302 @@
+"""dataset.py: training positions of hex games as memory-mapped numpy shards"""
+import glob
+import os
+from bisect import bisect_right
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.record import GameRecord
+from hexgame.symmetry import Transform, cell_permutation, transforms
+
+__author__ = "Gianpiero Cea"
+
+"""
+ Every position before a move of a game is one sample:
+
+     planes   uint8 (4, dim_x, dim_y), indexed [plane, x, y] like Board:
+              PLANES[k] is 1 where the cell is red, blue or empty and,
+              for the last plane, everywhere if Red is to move
+     moves    int16, the cell of the move played, as y * dim_x + x
+     winners  int8, the Color value of the winner of the game
+
+ The samples are written in shards of at most shard_size positions,
+ three .npy files each (shard-00000-planes.npy, ...), which Dataset
+ opens memory-mapped: slicing it only reads the rows it returns.
+ The positions of a game are built with one numpy pass over its moves,
+ without replaying them on a Board.
+"""
+
+PLANES = ("red", "blue", "empty", "red_to_move")
+DATASET_DEFAULT_SHARD_SIZE = 1 << 16
+
+_ARRAYS = ("planes", "moves", "winners")
+
+
+def _shard_path(directory: str, shard: int, array: str) -> str:
+    return os.path.join(directory, f"shard-{shard:05d}-{array}.npy")
+
+
+def _record_winner(record: GameRecord) -> Optional[Color]:
+    """
+    The winner of @param record, found on the final board
+    if the record does not know it
+    """
+    if record.winner is not None:
+        return record.winner
+    board = record.final_board()
+    for color in (Color.Red, Color.Blue):
+        if board._has_color_won(color):
+            return color
+    return None
+
+
+def game_arrays(record: GameRecord) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The planes, moves and winners of the positions of @param record
+    """
+    n_moves = len(record.moves)
+    cells = np.zeros((n_moves, record.dim_x, record.dim_y), dtype=np.int8)
+    board = np.zeros((record.dim_x, record.dim_y), dtype=np.int8)
+    moves = np.empty(n_moves, dtype=np.int16)
+    red_to_move = np.empty(n_moves, dtype=np.uint8)
+    for k, (x, y, color) in enumerate(record.iter_moves()):
+        cells[k] = board
+        # a swap move plays on the stone of the first move
+        board[x, y] = color.value
+        moves[k] = y * record.dim_x + x
+        red_to_move[k] = color == Color.Red
+
+    planes = np.empty((n_moves, len(PLANES), record.dim_x, record.dim_y), np.uint8)
+    planes[:, 0] = cells == Color.Red.value
+    planes[:, 1] = cells == Color.Blue.value
+    planes[:, 2] = cells == Color.Empty.value
+    planes[:, 3] = red_to_move[:, None, None]
+    winner = _record_winner(record)
+    winners = np.full(n_moves, winner.value if winner else 0, dtype=np.int8)
+    return planes, moves, winners
+
+
+class DatasetWriter:
+    """
+    Writes the positions of games to the shards of @param directory,
+    after the shards already there:
+
+        with DatasetWriter("positions", dim_x=11, dim_y=11) as writer:
+            for record in iter_records("games.hexr"):
+                writer.add_record(record)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dim_x: int,
+        dim_y: int,
+        shard_size: int = DATASET_DEFAULT_SHARD_SIZE,
+    ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dim_x = dim_x
+        self.dim_y = dim_y
+        self.shard_size = shard_size
+        self.shard: int = len(_shard_files(directory))
+        self.positions: int = 0
+        self._planes = np.empty((shard_size, len(PLANES), dim_x, dim_y), np.uint8)
+        self._moves = np.empty(shard_size, dtype=np.int16)
+        self._winners = np.empty(shard_size, dtype=np.int8)
+        self._filled = 0
+
+    def add_record(self, record: GameRecord) -> None:
+        if (record.dim_x, record.dim_y) != (self.dim_x, self.dim_y):
+            raise ValueError(
+                f"Cannot add game of size {record.dim_x}x{record.dim_y}"
+                f"-dataset is {self.dim_x}x{self.dim_y}"
+            )
+        planes, moves, winners = game_arrays(record)
+        start = 0
+        while start < len(moves):
+            size = min(len(moves) - start, self.shard_size - self._filled)
+            end = self._filled + size
+            self._planes[self._filled : end] = planes[start : start + size]
+            self._moves[self._filled : end] = moves[start : start + size]
+            self._winners[self._filled : end] = winners[start : start + size]
+            self._filled = end
+            start += size
+            if self._filled == self.shard_size:
+                self.flush()
+        self.positions += len(moves)
+
+    def add_game(self, game: Game) -> None:
+        self.add_record(GameRecord.from_game(game))
+
+    def flush(self) -> None:
+        """
+        Writes the buffered positions as a new shard
+        """
+        if not self._filled:
+            return
+        for array, data in zip(_ARRAYS, (self._planes, self._moves, self._winners)):
+            np.save(
+                _shard_path(self.directory, self.shard, array), data[: self._filled]
+            )
+        self.shard += 1
+        self._filled = 0
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _shard_files(directory: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(directory, "shard-*-planes.npy")))
+
+
+class Dataset:
+    """
+    The shards of @param directory, memory-mapped and indexed
+    as one sequence of (planes, moves, winners)
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.shards: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for planes_path in _shard_files(directory):
+            prefix = planes_path[: -len("planes.npy")]
+            self.shards.append(
+                tuple(
+                    np.load(f"{prefix}{array}.npy", mmap_mode="r") for array in _ARRAYS
+                )
+            )
+        # index of the first position of every shard, and the total
+        self._offsets: list[int] = [0]
+        for _, moves, _ in self.shards:
+            self._offsets.append(self._offsets[-1] + len(moves))
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    def __getitem__(
+        self, key: Union[int, slice]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The position at index @param key, or the positions of a slice,
+        copied out of the shards they span
+        """
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError(f"Cannot slice dataset with step {step}")
+            return self._range(start, max(start, stop))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(f"Cannot get position {key}-out of range")
+        shard = bisect_right(self._offsets, key) - 1
+        index = key - self._offsets[shard]
+        planes, moves, winners = self.shards[shard]
+        return np.array(planes[index]), moves[index], winners[index]
+
+    def _range(
+        self, start: int, stop: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        parts: list[tuple[np.ndarray, ...]] = []
+        shard = max(0, bisect_right(self._offsets, start) - 1)
+        while start < stop and shard < len(self.shards):
+            offset = self._offsets[shard]
+            end = min(stop, self._offsets[shard + 1])
+            parts.append(
+                tuple(
+                    array[start - offset : end - offset] for array in self.shards[shard]
+                )
+            )
+            start = end
+            shard += 1
+        if not parts:
+            dim_x, dim_y = self.shards[0][0].shape[2:] if self.shards else (0, 0)
+            return (
+                np.empty((0, len(PLANES), dim_x, dim_y), np.uint8),
+                np.empty(0, np.int16),
+                np.empty(0, np.int8),
+            )
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+def export_records(
+    records: Iterable[GameRecord],
+    directory: str,
+    shard_size: int = DATASET_DEFAULT_SHARD_SIZE,
+) -> int:
+    """
+    Writes the positions of @param records to the shards of
+    @param directory, returning how many were written.
+    The board size is the one of the first record
+    """
+    writer: Optional[DatasetWriter] = None
+    for record in records:
+        if writer is None:
+            writer = DatasetWriter(directory, record.dim_x, record.dim_y, shard_size)
+        writer.add_record(record)
+    if writer is None:
+        return 0
+    writer.close()
+    return writer.positions
+
+
+def transform_arrays(
+    planes: np.ndarray, moves: np.ndarray, winners: np.ndarray, transform: Transform
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The samples mapped by @param transform, see hexgame.symmetry:
+    the colors of the stones, of the side to move and of the winner
+    are swapped along with the cells by the transposing transforms
+    """
+    _, _, dim_x, dim_y = planes.shape
+    match transform:
+        case Transform.Identity:
+            return planes, moves, winners
+        case Transform.Rotate180:
+            planes = planes[:, :, ::-1, ::-1]
+        case Transform.Transpose:
+            planes = planes[:, [1, 0, 2, 3]].transpose(0, 1, 3, 2)
+        case Transform.AntiTranspose:
+            planes = planes[:, [1, 0, 2, 3], ::-1, ::-1].transpose(0, 1, 3, 2)
+    planes = np.ascontiguousarray(planes)
+    permutation = np.asarray(cell_permutation(transform, dim_x, dim_y), np.int16)
+    moves = permutation[moves]
+    if transform.swaps_colors:
+        planes[:, 3] ^= 1
+        winners = np.where(winners == 0, 0, 3 - winners).astype(np.int8)
+    return planes, moves, winners
+
+
+def augment(
+    planes: np.ndarray, moves: np.ndarray, winners: np.ndarray
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Yields the samples under every transform of their board size,
+    identity first, e.g. for a batch read from a Dataset
+    """
+    _, _, dim_x, dim_y = planes.shape
+    for transform in transforms(dim_x, dim_y):
+        yield transform_arrays(planes, moves, winners, transform)
+
+
+def position_board(planes: np.ndarray) -> Board:
+    """
+    A Board with the stones of the @param planes of one position.
+    The stones are placed in no particular order, so only
+    the cells of the board are meaningful
+    """
+    _, dim_x, dim_y = planes.shape
+    board = Board.create(dim_x=dim_x, dim_y=dim_y, swap_rule_allowed=False)
+    for color, plane in ((Color.Red, planes[0]), (Color.Blue, planes[1])):
+        for x, y in zip(*np.nonzero(plane)):
+            board.place_stone(int(x), int(y), color)
+    return board
@@ -0,0 +1,306 @@
+"""distance.py: how many stones each color still needs to connect"""
+import heapq
+from collections import deque
+from typing import Optional
+
+from hexgame.board import Board, coords_table, neighbour_table
+from hexgame.color import Color
+
+__author__ = "Gianpiero Cea"
+
+"""
+ The connection distance of a color is the least number of empty cells
+ it has to fill to join its two borders: own stones cost 0, empty cells
+ cost 1 and opponent stones cannot be crossed.
+
+ For every cell two distances are kept, one from each border of the
+ color, both counting the cost of the cell itself. The connection
+ distance is then the least d1[c] + d2[c] - cost[c] over the cells,
+ and a stone of the color on the empty cell m brings it down to
+ min(D, d1[m] + d2[m] - 2), which answers "distance after every move"
+ in a single pass over the cells.
+
+ After a stone is placed only the distances that change are updated:
+ a cheaper cell lowers distances by a 0-1 breadth first search started
+ at it. A dearer cell can only raise the distances of the cells whose
+ shortest paths went through it: those are the cells reached from it
+ through tight edges (d[v] == d[u] + cost[v]). They are the only ones
+ reset, and they are recomputed from their untouched neighbours.
+"""
+
+# distance of the cells that cannot reach the border any more
+UNREACHABLE = 1 << 30
+
+
+class _BorderDistances:
+    """
+    Distances of every cell from one border of a color
+    """
+
+    def __init__(self, sources: list[bool], nbrs: tuple[tuple[int, ...], ...]):
+        self.sources = sources
+        self.nbrs = nbrs
+        self.dist: list[int] = [UNREACHABLE] * len(sources)
+
+    def recompute(self, cost: list[int]) -> None:
+        dist = [UNREACHABLE] * len(cost)
+        queue: deque[int] = deque()
+        for index, is_source in enumerate(self.sources):
+            if is_source and cost[index] < UNREACHABLE:
+                dist[index] = cost[index]
+                if cost[index]:
+                    queue.append(index)
+                else:
+                    queue.appendleft(index)
+        self.dist = dist
+        self._relax(queue, cost)
+
+    def _relax(self, queue: deque, cost: list[int]) -> None:
+        """
+        0-1 breadth first search from the cells in @param queue,
+        lowering the distances of their neighbours
+        """
+        dist = self.dist
+        nbrs = self.nbrs
+        while queue:
+            index = queue.popleft()
+            d = dist[index]
+            for nbr in nbrs[index]:
+                step = cost[nbr]
+                if step < UNREACHABLE and d + step < dist[nbr]:
+                    dist[nbr] = d + step
+                    if step:
+                        queue.append(nbr)
+                    else:
+                        queue.appendleft(nbr)
+
+    def _best_from_neighbours(self, index: int, cost: list[int]) -> int:
+        if cost[index] >= UNREACHABLE:
+            return UNREACHABLE
+        dist = self.dist
+        best = cost[index] if self.sources[index] else UNREACHABLE
+        for nbr in self.nbrs[index]:
+            if dist[nbr] + cost[index] < best:
+                best = dist[nbr] + cost[index]
+        return best
+
+    def decrease(self, index: int, cost: list[int]) -> None:
+        """
+        Cell @param index got cheaper, cost already holds its new cost
+        """
+        best = self._best_from_neighbours(index, cost)
+        if best < self.dist[index]:
+            self.dist[index] = best
+            self._relax(deque([index]), cost)
+
+    def increase(self, index: int, cost: list[int]) -> None:
+        """
+        Cell @param index got dearer, cost already holds its new cost
+        while the distances are still the ones of the old cost
+        """
+        dist = self.dist
+        nbrs = self.nbrs
+        if dist[index] >= UNREACHABLE:
+            return
+        # find the cells left without a shortest path: walking the tight
+        # edges out of index by increasing distance (empty cells before
+        # stones at the same distance), a cell keeps its distance iff it
+        # is still tight with a neighbour that keeps its own
+        affected = {index}
+        queued = {index}
+        heap: list[tuple[int, int, int]] = []
+        u = index
+        while True:
+            d = dist[u]
+            for v in nbrs[u]:
+                step = cost[v]
+                if v not in queued and step < UNREACHABLE and dist[v] == d + step:
+                    queued.add(v)
+                    heapq.heappush(heap, (dist[v], 1 - step, v))
+            if not heap:
+                break
+            while heap:
+                d, _, u = heapq.heappop(heap)
+                if not self._is_supported(u, affected, cost):
+                    affected.add(u)
+                    break
+            else:
+                break
+
+        for u in affected:
+            dist[u] = UNREACHABLE
+        # start again from the untouched neighbours and the border
+        frontier: list[tuple[int, int]] = []
+        for u in affected:
+            best = self._best_from_neighbours(u, cost)
+            if best < UNREACHABLE:
+                dist[u] = best
+                frontier.append((best, u))
+        heapq.heapify(frontier)
+        while frontier:
+            d, u = heapq.heappop(frontier)
+            if d > dist[u]:
+                continue
+            for v in nbrs[u]:
+                step = cost[v]
+                if step < UNREACHABLE and d + step < dist[v]:
+                    dist[v] = d + step
+                    heapq.heappush(frontier, (d + step, v))
+
+    def _is_supported(self, index: int, affected: set[int], cost: list[int]) -> bool:
+        """
+        True iff cell @param index keeps its distance: it is on the
+        border at the cost of the cell, or next to a cell that keeps its
+        distance and is closer, or as close but empty. Stones as close
+        as index do not count, a chain of stones cannot hold itself up
+        """
+        dist = self.dist
+        d = dist[index]
+        step = cost[index]
+        if self.sources[index] and d == step:
+            return True
+        for nbr in self.nbrs[index]:
+            if (
+                nbr not in affected
+                and dist[nbr] + step == d
+                and (step or cost[nbr] == 1)
+            ):
+                return True
+        return False
+
+
+class _ColorDistances:
+    """
+    The costs of the cells for a color and the distances
+    from both of its borders
+    """
+
+    def __init__(self, dim_x: int, dim_y: int, color: Color) -> None:
+        coords = coords_table(dim_x, dim_y)
+        nbrs = neighbour_table(dim_x, dim_y)
+        if color == Color.Red:
+            first = [y == 0 for x, y in coords]
+            second = [y == dim_y - 1 for x, y in coords]
+        else:
+            first = [x == 0 for x, y in coords]
+            second = [x == dim_x - 1 for x, y in coords]
+        self.color = color
+        self.cost: list[int] = [1] * len(coords)
+        self.borders = (
+            _BorderDistances(first, nbrs),
+            _BorderDistances(second, nbrs),
+        )
+
+    def cost_of(self, cell_color: Color) -> int:
+        if cell_color == self.color:
+            return 0
+        if cell_color == Color.Empty:
+            return 1
+        return UNREACHABLE
+
+    def recompute(self, colors: list[Color]) -> None:
+        self.cost = [self.cost_of(cell_color) for cell_color in colors]
+        for border in self.borders:
+            border.recompute(self.cost)
+
+    def update(self, index: int, cell_color: Color) -> None:
+        old_cost = self.cost[index]
+        new_cost = self.cost_of(cell_color)
+        if new_cost == old_cost:
+            return
+        self.cost[index] = new_cost
+        for border in self.borders:
+            if new_cost < old_cost:
+                border.decrease(index, self.cost)
+            else:
+                border.increase(index, self.cost)
+
+    def distance(self) -> int:
+        first, second = self.borders[0].dist, self.borders[1].dist
+        best = UNREACHABLE
+        for d1, d2, cost in zip(first, second, self.cost):
+            if cost < UNREACHABLE and d1 + d2 - cost < best:
+                best = d1 + d2 - cost
+        return best
+
+
+class ConnectionDistance:
+    """
+    The connection distances of both colors on @param board,
+    kept in step with the board through update and sync:
+
+        distances = ConnectionDistance(board)
+        board.place_stone(i, j, color)
+        distances.update((i, j))
+        red_needs = distances.distance(Color.Red)
+    """
+
+    def __init__(self, board: Board) -> None:
+        self.board = board
+        self._colors: dict[Color, _ColorDistances] = {
+            color: _ColorDistances(board.dim_x, board.dim_y, color)
+            for color in (Color.Red, Color.Blue)
+        }
+        self._distance: dict[Color, Optional[int]] = {}
+        self.sync()
+
+    def sync(self) -> None:
+        """
+        Recomputes every distance from scratch from the board
+        """
+        board = self.board
+        colors = [board[x, y].color for x, y in coords_table(board.dim_x, board.dim_y)]
+        for distances in self._colors.values():
+            distances.recompute(colors)
+        self._distance = {Color.Red: None, Color.Blue: None}
+
+    def update(self, coords: tuple[int, int]) -> None:
+        """
+        Reads again the cell @param coords from the board, after
+        a stone was placed on it or taken back by undo
+        """
+        x, y = coords
+        index = y * self.board.dim_x + x
+        cell_color = self.board[x, y].color
+        for distances in self._colors.values():
+            distances.update(index, cell_color)
+        self._distance = {Color.Red: None, Color.Blue: None}
+
+    def distance(self, color: Color) -> int:
+        """
+        The least number of stones color needs to place to connect
+        its two borders, UNREACHABLE if it cannot any more
+        """
+        distance = self._distance[color]
+        if distance is None:
+            distance = self._colors[color].distance()
+            self._distance[color] = distance
+        return distance
+
+    def distances_after_move(self, color: Color) -> list[int]:
+        """
+        For every cell by flat index, the distance of color after
+        it places a stone there; the current distance for the
+        cells that are not empty
+        """
+        current = self.distance(color)
+        distances = self._colors[color]
+        first, second = distances.borders[0].dist, distances.borders[1].dist
+        return [
+            (
+                d1 + d2 - 2
+                if cost == 1 and max(d1, d2) < UNREACHABLE and d1 + d2 - 2 < current
+                else current
+            )
+            for d1, d2, cost in zip(first, second, distances.cost)
+        ]
+
+    def evaluate(self, color: Color) -> float:
+        """
+        How many fewer stones color needs than its opponent, a color
+        that cannot connect any more needs one more than the board has
+        """
+        cap = self.board.dim_x * self.board.dim_y + 1
+        own = min(self.distance(color), cap)
+        other = min(self.distance(color.opponent), cap)
+        return float(other - own)
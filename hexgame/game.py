@@ -2,8 +2,11 @@
 
 from hexgame.color import Color
 from hexgame.board import Board
+from hexgame.instrumentation import Instrumentation, MoveEvent, search_nodes
 from hexgame.player import Player
+from typing import Optional
 import enum
+import time
 
 __author__ = "Gianpiero Cea"
 
@@ -18,26 +21,95 @@ class Game:
         board: Board,
         player_1: Player = Player(),
         player_2: Player = Player(Color.Blue),
+        instrumentation: Optional[Instrumentation] = None,
     ):
+        """
+        @param instrumentation, if given, records the timings
+        and counters of every move, see hexgame.instrumentation
+        """
         self.player_1: Player = player_1
         self.player_2: Player = player_2
         self.board: Board = board
         self.status: self.GameStatus = self.GameStatus.Running
         self.move: int = 0
         self.current_player: Player = self.player_1
+        # every move played, in order
+        self.history: list[tuple[int, int, Color]] = []
+        # the color of the winner, once the game is finished
+        self.winner: Optional[Color] = None
+        self.instrumentation: Optional[Instrumentation] = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(board)
 
     def _play(self) -> None:
+        if self.instrumentation is not None:
+            return self._play_instrumented(self.instrumentation)
         # player  move
         chosen_move: tuple[int, int, Color] = self.current_player.play(self.board)
+        self.apply_move(chosen_move)
+
+    def apply_move(self, chosen_move: tuple[int, int, Color]) -> None:
+        """
+        Plays @param chosen_move, decided by the current player
+        outside of the game, e.g. by hexgame.server
+        """
         i, j, color = chosen_move
-        self.place_stone(i, j, color)
+        self.board.place_stone(i, j, color)
+        self._end_move(chosen_move, self._has_player_won())
 
-        if self._has_player_won():
+    def _end_move(self, chosen_move: tuple[int, int, Color], has_won: bool) -> None:
+        """
+        Records @param chosen_move, already on the board, and either
+        finishes the game or hands the turn to the other player
+        """
+        self.history.append(chosen_move)
+        if has_won:
             self.status = self.GameStatus.Finished
+            self.winner = chosen_move[2]
         else:
             self.move += 1
             self.current_player = self._next_player()
 
+    def forfeit(self, color: Color) -> None:
+        """
+        Ends the game with a win of the opponent of @param color
+        """
+        self.status = self.GameStatus.Finished
+        self.winner = color.opponent
+
+    def _play_instrumented(self, instrumentation: Instrumentation) -> None:
+        """
+        Same as _play, timing each phase of the move
+        """
+        instrumentation.start_move()
+        start = time.perf_counter()
+        i, j, color = self.current_player.play(self.board)
+        instrumentation.measuring = True
+        decided = time.perf_counter()
+        try:
+            self.board.place_stone(i, j, color)
+            placed = time.perf_counter()
+            has_won = self._has_player_won()
+            checked = time.perf_counter()
+        finally:
+            instrumentation.measuring = False
+        instrumentation.record(
+            MoveEvent(
+                move=self.move,
+                color=color,
+                x=i,
+                y=j,
+                decide_s=decided - start,
+                place_s=placed - decided - instrumentation.connectivity_s,
+                connectivity_s=instrumentation.connectivity_s,
+                win_check_s=checked - placed,
+                finds=instrumentation.finds,
+                unions=instrumentation.unions,
+                nodes=search_nodes(self.current_player.last_search_stats),
+            )
+        )
+        self._end_move((i, j, color), has_won)
+
     def _next_player(self) -> Player:
         if self.current_player == self.player_2:
             return self.player_1
@@ -48,6 +120,15 @@ class Game:
         current_color = self.current_player.color
         return self.board._has_color_won(current_color)
 
+    def run(self) -> Color:
+        """
+        Plays the game to the end without printing anything
+        and returns the color of the winner
+        """
+        while self.status == self.GameStatus.Running:
+            self._play()
+        return self.current_player.color
+
     def start(self) -> None:
         while self.status == self.GameStatus.Running:
             print(self.board)
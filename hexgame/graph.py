@@ -1,5 +1,5 @@
 """graph.py Represents a graph """
-from typing import TypeVar, Generic, Optional
+from typing import TypeVar, Generic, Iterable, Optional
 from hexgame.unionfind import UnionFind
 
 T = TypeVar("T")
@@ -7,62 +7,133 @@ __author__ = "Gianpiero Cea"
 
 
 class Graph(Generic[T]):
+    """
+    An undirected graph as an adjacency dict, together with its
+    connected components. The components are kept up to date as
+    edges are added: every new edge is a set lookup to skip the
+    duplicates and one union, O(alpha(n))
+    """
+
     def __init__(
-        self, adjency: dict[T, list[T]] = {}, conn_comps: Optional[UnionFind[T]] = None
+        self,
+        adjency: Optional[dict[T, list[T]]] = None,
+        conn_comps: Optional[UnionFind[T]] = None,
+        union_find: type[UnionFind] = UnionFind,
     ) -> None:
-        self._adjency = adjency
+        """
+        @param union_find is the UnionFind class used to
+        compute the connected components, e.g. IndexedUnionFind
+        """
+        self._adjency: dict[T, list[T]] = adjency if adjency is not None else {}
+        # both directions of every edge, so add_edge skips duplicates in O(1)
+        self._edges: set[tuple[T, T]] = {
+            (node, nbr) for node, nbrs in self._adjency.items() for nbr in nbrs
+        }
+        self._make_symmetric()
+        self._union_find = union_find
         self._conn_comps = conn_comps if conn_comps else self.get_conn_comps()
 
+    def _make_symmetric(self) -> None:
+        """
+        Appends the reverse of the edges the adjacency lists in one
+        direction only, adding the neighbours missing from its keys
+        """
+        for node, nbrs in list(self._adjency.items()):
+            for nbr in nbrs:
+                if (nbr, node) not in self._edges:
+                    self._edges.add((nbr, node))
+                    self._adjency.setdefault(nbr, []).append(node)
+
     def __repr__(self) -> str:
         return str(self._adjency)
 
+    def __contains__(self, node: T) -> bool:
+        return node in self._adjency
+
+    def __len__(self) -> int:
+        return len(self._adjency)
+
+    @property
+    def conn_comps(self) -> UnionFind[T]:
+        """
+        The connected components, as kept up to date by add_edge
+        """
+        return self._conn_comps
+
+    def neighbours(self, node: T) -> list[T]:
+        return self._adjency[node]
+
     def get_conn_comps(self) -> UnionFind[T]:
         """
-        @returns: The connected components of this graph
+        @returns: The connected components of this graph,
+        computed from scratch
 
-        @implementation: goes through each new edge and
-        updates the connected components by unioning nodes
-        of the edge
+        @implementation: goes through each edge once, from the
+        first of its nodes to be visited, and unions its two nodes
         """
-        # TODO: probably can be optimised further
-        # with better traversal of graph
-        conn_comps = UnionFind(list(self._adjency.keys()))
-        edges: frozenset[frozenset[T]] = frozenset()
+        conn_comps = self._union_find(list(self._adjency.keys()))
+        visited: set[T] = set()
         for v, nbrs in self._adjency.items():
             for nbr in nbrs:
-                new_edge = frozenset((v, nbr))
-                if new_edge not in edges:
-                    edges.union(frozenset((nbr, v)))
-
+                if nbr not in visited:
+                    # a neighbour missing from the adjacency keys
+                    conn_comps.add(nbr)
                     conn_comps.union(v, nbr)
-
+            visited.add(v)
         return conn_comps
 
+    def add_node(self, node: T) -> None:
+        """
+        Adds a node with no edges, if it is not in the graph yet
+        """
+        if node not in self._adjency:
+            self._adjency[node] = []
+            self._conn_comps.add(node)
+
     def add_edge(self, node1: T, node2: T) -> None:
         """
         Add an edge to current graph and incrementally
         updates its connected components
         """
-        if node1 in self._adjency:
+        self.add_node(node1)
+        self.add_node(node2)
+        if (node1, node2) not in self._edges:
+            self._edges.add((node1, node2))
+            self._edges.add((node2, node1))
             self._adjency[node1].append(node2)
-        else:
-            self._adjency[node1] = [node2]
-        if node2 in self._adjency:
-            self._adjency[node1].append(node1)
-        else:
-            self._adjency[node2] = [node1]
+            self._adjency[node2].append(node1)
+        self._conn_comps.union(node1, node2)
 
-        # TODO:rework unionfind to make it work incrementally
-        self._conn_comps = self.get_conn_comps()
+    def add_edges(self, edges: Iterable[tuple[T, T]]) -> None:
+        """
+        Adds many edges in a single pass, same as calling
+        add_edge on each of them
+        """
+        adjency = self._adjency
+        edges_seen = self._edges
+        conn_comps = self._conn_comps
+        for node1, node2 in edges:
+            nbrs1 = adjency.get(node1)
+            if nbrs1 is None:
+                nbrs1 = adjency[node1] = []
+                conn_comps.add(node1)
+            nbrs2 = adjency.get(node2)
+            if nbrs2 is None:
+                nbrs2 = adjency[node2] = []
+                conn_comps.add(node2)
+            if (node1, node2) not in edges_seen:
+                edges_seen.add((node1, node2))
+                edges_seen.add((node2, node1))
+                nbrs1.append(node2)
+                nbrs2.append(node1)
+            conn_comps.union(node1, node2)
 
     def update_graph(self, node: T, nbrs: list[T]) -> None:
-        if node in self._adjency:
-            # TODO: this is horrible!!rewrite
-            self._adjency[node] = list({el for el in self._adjency[node] + nbrs})
-            self._conn_comps = self.get_conn_comps()
-        else:
-            pass
-        raise NotImplementedError
+        """
+        Adds @param node, if it is new, and joins it to each of @param nbrs
+        """
+        self.add_node(node)
+        self.add_edges((node, nbr) for nbr in nbrs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+"""instrumentation.py: where the time of a game of hex goes"""
+import json
+import time
+from typing import Any, Callable, NamedTuple, Optional, TextIO
+
+from hexgame.color import Color
+
+__author__ = "Gianpiero Cea"
+
+"""
+ Instrumentation is opt in: a Game built without it runs the plain
+ code path, with no timers and no counters. When it is given, the
+ Game times every move in four phases:
+
+     decide        the player choosing its move
+     place         Board.place_stone, less the connectivity update
+     connectivity  the update of the connected components
+     win_check     the test for the end of the game
+
+ and the board gets counting wrappers around the find and union of
+ its connected components (the finds made by union included) and a
+ timer around its connectivity update. They only count while the
+ Game plays the move, so the moves a search player makes and takes
+ back on the board are left out. Search players report the number
+ of nodes of their last search instead.
+"""
+
+PHASES = ("decide", "place", "connectivity", "win_check")
+
+
+class MoveEvent(NamedTuple):
+    move: int
+    color: Color
+    x: int
+    y: int
+    decide_s: float
+    place_s: float
+    connectivity_s: float
+    win_check_s: float
+    finds: int
+    unions: int
+    # nodes (or playouts) searched by the player, 0 for the other modes
+    nodes: int
+
+    @property
+    def total_s(self) -> float:
+        return self.decide_s + self.place_s + self.connectivity_s + self.win_check_s
+
+    def as_dict(self) -> dict:
+        return {
+            "move": self.move,
+            "color": self.color.name,
+            "x": self.x,
+            "y": self.y,
+            "decide_s": self.decide_s,
+            "place_s": self.place_s,
+            "connectivity_s": self.connectivity_s,
+            "win_check_s": self.win_check_s,
+            "total_s": self.total_s,
+            "finds": self.finds,
+            "unions": self.unions,
+            "nodes": self.nodes,
+        }
+
+
+class Instrumentation:
+    """
+    Collects the MoveEvents of one or more games.
+    Every event is also written as a JSON line to @param stream, if given
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        self.events: list[MoveEvent] = []
+        self.stream = stream
+        # counters of the board being played, reset at every move and
+        # only running while the move is played, not while searched
+        self.measuring: bool = False
+        self.finds: int = 0
+        self.unions: int = 0
+        self.connectivity_s: float = 0.0
+
+    def attach(self, board: Any) -> None:
+        """
+        Wraps the connected components and the connectivity update of
+        @param board with counters and timers. Boards without connected
+        components (e.g. BitBoard) are left alone
+        """
+        for name in ("red_conn_comp", "blue_conn_comp"):
+            conn_comp = getattr(board, name, None)
+            if conn_comp is not None:
+                conn_comp.find = self._counting(conn_comp.find, "finds")
+                conn_comp.union = self._counting(conn_comp.union, "unions")
+        update = getattr(board, "_update_conn_comp", None)
+        if update is not None:
+            board._update_conn_comp = self._timing(update)
+
+    def detach(self, board: Any) -> None:
+        """
+        Takes the wrappers of attach off @param board
+        """
+        for name in ("red_conn_comp", "blue_conn_comp"):
+            conn_comp = getattr(board, name, None)
+            if conn_comp is not None:
+                conn_comp.__dict__.pop("find", None)
+                conn_comp.__dict__.pop("union", None)
+        board.__dict__.pop("_update_conn_comp", None)
+
+    def _counting(self, method: Callable, counter: str) -> Callable:
+        def counted(*args):
+            if self.measuring:
+                setattr(self, counter, getattr(self, counter) + 1)
+            return method(*args)
+
+        return counted
+
+    def _timing(self, method: Callable) -> Callable:
+        def timed(*args):
+            if not self.measuring:
+                return method(*args)
+            start = time.perf_counter()
+            try:
+                return method(*args)
+            finally:
+                self.connectivity_s += time.perf_counter() - start
+
+        return timed
+
+    def start_move(self) -> None:
+        self.finds = 0
+        self.unions = 0
+        self.connectivity_s = 0.0
+
+    def record(self, event: MoveEvent) -> None:
+        self.events.append(event)
+        if self.stream is not None:
+            self.stream.write(json.dumps(event.as_dict()) + "\n")
+
+    def write_jsonl(self, stream: TextIO) -> None:
+        """
+        Writes every event recorded so far as a JSON line
+        """
+        for event in self.events:
+            stream.write(json.dumps(event.as_dict()) + "\n")
+
+    def summary(self) -> dict:
+        """
+        Totals, means and maxima of the phases, move latency
+        percentiles, union find operations and nodes searched
+        """
+        events = self.events
+        moves = len(events)
+        phases = {}
+        for phase in PHASES:
+            values = [getattr(event, f"{phase}_s") for event in events]
+            phases[phase] = {
+                "total_s": sum(values),
+                "mean_s": sum(values) / moves if moves else 0.0,
+                "max_s": max(values, default=0.0),
+            }
+        latencies = sorted(event.total_s for event in events)
+        nodes = sum(event.nodes for event in events)
+        decide_s = phases["decide"]["total_s"]
+        return {
+            "moves": moves,
+            "total_s": sum(latencies),
+            "phases": phases,
+            "latency_p50_s": _percentile(latencies, 0.50),
+            "latency_p95_s": _percentile(latencies, 0.95),
+            "latency_max_s": latencies[-1] if latencies else 0.0,
+            "finds": sum(event.finds for event in events),
+            "unions": sum(event.unions for event in events),
+            "nodes": nodes,
+            "nodes_per_second": nodes / decide_s if decide_s > 0 else 0.0,
+        }
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def search_nodes(stats: Any) -> int:
+    """
+    The nodes searched according to the last_search_stats of a player
+    """
+    if stats is None:
+        return 0
+    return getattr(stats, "nodes", 0)
@@ -0,0 +1,174 @@
+"""mcts.py: Monte Carlo tree search (UCT) for a game of hex"""
+import math
+import random
+import time
+from typing import Optional
+
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.playout import random_playout
+
+__author__ = "Gianpiero Cea"
+
+MCTS_DEFAULT_PLAYOUTS = 1000
+
+
+class MCTSNode:
+    """
+    A node of the search tree: the position reached by
+    playing move with color from the position of its parent
+    """
+
+    __slots__ = (
+        "move",
+        "color",
+        "parent",
+        "children",
+        "untried_moves",
+        "visits",
+        "wins",
+        "is_winning",
+    )
+
+    def __init__(
+        self,
+        move: Optional[tuple[int, int]],
+        color: Color,
+        parent: Optional["MCTSNode"],
+        untried_moves: list[tuple[int, int]],
+        is_winning: bool = False,
+    ) -> None:
+        self.move = move
+        self.color = color
+        self.parent = parent
+        self.children: list["MCTSNode"] = []
+        self.untried_moves = untried_moves
+        self.visits: int = 0
+        # number of playouts won by color
+        self.wins: float = 0
+        # true iff move wins the game on the spot
+        self.is_winning = is_winning
+
+    def best_child(self, exploration: float) -> "MCTSNode":
+        """
+        The child maximising the UCB1 bound
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits
+            + exploration * math.sqrt(log_visits / child.visits),
+        )
+
+
+class MCTSStats:
+    """
+    What the last search did
+    """
+
+    def __init__(self, playouts: int, nodes: int, seconds: float) -> None:
+        self.playouts = playouts
+        self.nodes = nodes
+        self.seconds = seconds
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.seconds if self.seconds > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"MCTSStats(playouts={self.playouts}, nodes={self.nodes}, "
+            f"seconds={self.seconds:.3f}, "
+            f"playouts_per_second={self.playouts_per_second:.0f})"
+        )
+
+
+class MCTS:
+    """
+    Upper Confidence bounds applied to Trees.
+
+    Every iteration walks down the tree with UCB1, expands one new
+    node and finishes the game with a random playout. The tree moves
+    are played on the board itself and undone afterwards, so the board
+    is left as it was found.
+
+    The search stops after @param playouts iterations or after
+    @param time_limit seconds, whichever comes first
+    """
+
+    def __init__(
+        self,
+        playouts: Optional[int] = MCTS_DEFAULT_PLAYOUTS,
+        time_limit: Optional[float] = None,
+        exploration: float = math.sqrt(2),
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if playouts is None and time_limit is None:
+            raise ValueError("MCTS needs a playout budget or a time limit")
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self._rng = rng if rng is not None else random.Random()
+        self.stats: Optional[MCTSStats] = None
+
+    def search(self, board: Board, color: Color) -> tuple[int, int]:
+        """
+        Returns the move that color should play on @param board
+        """
+        start = time.perf_counter()
+        deadline = start + self.time_limit if self.time_limit is not None else None
+        root = MCTSNode(None, color.opponent, None, board.possible_moves)
+        playouts = 0
+        nodes = 1
+        while self.playouts is None or playouts < self.playouts:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            node = root
+            moves_made = 0
+
+            # selection
+            while not node.untried_moves and node.children and not node.is_winning:
+                node = node.best_child(self.exploration)
+                board.place_stone(*node.move, node.color)
+                moves_made += 1
+
+            # expansion
+            if node.untried_moves and not node.is_winning:
+                move = node.untried_moves.pop(
+                    self._rng.randrange(len(node.untried_moves))
+                )
+                mover = node.color.opponent
+                board.place_stone(*move, mover)
+                moves_made += 1
+                child = MCTSNode(
+                    move,
+                    mover,
+                    node,
+                    board.possible_moves,
+                    is_winning=board._has_color_won(mover),
+                )
+                node.children.append(child)
+                node = child
+                nodes += 1
+
+            # simulation
+            if node.is_winning:
+                winner = node.color
+            else:
+                winner = random_playout(board, node.color.opponent, self._rng)
+            for _ in range(moves_made):
+                board.undo()
+
+            # backpropagation
+            while node is not None:
+                node.visits += 1
+                if node.color == winner:
+                    node.wins += 1
+                node = node.parent
+            playouts += 1
+
+        self.stats = MCTSStats(playouts, nodes, time.perf_counter() - start)
+        if not root.children:
+            # not even one iteration fitted in the budget
+            return self._rng.choice(root.untried_moves)
+        return max(root.children, key=lambda child: child.visits).move
@@ -0,0 +1,244 @@
+"""openings.py: an opening book mined from games of hex"""
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, NamedTuple, Optional
+
+from hexgame.board import Board
+from hexgame.record import GameRecord, iter_records
+from hexgame.symmetry import canonical_key, transform_cell
+
+__author__ = "Gianpiero Cea"
+
+"""
+ Usage:
+     python -m hexgame.openings games.hexr --output book.hexb --plies 10
+
+ The book counts, for every position of the first plies of the games,
+ how often each move was played and how often the player of the move
+ went on to win. Positions are keyed by their canonical key (see
+ hexgame.symmetry) and the moves are stored as seen on the canonical
+ position, so the symmetric openings share their entries.
+
+ The file holds a header and four columns sorted by (key, move):
+
+     MAGIC, then dim_x, dim_y, plies, entries as uint32
+     keys    uint64 per entry
+     moves   int32 per entry, the flat index y * dim_x + x
+     visits  uint32 per entry
+     wins    uint32 per entry
+
+ OpeningBook maps the file and binary searches the keys column in
+ place, so opening a book reads nothing and a lookup touches
+ O(log n) keys of the map.
+"""
+
+# version 2: the keys hash the board size too
+MAGIC = b"HEXB\x02\x00\x00\x00"
+_HEADER = struct.Struct("<IIII")
+
+OPENINGS_DEFAULT_PLIES = 10
+OPENINGS_DEFAULT_MIN_VISITS = 10
+
+
+class BookMove(NamedTuple):
+    x: int
+    y: int
+    visits: int
+    wins: int
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.visits if self.visits else 0.0
+
+
+class OpeningStats:
+    """
+    Collects the move statistics of games, to be written as a book
+    """
+
+    def __init__(self, dim_x: int, dim_y: int, plies: int = OPENINGS_DEFAULT_PLIES):
+        self.dim_x = dim_x
+        self.dim_y = dim_y
+        self.plies = plies
+        self.games: int = 0
+        # (key, move) -> [visits, wins]
+        self._counts: dict[tuple[int, int], list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add_record(self, record: GameRecord) -> None:
+        """
+        Counts the first plies of @param record, which must be
+        finished for its moves to count as wins
+        """
+        if (record.dim_x, record.dim_y) != (self.dim_x, self.dim_y):
+            raise ValueError(
+                f"Cannot add game of size {record.dim_x}x{record.dim_y}"
+                f"-book is {self.dim_x}x{self.dim_y}"
+            )
+        board = Board.create(
+            dim_x=self.dim_x,
+            dim_y=self.dim_y,
+            swap_rule_allowed=record.swap_rule_allowed,
+        )
+        for ply, (x, y, color) in enumerate(record.iter_moves()):
+            if ply >= self.plies:
+                break
+            key, transform = canonical_key(board)
+            image_x, image_y = transform_cell(transform, (x, y), self.dim_x, self.dim_y)
+            counts = self._counts.get((key, image_y * self.dim_x + image_x))
+            if counts is None:
+                counts = self._counts[key, image_y * self.dim_x + image_x] = [0, 0]
+            counts[0] += 1
+            counts[1] += record.winner == color
+            board.place_stone(x, y, color)
+        self.games += 1
+
+    def add_records(self, records: Iterable[GameRecord]) -> None:
+        for record in records:
+            self.add_record(record)
+
+    def write(self, path: str, min_visits: int = 1) -> int:
+        """
+        Writes the book to @param path, leaving out the moves played
+        less than @param min_visits times, and returns its entries
+        """
+        entries = sorted(
+            (key, move, visits, wins)
+            for (key, move), (visits, wins) in self._counts.items()
+            if visits >= min_visits
+        )
+        columns = [array(typecode) for typecode in ("Q", "i", "I", "I")]
+        for entry in entries:
+            for column, value in zip(columns, entry):
+                column.append(value)
+        with open(path, "wb") as book:
+            book.write(MAGIC)
+            book.write(_HEADER.pack(self.dim_x, self.dim_y, self.plies, len(entries)))
+            for column in columns:
+                column.tofile(book)
+        return len(entries)
+
+
+class OpeningBook:
+    """
+    A book written by OpeningStats.write, memory-mapped from @param path.
+    A move is only suggested once it was played @param min_visits times
+    """
+
+    def __init__(self, path: str, min_visits: int = OPENINGS_DEFAULT_MIN_VISITS):
+        self.path = path
+        self.min_visits = min_visits
+        with open(path, "rb") as book:
+            self._map = mmap.mmap(book.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._view = memoryview(self._map)
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Cannot open book {path}-not an opening book")
+        start = len(MAGIC) + _HEADER.size
+        self.dim_x, self.dim_y, self.plies, entries = _HEADER.unpack(
+            view[len(MAGIC) : start]
+        )
+        columns = []
+        for typecode, size in (("Q", 8), ("i", 4), ("I", 4), ("I", 4)):
+            columns.append(view[start : start + size * entries].cast(typecode))
+            start += size * entries
+        self._keys, self._moves, self._visits, self._wins = columns
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def lookup(self, board: Board) -> list[BookMove]:
+        """
+        The moves of the book for the position of @param board,
+        on the board itself, most played first
+        """
+        if (board.dim_x, board.dim_y) != (self.dim_x, self.dim_y):
+            return []
+        if board._number_of_moves_made >= self.plies:
+            return []
+        key, transform = canonical_key(board)
+        start = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key, start)
+        moves = []
+        for entry in range(start, end):
+            index = self._moves[entry]
+            x, y = transform_cell(
+                transform,
+                (index % self.dim_x, index // self.dim_x),
+                self.dim_x,
+                self.dim_y,
+            )
+            moves.append(BookMove(x, y, self._visits[entry], self._wins[entry]))
+        moves.sort(key=lambda move: (move.visits, move.win_rate), reverse=True)
+        return moves
+
+    def best_move(self, board: Board) -> Optional[tuple[int, int]]:
+        """
+        The most played move of the book on @param board, with at least
+        min_visits games; None if the book has no such move
+        """
+        for move in self.lookup(board):
+            if move.visits >= self.min_visits and board.is_legal_move((move.x, move.y)):
+                return (move.x, move.y)
+        return None
+
+    def close(self) -> None:
+        for column in (self._keys, self._moves, self._visits, self._wins):
+            column.release()
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getstate__(self) -> tuple[str, int]:
+        # the map is opened again by the process that unpickles the book
+        return self.path, self.min_visits
+
+    def __setstate__(self, state: tuple[str, int]) -> None:
+        self.__init__(*state)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m hexgame.openings")
+    parser.add_argument("records", nargs="+", help="game record files, see record.py")
+    parser.add_argument("--output", required=True, help="the book file to write")
+    parser.add_argument("--plies", type=int, default=OPENINGS_DEFAULT_PLIES)
+    parser.add_argument(
+        "--min-visits",
+        type=int,
+        default=1,
+        help="leave out the moves played fewer times",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    stats: Optional[OpeningStats] = None
+    for path in args.records:
+        for record in iter_records(path):
+            if stats is None:
+                stats = OpeningStats(record.dim_x, record.dim_y, args.plies)
+            stats.add_record(record)
+    if stats is None:
+        print("No games found", file=sys.stderr)
+        return 1
+    entries = stats.write(args.output, args.min_visits)
+    print(
+        f"{stats.games} games, {entries} book entries written to {args.output}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,8 +1,13 @@
-import random
 import enum
+import random
 import re
+from typing import Optional, Union
+from hexgame.alphabeta import ALPHABETA_DEFAULT_TIME_LIMIT, AlphaBeta, SearchInfo
 from hexgame.color import Color
 from hexgame.board import Board
+from hexgame.mcts import MCTS, MCTS_DEFAULT_PLAYOUTS, MCTSStats
+from hexgame.openings import OpeningBook
+from hexgame.solver import SolveResult, Solver
 
 __author__ = "Gianpiero Cea"
 
@@ -13,10 +18,44 @@ class Player:
     class PlayerMode(enum.Enum):
         AI = 0
         Keyboard = 1
+        MCTS = 2
+        AlphaBeta = 3
 
-    def __init__(self, color: Color = Color.Red, mode: PlayerMode = PlayerMode.AI):
+    def __init__(
+        self,
+        color: Color = Color.Red,
+        mode: PlayerMode = PlayerMode.AI,
+        playouts: Optional[int] = MCTS_DEFAULT_PLAYOUTS,
+        time_limit: Optional[float] = None,
+        rng: Optional[random.Random] = None,
+        opening_book: Optional[OpeningBook] = None,
+        solver: Optional[Solver] = None,
+    ):
+        """
+        @param playouts and @param time_limit (in seconds) are the
+        per move budget of the search modes, whichever ends first
+        (alpha-beta only has a time limit, one second if not given).
+        @param rng is the random number generator of the player,
+        the module level one if not given.
+        The AI modes play the moves of @param opening_book while it
+        has one for the position, before their own policy.
+        They then ask @param solver, if given, to prove a win once the
+        board has at most solver.max_empty empty cells, and play the
+        proven move instantly when it finds one
+        """
         self.color: Color = color
         self.mode = mode
+        self.rng: Optional[random.Random] = rng
+        self.playouts: Optional[int] = playouts
+        self.time_limit: Optional[float] = time_limit
+        self.opening_book: Optional[OpeningBook] = opening_book
+        self.solver: Optional[Solver] = solver
+        # what the last search of a search mode (or the solver) did
+        self.last_search_stats: Optional[
+            Union[MCTSStats, SearchInfo, SolveResult]
+        ] = None
+        # the alpha-beta search keeps its tables from move to move
+        self._alphabeta: Optional[AlphaBeta] = None
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Player):
@@ -29,29 +68,75 @@ class Player:
         The main method that defines the playing behaviour
         based on player mode
         """
+        if self.opening_book is not None and self.mode != self.PlayerMode.Keyboard:
+            book_move = self.opening_book.best_move(board)
+            if book_move is not None:
+                return (book_move[0], book_move[1], self.color)
+        if self.solver is not None and self.mode != self.PlayerMode.Keyboard:
+            proven_move = self._proven_move(board)
+            if proven_move is not None:
+                return (proven_move[0], proven_move[1], self.color)
         match self.mode:
             case self.PlayerMode.AI:
                 return self._random_policy_move(board)
             case self.PlayerMode.Keyboard:
                 return self._get_keyboard_move(board)
+            case self.PlayerMode.MCTS:
+                return self._mcts_move(board)
+            case self.PlayerMode.AlphaBeta:
+                return self._alphabeta_move(board)
         raise ValueError(f"Unknown mode {self.mode}")
 
+    def _proven_move(self, board: Board) -> Optional[tuple[int, int]]:
+        """
+        The winning move of the solver on @param board, None if
+        it cannot prove a win within its budget
+        """
+        if board.number_of_empty_positions > self.solver.max_empty:
+            return None
+        result = self.solver.solve(board, self.color)
+        self.last_search_stats = result
+        if result.winner != self.color:
+            return None
+        return result.move
+
     def _random_policy_move(self, board: Board) -> tuple[int, int, Color]:
         """
         Implements a random policy
         """
-        available_actions = board.possible_moves
-        if (available_actions) != []:
-            next_move: tuple[int, int] = random.choice(available_actions)
-            return (next_move[0], next_move[1], self.color)
+        next_move: tuple[int, int] = board.random_move(self.rng)
+        return (next_move[0], next_move[1], self.color)
+
+    def _mcts_move(self, board: Board) -> tuple[int, int, Color]:
+        """
+        Implements a Monte Carlo tree search policy
+        """
+        search = MCTS(
+            playouts=self.playouts, time_limit=self.time_limit, rng=self.rng
+        )
+        i, j = search.search(board, self.color)
+        self.last_search_stats = search.stats
+        return (i, j, self.color)
+
+    def _alphabeta_move(self, board: Board) -> tuple[int, int, Color]:
+        """
+        Implements an alpha-beta search policy
+        """
+        if self._alphabeta is None:
+            time_limit = self.time_limit
+            if time_limit is None:
+                time_limit = ALPHABETA_DEFAULT_TIME_LIMIT
+            self._alphabeta = AlphaBeta(time_limit=time_limit)
+        i, j = self._alphabeta.search(board, self.color)
+        self.last_search_stats = self._alphabeta.info
+        return (i, j, self.color)
 
     def _get_keyboard_move(self, board: Board) -> tuple[int, int, Color]:
         """
         Waits for the keyboard input to get
         a move
         """
-        available_actions = board.possible_moves
-        if (available_actions) != []:
+        if board.number_of_empty_positions > 0 or board.swap_available:
             valid_coords = False
             while not valid_coords:
                 print(
@@ -66,13 +151,10 @@ class Player:
                     inp = input()
                     if re.match("^[0-9]*$", inp) and len(inp) > 0:
                         j = int(inp)
-                        try:
-                            valid_coords = (
-                                board.has_cell((i, j)) and (i, j) in available_actions
-                            )
+                        valid_coords = board.is_legal_move((i, j))
+                        if valid_coords:
                             return (i, j, self.color)
-                        except ValueError as e:
-                            print(e)
+                        print(f"Cannot place stone at cell {(i, j)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+"""playout.py: fast random playouts of a game of hex"""
+import random
+from typing import Optional, Union
+
+from hexgame.board import Board, neighbour_table
+from hexgame.color import Color
+
+__author__ = "Gianpiero Cea"
+
+"""
+ A full hex board always has exactly one winner, so a random game
+ does not need to look for a winner after every move: the remaining
+ empty cells are shuffled once and handed out alternately to the two
+ players, then a single flood fill over the full board tells who won.
+"""
+
+
+def random_playout(
+    board: Board,
+    to_move: Color,
+    rng: Optional[random.Random] = None,
+    return_board: bool = False,
+) -> Union[Color, tuple[Color, Board]]:
+    """
+    Plays out the game on @param board at random, @param to_move
+    playing first, and returns the winner.
+    @param board is not modified: with @param return_board the final
+    position is also returned, as a copy of board with the playout
+    moves placed on it
+    """
+    rng = rng if rng is not None else random
+    dim_x = board.dim_x
+    moves = board.empty_positions
+    rng.shuffle(moves)
+
+    is_red = [
+        board[x, y].color == Color.Red for y in range(board.dim_y) for x in range(dim_x)
+    ]
+    red_moves = moves[0::2] if to_move == Color.Red else moves[1::2]
+    for x, y in red_moves:
+        is_red[y * dim_x + x] = True
+
+    winner = Color.Red if _red_connects(is_red, dim_x, board.dim_y) else Color.Blue
+    if not return_board:
+        return winner
+
+    final_board = board.copy()
+    color = to_move
+    for x, y in moves:
+        final_board.place_stone(x, y, color)
+        color = color.opponent
+    return winner, final_board
+
+
+def _red_connects(is_red: list[bool], dim_x: int, dim_y: int) -> bool:
+    """
+    Flood fills the red stones from the bottom row,
+    true iff the flood reaches the top row
+    """
+    if dim_x == 0 or dim_y == 0:
+        return False
+    nbrs = neighbour_table(dim_x, dim_y)
+    top = (dim_y - 1) * dim_x
+    stack = [x for x in range(dim_x) if is_red[x]]
+    seen = bytearray(dim_x * dim_y)
+    for index in stack:
+        seen[index] = 1
+    while stack:
+        index = stack.pop()
+        if index >= top:
+            return True
+        for nbr in nbrs[index]:
+            if is_red[nbr] and not seen[nbr]:
+                seen[nbr] = 1
+                stack.append(nbr)
+    return False
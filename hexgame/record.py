@@ -0,0 +1,259 @@
+"""record.py: a compact binary format for games of hex"""
+from typing import TYPE_CHECKING, BinaryIO, Iterator, NamedTuple, Optional
+
+from hexgame.board import Board
+from hexgame.color import Color
+
+if TYPE_CHECKING:
+    # Game is only annotated: players import records through openings
+    from hexgame.game import Game
+
+__author__ = "Gianpiero Cea"
+
+"""
+ A record file starts with MAGIC and is followed by any number of
+ game records, so games can be appended to it one at a time:
+
+     varint  dim_x
+     varint  dim_y
+     byte    flags: bit 0 swap rule allowed, bit 1 first move by Blue,
+                    bits 2-3 the winner (Color value, 0 if unfinished)
+     varint  number of moves
+     varint  the cell of each move, as its flat index y * dim_x + x
+
+ The colors alternate from the first move, so they are not stored.
+ Varints are little endian base 128: an index below 128 takes one
+ byte and below 16384 two, so a game on an 11x11 board takes 4 bytes
+ plus one for every move.
+"""
+
+MAGIC = b"HEXR\x01"
+
+_SWAP_FLAG = 0b0001
+_BLUE_FIRST_FLAG = 0b0010
+_WINNER_SHIFT = 2
+
+# bytes read from the stream at a time
+_CHUNK = 1 << 16
+
+
+class GameRecord(NamedTuple):
+    dim_x: int
+    dim_y: int
+    swap_rule_allowed: bool
+    first_color: Color
+    moves: list[tuple[int, int]]
+    winner: Optional[Color] = None
+
+    @classmethod
+    def from_game(cls, game: "Game") -> "GameRecord":
+        """
+        The record of @param game, whose moves must alternate colors
+        """
+        board = game.board
+        history = game.history
+        first_color = history[0][2] if history else game.player_1.color
+        color = first_color
+        for i, j, move_color in history:
+            if move_color != color:
+                raise ValueError(
+                    f"Cannot record move {(i, j)}-{move_color} played out of turn"
+                )
+            color = color.opponent
+        return cls(
+            board.dim_x,
+            board.dim_y,
+            board._swap_rule_allowed,
+            first_color,
+            [(i, j) for i, j, _ in history],
+            game.winner,
+        )
+
+    def iter_moves(self) -> Iterator[tuple[int, int, Color]]:
+        """
+        The moves with the colors that played them
+        """
+        color = self.first_color
+        for x, y in self.moves:
+            yield (x, y, color)
+            color = color.opponent
+
+    def replay(self, board: Optional[Board] = None) -> Iterator[Board]:
+        """
+        Plays the moves one by one on @param board (a new empty board
+        by default), yielding the board after each of them.
+        The same board is yielded every time, updated in place
+        """
+        if board is None:
+            board = Board.create(
+                dim_x=self.dim_x,
+                dim_y=self.dim_y,
+                swap_rule_allowed=self.swap_rule_allowed,
+            )
+        for x, y, color in self.iter_moves():
+            board.place_stone(x, y, color)
+            yield board
+
+    def final_board(self) -> Board:
+        board = None
+        for board in self.replay():
+            pass
+        if board is None:
+            board = Board.create(self.dim_x, self.dim_y, self.swap_rule_allowed)
+        return board
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_record(record: GameRecord) -> bytes:
+    """
+    The bytes of @param record, without the MAGIC of the file
+    """
+    out = bytearray()
+    _write_varint(out, record.dim_x)
+    _write_varint(out, record.dim_y)
+    flags = _SWAP_FLAG if record.swap_rule_allowed else 0
+    if record.first_color == Color.Blue:
+        flags |= _BLUE_FIRST_FLAG
+    if record.winner is not None:
+        flags |= record.winner.value << _WINNER_SHIFT
+    out.append(flags)
+    _write_varint(out, len(record.moves))
+    dim_x = record.dim_x
+    for x, y in record.moves:
+        if not (0 <= x < dim_x and 0 <= y < record.dim_y):
+            raise ValueError(f"Cannot record move {(x, y)}-out of range")
+        _write_varint(out, y * dim_x + x)
+    return bytes(out)
+
+
+class RecordWriter:
+    """
+    Appends game records to a binary stream:
+
+        with RecordWriter.open("games.hexr") as writer:
+            writer.write_game(game)
+    """
+
+    def __init__(self, stream: BinaryIO, write_magic: bool = True) -> None:
+        """
+        @param write_magic is false when appending to
+        a stream that already has records
+        """
+        self.stream = stream
+        self.records: int = 0
+        if write_magic:
+            stream.write(MAGIC)
+
+    @classmethod
+    def open(cls, path: str) -> "RecordWriter":
+        """
+        Opens the file at @param path for appending,
+        creating it if needed
+        """
+        stream = open(path, "ab")
+        return cls(stream, write_magic=stream.tell() == 0)
+
+    def write(self, record: GameRecord) -> None:
+        self.stream.write(encode_record(record))
+        self.records += 1
+
+    def write_game(self, game: "Game") -> None:
+        self.write(GameRecord.from_game(game))
+
+    def close(self) -> None:
+        self.stream.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _ByteReader:
+    """
+    Buffered reads of bytes and varints from a stream
+    """
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.buffer = b""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        chunk = self.stream.read(_CHUNK)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def at_end(self) -> bool:
+        return self.pos >= len(self.buffer) and not self._fill()
+
+    def read_bytes(self, size: int) -> bytes:
+        while len(self.buffer) - self.pos < size:
+            if not self._fill():
+                raise ValueError("Cannot read record-unexpected end of stream")
+        data = self.buffer[self.pos : self.pos + size]
+        self.pos += size
+        return data
+
+    def read_byte(self) -> int:
+        if self.pos >= len(self.buffer) and not self._fill():
+            raise ValueError("Cannot read record-unexpected end of stream")
+        byte = self.buffer[self.pos]
+        self.pos += 1
+        return byte
+
+    def read_varint(self) -> int:
+        value = 0
+        shift = 0
+        while True:
+            byte = self.read_byte()
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+
+def read_records(stream: BinaryIO) -> Iterator[GameRecord]:
+    """
+    Yields the records of @param stream one at a time, reading
+    the stream in chunks as they are needed
+    """
+    reader = _ByteReader(stream)
+    if reader.read_bytes(len(MAGIC)) != MAGIC:
+        raise ValueError("Cannot read records-not a hex record stream")
+    while not reader.at_end():
+        dim_x = reader.read_varint()
+        dim_y = reader.read_varint()
+        flags = reader.read_byte()
+        n_moves = reader.read_varint()
+        moves = []
+        for _ in range(n_moves):
+            index = reader.read_varint()
+            moves.append((index % dim_x, index // dim_x))
+        winner = flags >> _WINNER_SHIFT
+        yield GameRecord(
+            dim_x,
+            dim_y,
+            bool(flags & _SWAP_FLAG),
+            Color.Blue if flags & _BLUE_FIRST_FLAG else Color.Red,
+            moves,
+            Color(winner) if winner else None,
+        )
+
+
+def iter_records(path: str) -> Iterator[GameRecord]:
+    """
+    Yields the records of the file at @param path
+    """
+    with open(path, "rb") as stream:
+        yield from read_records(stream)
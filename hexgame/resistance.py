@@ -0,0 +1,236 @@
+"""resistance.py: evaluation of hex positions as electrical networks"""
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+from scipy.sparse import coo_matrix, diags, identity
+from scipy.sparse.linalg import splu
+
+from hexgame.board import Board, coords_table, neighbour_table
+from hexgame.color import Color
+
+__author__ = "Gianpiero Cea"
+
+"""
+ Every cell is a resistor: 1 when empty, almost 0 (OWN_RESISTANCE) when
+ it holds a stone of the color being evaluated, and an open circuit when
+ it holds a stone of the opponent. Two adjacent cells are joined by the
+ series of their two resistors, and the cells on the two borders of the
+ color are joined in the same way to two terminals. The resistance
+ between the terminals tells how close the color is to connecting:
+ a finished chain is a short circuit, a blocked color an open circuit.
+ Every node also leaks a tiny current to the ground, which keeps the
+ system solvable when parts of the board are cut off.
+
+ The terminal on the second border is grounded and a unit current is
+ injected at the first one, so the resistance is the voltage of the
+ first terminal in the solution of the reduced Laplacian system.
+
+ A move only changes the conductances of the edges around its cell,
+ a low rank change of the Laplacian. So the resistances after every
+ candidate move follow from a single factorization through the
+ Woodbury identity, see ResistanceNetwork.move_resistances.
+"""
+
+# resistance of a cell holding a stone of the evaluated color
+OWN_RESISTANCE = 1e-3
+# conductance from every node to the ground
+LEAK_CONDUCTANCE = 1e-6
+
+
+class NetworkEdges:
+    """
+    The fixed wiring of a color's network on a board size.
+    Nodes 0 .. n - 1 are the cells by flat index, n the source terminal
+    on the first border; the grounded sink terminal is not a node
+    """
+
+    def __init__(self, dim_x: int, dim_y: int, color: Color) -> None:
+        n = dim_x * dim_y
+        heads: list[int] = []
+        tails: list[int] = []
+        for index, nbrs in enumerate(neighbour_table(dim_x, dim_y)):
+            for nbr in nbrs:
+                if index < nbr:
+                    heads.append(index)
+                    tails.append(nbr)
+        coords = coords_table(dim_x, dim_y)
+        match color:
+            case Color.Red:
+                first = [i for i, (x, y) in enumerate(coords) if y == 0]
+                second = [i for i, (x, y) in enumerate(coords) if y == dim_y - 1]
+            case Color.Blue:
+                first = [i for i, (x, y) in enumerate(coords) if x == 0]
+                second = [i for i, (x, y) in enumerate(coords) if x == dim_x - 1]
+            case _:
+                raise ValueError(f"Not recognised color {color}")
+        self.cells: int = n
+        heads += first + second
+        # -1 stands for the grounded sink
+        tails += [n] * len(first) + [-1] * len(second)
+        self.heads: np.ndarray = np.array(heads, dtype=np.intp)
+        self.tails: np.ndarray = np.array(tails, dtype=np.intp)
+        # incident[c] lists the edges touching cell c
+        incident: list[list[int]] = [[] for _ in range(n)]
+        for edge, (head, tail) in enumerate(zip(heads, tails)):
+            incident[head].append(edge)
+            if 0 <= tail < n:
+                incident[tail].append(edge)
+        self.incident: tuple[tuple[int, ...], ...] = tuple(map(tuple, incident))
+        # the incidence matrix with the sink row dropped, (n + 1) x edges
+        edges = np.arange(len(heads))
+        grounded = self.tails >= 0
+        self.incidence = coo_matrix(
+            (
+                np.concatenate([np.ones(len(heads)), -np.ones(int(grounded.sum()))]),
+                (
+                    np.concatenate([self.heads, self.tails[grounded]]),
+                    np.concatenate([edges, edges[grounded]]),
+                ),
+            ),
+            shape=(n + 1, len(heads)),
+        ).tocsc()
+
+
+@lru_cache(maxsize=None)
+def network_edges(dim_x: int, dim_y: int, color: Color) -> NetworkEdges:
+    return NetworkEdges(dim_x, dim_y, color)
+
+
+def cell_resistances(colors: Sequence[Color], color: Color) -> np.ndarray:
+    """
+    Resistance of every cell in the network of @param color,
+    inf for the stones of the opponent
+    """
+    values = np.array([c.value for c in colors], dtype=np.int8)
+    resistances = np.ones(len(values))
+    resistances[values == color.value] = OWN_RESISTANCE
+    resistances[values == color.opponent.value] = np.inf
+    return resistances
+
+
+def _edge_conductances(edges: NetworkEdges, resistances: np.ndarray) -> np.ndarray:
+    """
+    Conductance of every edge: the two cell resistors in series,
+    a single one for the edges to the terminals
+    """
+    # the terminals have no resistance of their own: the 0 appended
+    # is read both for the source (n) and for the grounded sink (-1)
+    padded = np.append(resistances, 0.0)
+    series = padded[edges.heads] + padded[edges.tails]
+    with np.errstate(divide="ignore"):
+        return np.where(np.isinf(series), 0.0, 1.0 / series)
+
+
+class ResistanceNetwork:
+    """
+    The network of @param color for the stones of @param board,
+    factorized once. @param colors can be passed instead of reading
+    the board: the color of every cell by flat index
+    """
+
+    def __init__(
+        self, board: Board, color: Color, colors: Optional[Sequence[Color]] = None
+    ) -> None:
+        if colors is None:
+            colors = board_colors(board)
+        self.color = color
+        self.edges = network_edges(board.dim_x, board.dim_y, color)
+        self.resistances = cell_resistances(colors, color)
+        self.conductances = _edge_conductances(self.edges, self.resistances)
+        incidence = self.edges.incidence
+        size = incidence.shape[0]
+        laplacian = incidence @ diags(self.conductances) @ incidence.T
+        laplacian = laplacian + LEAK_CONDUCTANCE * identity(size)
+        self._lu = splu(laplacian.tocsc())
+        source = np.zeros(size)
+        source[-1] = 1.0
+        # voltages for a unit current from the source terminal
+        self.voltages: np.ndarray = self._lu.solve(source)
+        self.resistance: float = float(self.voltages[-1])
+
+    def move_resistances(self, cells: Sequence[int], own: bool = True) -> np.ndarray:
+        """
+        Resistance of the network after one stone is placed on each
+        of the empty @param cells (flat indices), each one on its own:
+        a stone of the color of the network if @param own, else a
+        stone of the opponent. Every move changes the conductance of
+        the k <= 8 edges around its cell, a rank k update L + U C U^T
+        of the Laplacian, and then by the Woodbury identity
+            R' = R - w^T (I + C U^T L^-1 U)^-1 C w,  w = U^T v
+        where v are the voltages of the network as it is
+        """
+        cells = np.asarray(cells, dtype=np.intp)
+        if len(cells) == 0:
+            return np.empty(0)
+        if not np.all(self.resistances[cells] == 1.0):
+            raise ValueError("Cannot evaluate move-the cell is not empty")
+        edges = self.edges
+        incident = edges.incident
+        width = max(len(incident[cell]) for cell in cells)
+        index = np.zeros((len(cells), width), dtype=np.intp)
+        used = np.zeros((len(cells), width), dtype=bool)
+        for row, cell in enumerate(cells):
+            index[row, : len(incident[cell])] = incident[cell]
+            used[row, : len(incident[cell])] = True
+
+        # the conductances of the touched edges after the move
+        after = np.zeros(index.shape)
+        if own:
+            padded = np.append(self.resistances, 0.0)
+            heads, tails = edges.heads[index], edges.tails[index]
+            others = np.where(heads == cells[:, None], padded[tails], padded[heads])
+            series = OWN_RESISTANCE + others
+            with np.errstate(divide="ignore"):
+                after = np.where(np.isinf(series), 0.0, 1.0 / series)
+        delta = np.where(used, after - self.conductances[index], 0.0)
+
+        # only the touched edges are ever needed from L^-1 U
+        touched = np.unique(index[used])
+        columns = edges.incidence[:, touched].toarray()
+        solved = self._lu.solve(columns)
+        gram = columns.T @ solved
+        position = np.searchsorted(touched, index)
+        w = (columns.T @ self.voltages)[position]
+        gram_k = gram[position[:, :, None], position[:, None, :]]
+        system = np.eye(width) + delta[:, :, None] * gram_k
+        correction = np.linalg.solve(system, (delta * w)[:, :, None])[:, :, 0]
+        return self.resistance - np.sum(w * correction, axis=1)
+
+
+def board_colors(board: Board) -> list[Color]:
+    """
+    The color of every cell of @param board, by flat index
+    """
+    return [board[x, y].color for x, y in coords_table(board.dim_x, board.dim_y)]
+
+
+def evaluate(board: Board, color: Color) -> float:
+    """
+    Value of @param board for color: the log of the ratio between the
+    resistance of the opponent's network and of color's own, positive
+    when color is the closer to connecting
+    """
+    colors = board_colors(board)
+    own = ResistanceNetwork(board, color, colors)
+    other = ResistanceNetwork(board, color.opponent, colors)
+    return float(np.log(other.resistance / own.resistance))
+
+
+def evaluate_moves(
+    board: Board, color: Color, moves: Optional[Sequence[tuple[int, int]]] = None
+) -> np.ndarray:
+    """
+    The value for color of the position after color plays each one
+    of @param moves (the empty positions by default), computed with
+    one factorization per network for all the moves
+    """
+    if moves is None:
+        moves = board.empty_positions
+    colors = board_colors(board)
+    cells = [y * board.dim_x + x for x, y in moves]
+    own = ResistanceNetwork(board, color, colors).move_resistances(cells, own=True)
+    other = ResistanceNetwork(board, color.opponent, colors).move_resistances(
+        cells, own=False
+    )
+    return np.log(other / own)
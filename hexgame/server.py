@@ -0,0 +1,351 @@
+"""server.py: many games of hex hosted at once on an asyncio event loop"""
+import asyncio
+import json
+import random
+import sys
+from concurrent.futures import Executor
+from typing import Any, Callable, NamedTuple, Optional, Protocol
+
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.player import Player
+
+__author__ = "Gianpiero Cea"
+
+"""
+ A GameSession drives a Game between two AsyncPlayers, awaiting every
+ move with a timeout: a player that runs out of time, or disconnects,
+ forfeits the game. Sessions are coroutines, so one process hosts as
+ many of them as the event loop can juggle.
+
+ AI players go through ExecutorPlayer, which decides the move in an
+ executor (a process pool for the search modes) and so never blocks
+ the loop. Remote players speak JSON lines over a stream, a socket
+ or the stdin/stdout of the process. The server sends
+
+     {"type": "start", "game": 3, "color": "Red", "dim_x": 11, "dim_y": 11}
+     {"type": "turn", "timeout": 60.0}
+     {"type": "move", "x": 5, "y": 5, "color": "Red"}
+     {"type": "error", "message": "Cannot place stone at cell (5, 5)"}
+     {"type": "end", "winner": "Blue", "reason": "connected"}
+
+ (every move of the game is sent to both players, "error" answers an
+ illegal move) and reads {"x": 5, "y": 5} or "5 5" for each "turn".
+"""
+
+SERVER_DEFAULT_MOVE_TIMEOUT = 60.0
+
+
+class AsyncPlayer(Protocol):
+    color: Color
+
+    async def play(self, board: Board) -> tuple[int, int, Color]:
+        """
+        The move of the player on @param board, which it must not change
+        """
+        ...
+
+    async def notify(self, event: dict) -> None:
+        """
+        Called with every event of the game, see the module docstring
+        """
+        ...
+
+
+def _decide(player: Player, board: Board) -> tuple[tuple[int, int, Color], Any, Any]:
+    """
+    Runs in the executor: the move of @param player together with the
+    state of the player that changed, to be copied back from a process
+    """
+    move = player.play(board)
+    return move, player.rng, player.last_search_stats
+
+
+class ExecutorPlayer:
+    """
+    A Player whose moves are decided in @param executor, or on the
+    event loop itself if None (fine for the random policy only).
+    With a process pool the player and the board are pickled at every
+    move: the random state and the search stats of the player are
+    copied back, the tables of its alpha-beta search are not
+    """
+
+    def __init__(self, player: Player, executor: Optional[Executor] = None) -> None:
+        self.player = player
+        self.color: Color = player.color
+        self.executor = executor
+
+    async def play(self, board: Board) -> tuple[int, int, Color]:
+        if self.executor is None:
+            return self.player.play(board)
+        loop = asyncio.get_running_loop()
+        move, rng, stats = await loop.run_in_executor(
+            self.executor, _decide, self.player, board
+        )
+        if rng is not None:
+            self.player.rng = rng
+        self.player.last_search_stats = stats
+        return move
+
+    async def notify(self, event: dict) -> None:
+        pass
+
+
+class RemotePlayer:
+    """
+    A player on the other end of a stream, speaking JSON lines
+    """
+
+    def __init__(
+        self,
+        color: Color,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        move_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        @param move_timeout is only told to the player with each turn
+        """
+        self.color: Color = color
+        self.reader = reader
+        self.writer = writer
+        self.move_timeout = move_timeout
+
+    async def send(self, message: dict) -> None:
+        self.writer.write((json.dumps(message) + "\n").encode())
+        await self.writer.drain()
+
+    async def notify(self, event: dict) -> None:
+        await self.send(event)
+
+    async def play(self, board: Board) -> tuple[int, int, Color]:
+        await self.send({"type": "turn", "timeout": self.move_timeout})
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError(f"{self.color} disconnected")
+            try:
+                i, j = parse_move(line.decode())
+            except ValueError as error:
+                await self.send({"type": "error", "message": str(error)})
+                continue
+            if board.is_legal_move((i, j)):
+                return (i, j, self.color)
+            await self.send(
+                {"type": "error", "message": f"Cannot place stone at cell {(i, j)}"}
+            )
+
+
+def parse_move(line: str) -> tuple[int, int]:
+    """
+    The move of a line sent by a remote player:
+    {"x": 5, "y": 5} or 5 5
+    """
+    line = line.strip()
+    try:
+        if line.startswith("{"):
+            message = json.loads(line)
+            return int(message["x"]), int(message["y"])
+        x, y = line.replace(",", " ").split()
+        return int(x), int(y)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Cannot read move {line!r}") from None
+
+
+class SessionResult(NamedTuple):
+    game: int
+    winner: Optional[Color]
+    # "connected", "timeout" or "disconnected"
+    reason: str
+    moves: int
+
+
+class GameSession:
+    """
+    A game between two AsyncPlayers, @param player_1 moving first
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        player_1: AsyncPlayer,
+        player_2: AsyncPlayer,
+        move_timeout: Optional[float] = SERVER_DEFAULT_MOVE_TIMEOUT,
+        game_id: int = 0,
+    ) -> None:
+        self.game_id = game_id
+        self.players: dict[Color, AsyncPlayer] = {
+            player_1.color: player_1,
+            player_2.color: player_2,
+        }
+        # the Game keeps the turn, the history and the winner,
+        # its own players are only there for their colors
+        self.game = Game(
+            board=board,
+            player_1=Player(player_1.color),
+            player_2=Player(player_2.color),
+        )
+        self.move_timeout = move_timeout
+
+    async def _broadcast(self, event: dict) -> None:
+        for player in self.players.values():
+            try:
+                await player.notify(event)
+            except ConnectionError:
+                pass
+
+    async def run(self) -> SessionResult:
+        game = self.game
+        board = game.board
+        for color, player in self.players.items():
+            await player.notify(
+                {
+                    "type": "start",
+                    "game": self.game_id,
+                    "color": color.name,
+                    "dim_x": board.dim_x,
+                    "dim_y": board.dim_y,
+                }
+            )
+        reason = "connected"
+        while game.status == Game.GameStatus.Running:
+            color = game.current_player.color
+            try:
+                i, j, _ = await asyncio.wait_for(
+                    self.players[color].play(board), self.move_timeout
+                )
+            except asyncio.TimeoutError:
+                reason = "timeout"
+            except ConnectionError:
+                reason = "disconnected"
+            else:
+                if not board.is_legal_move((i, j)):
+                    raise ValueError(f"Cannot place stone at cell {(i, j)}-illegal")
+                game.apply_move((i, j, color))
+                await self._broadcast(
+                    {"type": "move", "x": i, "y": j, "color": color.name}
+                )
+                continue
+            game.forfeit(color)
+        await self._broadcast(
+            {"type": "end", "winner": game.winner.name, "reason": reason}
+        )
+        return SessionResult(self.game_id, game.winner, reason, len(game.history))
+
+
+class GameServer:
+    """
+    Hosts a game against an AI player for every client connection,
+    the client playing @param human_color
+    """
+
+    def __init__(
+        self,
+        make_opponent: Callable[[Color], AsyncPlayer],
+        dim_x: int = 11,
+        dim_y: int = 11,
+        swap_rule_allowed: bool = True,
+        human_color: Color = Color.Red,
+        move_timeout: Optional[float] = SERVER_DEFAULT_MOVE_TIMEOUT,
+    ) -> None:
+        """
+        @param make_opponent builds the AI player of a new game,
+        given the color it plays
+        """
+        self.make_opponent = make_opponent
+        self.dim_x = dim_x
+        self.dim_y = dim_y
+        self.swap_rule_allowed = swap_rule_allowed
+        self.human_color = human_color
+        self.move_timeout = move_timeout
+        self.games_started: int = 0
+        self.results: list[SessionResult] = []
+
+    @property
+    def active_games(self) -> int:
+        return self.games_started - len(self.results)
+
+    def new_session(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> GameSession:
+        human = RemotePlayer(self.human_color, reader, writer, self.move_timeout)
+        opponent = self.make_opponent(self.human_color.opponent)
+        first, second = (
+            (human, opponent) if self.human_color == Color.Red else (opponent, human)
+        )
+        self.games_started += 1
+        return GameSession(
+            Board.create(
+                dim_x=self.dim_x,
+                dim_y=self.dim_y,
+                swap_rule_allowed=self.swap_rule_allowed,
+            ),
+            first,
+            second,
+            self.move_timeout,
+            game_id=self.games_started,
+        )
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Plays one game with the client of a connection, then closes it
+        """
+        try:
+            self.results.append(await self.new_session(reader, writer).run())
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start_tcp(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        return await asyncio.start_unix_server(self.handle, path)
+
+    async def serve_stdio(self) -> SessionResult:
+        """
+        Plays a single game with the other end of stdin and stdout
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+        transport, protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, sys.stdout
+        )
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        result = await self.new_session(reader, writer).run()
+        self.results.append(result)
+        return result
+
+
+def opponent_factory(
+    mode: Player.PlayerMode,
+    playouts: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    executor: Optional[Executor] = None,
+    seed: Optional[int] = None,
+) -> Callable[[Color], AsyncPlayer]:
+    """
+    Builds the AI players of the games of a GameServer. The random
+    policy plays on the event loop, the search modes in @param executor
+    """
+    games = 0
+
+    def make_opponent(color: Color) -> AsyncPlayer:
+        nonlocal games
+        games += 1
+        rng = random.Random(f"{seed}:{games}") if seed is not None else None
+        player = Player(color, mode, playouts, time_limit, rng)
+        return ExecutorPlayer(
+            player, None if mode == Player.PlayerMode.AI else executor
+        )
+
+    return make_opponent
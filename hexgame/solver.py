@@ -0,0 +1,422 @@
+"""solver.py: depth-first proof-number search, proving who wins a hex position"""
+import time
+from array import array
+from typing import Iterable, NamedTuple, Optional
+
+from hexgame.alphabeta import SearchTimeout, centre_distance
+from hexgame.board import Board, coords_table, neighbour_coords_table
+from hexgame.color import Color
+from hexgame.distance import ConnectionDistance
+from hexgame.zobrist import state_key
+
+__author__ = "Gianpiero Cea"
+
+"""
+ Every position is a win or a loss for the side to move: hex has no
+ draws. The proof number (phi) of a position is how many positions
+ at least are still to be proven to show a win of the side to move,
+ the disproof number (delta) how many to show a loss. In negamax form
+
+     phi(n) = min delta(child)        delta(n) = sum phi(child)
+
+ and df-pn walks down the most proving child with thresholds on both
+ numbers, only coming back up when one of them is exceeded. A new
+ position starts with the connection distances (see hexgame.distance)
+ as its numbers rather than 1 and 1: the opponent's distance as phi,
+ the distance of the color that just moved as delta.
+
+ Winning cells are found on the connected components and their virtual
+ border nodes: an empty cell wins for a color iff its stones of that
+ color, and the borders it lies on, reach both borders of the color.
+ A side to move with a winning cell has won, one facing two winning
+ cells of the opponent has lost, and one facing a single winning cell
+ only has that cell to play. An opponent two stones away limits the
+ moves the same way, through its moves that make two winning cells.
+
+ The (phi, delta) of the positions live in a SolverTable of fixed
+ size, so positions proven once are known to every later search.
+"""
+
+SOLVER_DEFAULT_SIZE_MB = 16
+SOLVER_DEFAULT_TIME_LIMIT = 1.0
+SOLVER_DEFAULT_MAX_EMPTY = 30
+
+# proof and disproof numbers are capped at INFINITY
+INFINITY = (1 << 31) - 1
+# bytes taken by one entry across the parallel arrays:
+# key (8), phi (4), delta (4), move (4), work (4)
+ENTRY_BYTES = 24
+
+NO_MOVE = -1
+
+# marks the hash of a position searched with the other color to move
+_OFF_TURN_KEY = 0x9E3779B97F4A7C15
+
+# how many nodes are searched between two looks at the clock
+_CLOCK_INTERVAL = 256
+
+
+class SolverTable:
+    """
+    The proof and disproof numbers of positions keyed by Zobrist hash,
+    in parallel arrays of a power of two slots within @param size_mb.
+
+    A position goes to one of a bucket of two slots. A new position
+    takes the place of the entry of the bucket worth the least: the
+    unproven before the proven ones, then the one that cost less work
+    """
+
+    def __init__(self, size_mb: float = SOLVER_DEFAULT_SIZE_MB) -> None:
+        entries = max(1, int(size_mb * 2**20) // ENTRY_BYTES)
+        # at least one bucket of two
+        self._size: int = max(2, 1 << (entries.bit_length() - 1))
+        self._mask: int = self._size - 1
+        self._keys: array = array("Q", bytes(8 * self._size))
+        # phi = delta = 0 marks an empty slot
+        self._phis: array = array("I", bytes(4 * self._size))
+        self._deltas: array = array("I", bytes(4 * self._size))
+        self._moves: array = array("i", [NO_MOVE]) * self._size
+        self._work: array = array("I", bytes(4 * self._size))
+        self.used: int = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size * ENTRY_BYTES
+
+    def _slot(self, key: int) -> int:
+        """
+        The slot of @param key in its bucket of two, -1 if it is not stored
+        """
+        slot = key & self._mask
+        for candidate in (slot, slot ^ 1):
+            if self._keys[candidate] == key and (
+                self._phis[candidate] or self._deltas[candidate]
+            ):
+                return candidate
+        return -1
+
+    def probe(self, key: int) -> Optional[tuple[int, int, int]]:
+        """
+        The phi, delta and best move stored for @param key, if any
+        """
+        slot = self._slot(key)
+        if slot < 0:
+            return None
+        return self._phis[slot], self._deltas[slot], self._moves[slot]
+
+    def numbers(self, key: int) -> tuple[int, int]:
+        """
+        The phi and delta of @param key, 1 and 1 if it is unknown
+        """
+        slot = self._slot(key)
+        if slot < 0:
+            return 1, 1
+        return self._phis[slot], self._deltas[slot]
+
+    def _priority(self, slot: int) -> tuple[bool, int]:
+        phi, delta = self._phis[slot], self._deltas[slot]
+        if not (phi or delta):
+            return (False, -1)
+        return (phi == 0 or delta == 0, self._work[slot])
+
+    def store(self, key: int, phi: int, delta: int, move: int, work: int) -> None:
+        slot = self._slot(key)
+        if slot < 0:
+            # the entry of the bucket worth the least gives way
+            slot = key & self._mask
+            if self._priority(slot ^ 1) < self._priority(slot):
+                slot ^= 1
+            self.used += not (self._phis[slot] or self._deltas[slot])
+        self._keys[slot] = key
+        self._phis[slot] = phi
+        self._deltas[slot] = delta
+        self._moves[slot] = move
+        self._work[slot] = min(work, INFINITY)
+
+    def clear(self) -> None:
+        self._phis = array("I", bytes(4 * self._size))
+        self._deltas = array("I", bytes(4 * self._size))
+        self.used = 0
+
+
+class SolveResult(NamedTuple):
+    # the winner with best play, None if the budget ran out first
+    winner: Optional[Color]
+    # a winning move of the side to move, if it wins and has not yet
+    move: Optional[tuple[int, int]]
+    nodes: int
+    seconds: float
+    # the memory taken by the table, and the slots in use
+    table_bytes: int
+    table_used: int
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+
+def winning_cells(
+    board: Board, color: Color, cells: Optional[Iterable[int]] = None
+) -> list[int]:
+    """
+    The flat indices of the empty cells where a stone
+    of @param color connects its two borders, among @param cells
+    (all the empty cells if None)
+    """
+    conn_comp = board.get_conn_comp(color)
+    find = conn_comp.find
+    border_1, border_2 = board._virtual_borders(color)
+    root_1, root_2 = find(border_1), find(border_2)
+    dim_x, last_x, last_y = board.dim_x, board.dim_x - 1, board.dim_y - 1
+    colors = board._board
+    coords = coords_table(board.dim_x, board.dim_y)
+    neighbours = neighbour_coords_table(board.dim_x, board.dim_y)
+    wins = []
+    for index in board._empty if cells is None else cells:
+        x, y = coords[index]
+        if color == Color.Red:
+            reaches_1, reaches_2 = y == 0, y == last_y
+        else:
+            reaches_1, reaches_2 = x == 0, x == last_x
+        for nbr_x, nbr_y in neighbours[index]:
+            if colors[nbr_x][nbr_y].color == color:
+                root = find((nbr_x, nbr_y))
+                reaches_1 = reaches_1 or root == root_1
+                reaches_2 = reaches_2 or root == root_2
+        if reaches_1 and reaches_2:
+            wins.append(y * dim_x + x)
+    return wins
+
+
+class Solver:
+    """
+    Depth-first proof-number search of the winner of a position,
+    within @param time_limit seconds and @param max_nodes nodes
+    (no limit if None). The table is kept from one solve to the next,
+    so a position proven once is answered at once.
+    @param max_empty is how many empty cells a player lets the solver
+    look at, bigger boards are left to its own policy
+    """
+
+    def __init__(
+        self,
+        time_limit: Optional[float] = SOLVER_DEFAULT_TIME_LIMIT,
+        max_nodes: Optional[int] = None,
+        size_mb: float = SOLVER_DEFAULT_SIZE_MB,
+        max_empty: int = SOLVER_DEFAULT_MAX_EMPTY,
+    ) -> None:
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.max_empty = max_empty
+        self.table = SolverTable(size_mb)
+        self._nodes: int = 0
+        self._deadline: Optional[float] = None
+        self._distances: Optional[ConnectionDistance] = None
+        self.result: Optional[SolveResult] = None
+
+    def solve(self, board: Board, color: Color) -> SolveResult:
+        """
+        Proves who wins @param board with color to move, leaving
+        the board as it was found
+        """
+        start = time.perf_counter()
+        self._deadline = (
+            start + self.time_limit if self.time_limit is not None else None
+        )
+        self._nodes = 0
+        key = self._key(board, color)
+        phi, delta, index = self.table.probe(key) or (1, 1, NO_MOVE)
+        if phi and delta:
+            self._distances = ConnectionDistance(board)
+            try:
+                phi, delta, index = self._mid(board, color, key, INFINITY, INFINITY)
+            except SearchTimeout:
+                pass
+            finally:
+                self._distances = None
+        winner = None
+        move = None
+        if phi == 0:
+            winner = color
+            if index != NO_MOVE:
+                move = coords_table(board.dim_x, board.dim_y)[index]
+        elif delta == 0:
+            winner = color.opponent
+        self.result = SolveResult(
+            winner,
+            move,
+            self._nodes,
+            time.perf_counter() - start,
+            self.table.size_bytes,
+            self.table.used,
+        )
+        return self.result
+
+    @staticmethod
+    def _key(board: Board, color: Color) -> int:
+        """
+        The hash of the position with @param color to move: the Zobrist
+        hash takes the side to move from the number of moves made
+        """
+        key = board.zobrist_hash
+        if (color == Color.Blue) != (board._number_of_moves_made % 2 == 1):
+            key ^= _OFF_TURN_KEY
+        return key
+
+    def _children(
+        self, board: Board, color: Color, key: int
+    ) -> tuple[Optional[tuple[int, int, int]], list[list[int]]]:
+        """
+        The (phi, delta, move) of a position decided without search,
+        or None and the moves worth searching: their flat index,
+        the key of the position after them and the phi and delta
+        that position starts with, by the connection distances
+        """
+        opponent = color.opponent
+        if board._has_color_won(opponent):
+            return (INFINITY, 0, NO_MOVE), []
+        if board._has_color_won(color):
+            return (0, INFINITY, NO_MOVE), []
+        distances = self._distances
+        if distances.distance(color) == 1:
+            wins = winning_cells(board, color)
+            if wins:
+                return (0, INFINITY, wins[0]), []
+        moves = None
+        other = distances.distance(opponent)
+        # with the swap move available the threats are not looked at:
+        # the swap move may take away the stone they stand on
+        if not board.swap_available and other == 1:
+            moves = winning_cells(board, opponent)
+            if len(moves) > 1:
+                return (INFINITY, 0, moves[0]), []
+        elif not board.swap_available and other == 2:
+            moves = self._must_play(board, opponent)
+            if not moves:
+                return (INFINITY, 0, NO_MOVE), []
+        dim_x = board.dim_x
+        moves_made = board._number_of_moves_made
+        zobrist = board._zobrist
+        # the hash of the side to move and swap state before and after
+        state = state_key(zobrist, moves_made, board.swap_available) ^ state_key(
+            zobrist, moves_made + 1, moves_made == 0 and board._swap_rule_allowed
+        )
+        if moves is None:
+            moves = [y * dim_x + x for x, y in board.possible_moves]
+        # the opponent needs at least its distance to win after any move,
+        # color its distance after the move
+        other = min(other, INFINITY)
+        after = distances.distances_after_move(color)
+        centre = centre_distance(dim_x, board.dim_y)
+        moves.sort(key=lambda index: (after[index], centre[index], index))
+        cells = zobrist.cells
+        coords = coords_table(dim_x, board.dim_y)
+        children = []
+        for index in moves:
+            x, y = coords[index]
+            previous = board[x, y].color.value
+            children.append(
+                [
+                    index,
+                    key ^ state ^ cells[previous][index] ^ cells[color.value][index],
+                    other,
+                    max(1, min(after[index], INFINITY)),
+                ]
+            )
+        return None, children
+
+    def _must_play(self, board: Board, opponent: Color) -> list[int]:
+        """
+        The cells where the side to move may stop @param opponent, which
+        needs two stones to connect. A cell of the opponent that leaves
+        it two winning cells wins unless that cell or one of the two is
+        played first (and only the cell itself with three or more): the
+        moves outside of every such set lose.
+        Both cells of a connecting pair leave the opponent one stone
+        short, so only those cells are looked at
+        """
+        after = self._distances.distances_after_move(opponent)
+        coords = coords_table(board.dim_x, board.dim_y)
+        candidates = [index for index in board._empty if after[index] == 1]
+        must_play = set(board._empty)
+        for index in candidates:
+            x, y = coords[index]
+            with board.probe_stone(x, y, opponent):
+                wins = winning_cells(
+                    board, opponent, (cell for cell in candidates if cell != index)
+                )
+            if len(wins) == 2:
+                must_play.intersection_update((index, *wins))
+            elif len(wins) > 2:
+                must_play.intersection_update((index,))
+            if not must_play:
+                break
+        return list(must_play)
+
+    def _mid(
+        self, board: Board, color: Color, key: int, phi_limit: int, delta_limit: int
+    ) -> tuple[int, int, int]:
+        """
+        Searches the position of @param board, color to move, until its
+        phi reaches phi_limit or its delta reaches delta_limit.
+        @return its phi, delta and best move
+        """
+        self._nodes += 1
+        if self.max_nodes is not None and self._nodes > self.max_nodes:
+            raise SearchTimeout()
+        if (
+            self._deadline is not None
+            and self._nodes % _CLOCK_INTERVAL == 0
+            and time.perf_counter() >= self._deadline
+        ):
+            raise SearchTimeout()
+
+        nodes_before = self._nodes
+        decided, children = self._children(board, color, key)
+        if decided is not None:
+            self.table.store(key, *decided, 1)
+            return decided
+
+        table = self.table
+        distances = self._distances
+        coords = coords_table(board.dim_x, board.dim_y)
+        opponent = color.opponent
+        while True:
+            # phi is the least delta of the children, delta the sum of phis.
+            # The numbers of a child are kept at hand as well, for when
+            # its entry gave way to another one
+            phi = INFINITY
+            delta = 0
+            second = INFINITY
+            best = children[0]
+            for child in children:
+                entry = table.probe(child[1])
+                if entry is not None:
+                    child[2], child[3] = entry[0], entry[1]
+                delta = min(delta + child[2], INFINITY)
+                if child[3] < phi:
+                    second = phi
+                    phi = child[3]
+                    best = child
+                elif child[3] < second:
+                    second = child[3]
+            if phi >= phi_limit or delta >= delta_limit:
+                table.store(key, phi, delta, best[0], self._nodes - nodes_before)
+                return phi, delta, best[0]
+            # the best child gets as far as it can before another one
+            # would take its place, and a little further (1 + 1/4 trick)
+            child_phi_limit = min(delta_limit - delta + best[2], INFINITY)
+            child_delta_limit = min(phi_limit, second + 1 + (second >> 2))
+            x, y = coords[best[0]]
+            board.place_stone(x, y, color)
+            distances.update((x, y))
+            try:
+                best[2], best[3], _ = self._mid(
+                    board, opponent, best[1], child_phi_limit, child_delta_limit
+                )
+            finally:
+                board.undo()
+                distances.update((x, y))
@@ -0,0 +1,177 @@
+"""symmetry.py: the symmetries of hex positions"""
+import enum
+from functools import lru_cache
+from typing import Iterator, NamedTuple, Optional
+
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.zobrist import ZOBRIST_BITS, zobrist_keys
+
+__author__ = "Gianpiero Cea"
+
+"""
+ With the neighbours of Board, (x, y) joined to (x +- 1, y),
+ (x, y +- 1) and (x +- 1, y +- 1), two maps keep the hex adjacency:
+
+     Rotate180       (x, y) -> (dim_x - 1 - x, dim_y - 1 - y)
+     Transpose       (x, y) -> (y, x)
+
+ Rotating keeps the colors: each border goes to the other border of
+ its color. Transposing (square boards only) sends the red borders to
+ the blue ones, so it swaps the colors of the stones and of the side
+ to move. The two generate four transforms, each its own inverse.
+
+ The canonical key of a position is the least Zobrist hash over its
+ transforms, where the transform with a color swap also swaps the
+ side to move. Positions with the same canonical key have the same
+ value for the side to move, and a move m of the canonical position
+ is the move transform(m) of the original one.
+"""
+
+
+class Transform(enum.IntEnum):
+    Identity = 0
+    Rotate180 = 1
+    # the transforms below swap the colors
+    Transpose = 2
+    AntiTranspose = 3
+
+    @property
+    def swaps_colors(self) -> bool:
+        return self >= Transform.Transpose
+
+
+def transforms(dim_x: int, dim_y: int) -> tuple[Transform, ...]:
+    """
+    The transforms of a dim_x * dim_y board
+    """
+    if dim_x == dim_y:
+        return tuple(Transform)
+    return (Transform.Identity, Transform.Rotate180)
+
+
+def transform_cell(
+    transform: Transform, coords: tuple[int, int], dim_x: int, dim_y: int
+) -> tuple[int, int]:
+    """
+    The image of cell @param coords, as well as the cell it comes from
+    """
+    x, y = coords
+    match transform:
+        case Transform.Identity:
+            return (x, y)
+        case Transform.Rotate180:
+            return (dim_x - 1 - x, dim_y - 1 - y)
+        case Transform.Transpose:
+            return (y, x)
+        case Transform.AntiTranspose:
+            return (dim_y - 1 - y, dim_x - 1 - x)
+    raise ValueError(f"Not recognised transform {transform}")
+
+
+def transform_color(transform: Transform, color: Color) -> Color:
+    if transform.swaps_colors and color != Color.Empty:
+        return color.opponent
+    return color
+
+
+@lru_cache(maxsize=None)
+def cell_permutation(transform: Transform, dim_x: int, dim_y: int) -> tuple[int, ...]:
+    """
+    Entry y * dim_x + x is the flat index of the image of (x, y)
+    """
+    if transform.swaps_colors and dim_x != dim_y:
+        raise ValueError(f"Cannot transpose a {dim_x}x{dim_y} board-not square")
+    permutation = []
+    for y in range(dim_y):
+        for x in range(dim_x):
+            image_x, image_y = transform_cell(transform, (x, y), dim_x, dim_y)
+            permutation.append(image_y * dim_x + image_x)
+    return tuple(permutation)
+
+
+def board_colors(board: Board) -> list[Color]:
+    """
+    The colors of the cells of @param board (a Board or a BitBoard)
+    by flat index y * dim_x + x
+    """
+    return [board[x, y].color for y in range(board.dim_y) for x in range(board.dim_x)]
+
+
+def board_stones(board: Board) -> list[tuple[int, Color]]:
+    """
+    The flat index and color of every stone of @param board,
+    see Board.stones
+    """
+    if isinstance(board, Board):
+        return board.stones()
+    return [
+        (index, color)
+        for index, color in enumerate(board_colors(board))
+        if color != Color.Empty
+    ]
+
+
+def _blue_to_move(board: Board) -> bool:
+    return board._number_of_moves_made % 2 == 1
+
+
+def canonical_key(board: Board) -> tuple[int, Transform]:
+    """
+    The canonical key of the position of @param board (a Board or a
+    BitBoard) and the transform that maps it to the canonical position.
+    The key of Transform.Identity is board.zobrist_hash
+    """
+    dim_x, dim_y = board.dim_x, board.dim_y
+    keys = zobrist_keys(dim_x, dim_y)
+    stones = board_stones(board)
+    blue_to_move = _blue_to_move(board)
+    state = keys.board_size
+    if board.swap_available:
+        state ^= keys.swap_available
+    best = (1 << ZOBRIST_BITS, Transform.Identity)
+    for transform in transforms(dim_x, dim_y):
+        permutation = cell_permutation(transform, dim_x, dim_y)
+        swap = transform.swaps_colors
+        key = state
+        if blue_to_move != swap:
+            key ^= keys.blue_to_move
+        for index, color in stones:
+            image_color = color.opponent if swap else color
+            key ^= keys.cells[image_color.value][permutation[index]]
+        if key < best[0]:
+            best = (key, transform)
+    return best
+
+
+class Variant(NamedTuple):
+    transform: Transform
+    # the colors of the cells by flat index
+    colors: list[Color]
+    to_move: Color
+    move: Optional[tuple[int, int]]
+
+
+def symmetric_variants(
+    board: Board, move: Optional[tuple[int, int]] = None
+) -> Iterator[Variant]:
+    """
+    Yields the position of @param board under every transform of its
+    size, identity first, with @param move (e.g. the move played in the
+    position) mapped along. Blue may be the side to move of a variant
+    with as many red stones as blue ones, a position no Board can hold
+    """
+    dim_x, dim_y = board.dim_x, board.dim_y
+    colors = board_colors(board)
+    to_move = Color.Blue if _blue_to_move(board) else Color.Red
+    for transform in transforms(dim_x, dim_y):
+        permutation = cell_permutation(transform, dim_x, dim_y)
+        variant = [Color.Empty] * len(colors)
+        for index, color in enumerate(colors):
+            variant[permutation[index]] = transform_color(transform, color)
+        yield Variant(
+            transform,
+            variant,
+            transform_color(transform, to_move),
+            None if move is None else transform_cell(transform, move, dim_x, dim_y),
+        )
@@ -0,0 +1,186 @@
+"""tournament.py: many headless games of hex played across processes"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, NamedTuple, Optional
+
+from hexgame.board import BOARD_DEFAULT_X_DIM, BOARD_DEFAULT_Y_DIM, Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.mcts import MCTS_DEFAULT_PLAYOUTS
+from hexgame.player import Player
+
+__author__ = "Gianpiero Cea"
+
+# how many games a worker plays per task
+DEFAULT_CHUNK_SIZE = 16
+
+
+class PlayerSpec(NamedTuple):
+    """
+    A picklable description of a Player, from which
+    every worker builds its own players
+    """
+
+    mode: Player.PlayerMode = Player.PlayerMode.AI
+    playouts: Optional[int] = MCTS_DEFAULT_PLAYOUTS
+    time_limit: Optional[float] = None
+
+    def build(self, color: Color, rng: random.Random) -> Player:
+        return Player(
+            color=color,
+            mode=self.mode,
+            playouts=self.playouts,
+            time_limit=self.time_limit,
+            rng=rng,
+        )
+
+
+class TournamentResult:
+    """
+    Streamed counts of a tournament: results of chunks of games
+    are merged in as soon as they are available
+    """
+
+    def __init__(self) -> None:
+        self.games: int = 0
+        # wins by color and by player (1 or 2)
+        self.color_wins: dict[Color, int] = {Color.Red: 0, Color.Blue: 0}
+        self.player_wins: dict[int, int] = {1: 0, 2: 0}
+        # histogram of the game lengths, in moves
+        self.lengths: dict[int, int] = {}
+        self.seconds: float = 0.0
+
+    def add_game(self, winner: Color, winner_player: int, length: int) -> None:
+        self.games += 1
+        self.color_wins[winner] += 1
+        self.player_wins[winner_player] += 1
+        self.lengths[length] = self.lengths.get(length, 0) + 1
+
+    def merge(self, other: "TournamentResult") -> None:
+        self.games += other.games
+        for color, wins in other.color_wins.items():
+            self.color_wins[color] += wins
+        for player, wins in other.player_wins.items():
+            self.player_wins[player] += wins
+        for length, count in other.lengths.items():
+            self.lengths[length] = self.lengths.get(length, 0) + count
+
+    def win_rate(self, color: Color) -> float:
+        return self.color_wins[color] / self.games if self.games else 0.0
+
+    @property
+    def average_length(self) -> float:
+        if not self.games:
+            return 0.0
+        return sum(length * count for length, count in self.lengths.items()) / (
+            self.games
+        )
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "games": self.games,
+            "red_wins": self.color_wins[Color.Red],
+            "blue_wins": self.color_wins[Color.Blue],
+            "red_win_rate": self.win_rate(Color.Red),
+            "blue_win_rate": self.win_rate(Color.Blue),
+            "player_1_wins": self.player_wins[1],
+            "player_2_wins": self.player_wins[2],
+            "average_length": self.average_length,
+            "min_length": min(self.lengths, default=0),
+            "max_length": max(self.lengths, default=0),
+            "seconds": self.seconds,
+            "games_per_second": self.games_per_second,
+        }
+
+
+class _Chunk(NamedTuple):
+    index: int
+    games: int
+    seed: str
+    dim_x: int
+    dim_y: int
+    swap_rule_allowed: bool
+    player_1: PlayerSpec
+    player_2: PlayerSpec
+
+
+def _play_chunk(chunk: _Chunk) -> TournamentResult:
+    """
+    Plays a chunk of games in a worker. Each chunk has its own
+    random stream, seeded from the tournament seed and the chunk
+    index, so the results do not depend on how chunks are
+    spread over the workers
+    """
+    rng = random.Random(chunk.seed)
+    result = TournamentResult()
+    for _ in range(chunk.games):
+        board = Board.create(
+            dim_x=chunk.dim_x,
+            dim_y=chunk.dim_y,
+            swap_rule_allowed=chunk.swap_rule_allowed,
+        )
+        player_1 = chunk.player_1.build(Color.Red, rng)
+        player_2 = chunk.player_2.build(Color.Blue, rng)
+        game = Game(board=board, player_1=player_1, player_2=player_2)
+        winner = game.run()
+        winner_player = 1 if game.current_player is player_1 else 2
+        result.add_game(winner, winner_player, board._number_of_moves_made)
+    return result
+
+
+def run_tournament(
+    games: int,
+    dim_x: int = BOARD_DEFAULT_X_DIM,
+    dim_y: int = BOARD_DEFAULT_Y_DIM,
+    player_1: PlayerSpec = PlayerSpec(),
+    player_2: PlayerSpec = PlayerSpec(),
+    workers: Optional[int] = None,
+    seed: int = 0,
+    swap_rule_allowed: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[TournamentResult], None]] = None,
+) -> TournamentResult:
+    """
+    Plays @param games headless games, player_1 (Red) against
+    player_2 (Blue), over a pool of @param workers processes
+    (all the cores by default, in process when 1).
+    @param on_progress is called with the running totals
+    every time a chunk of games is done
+    """
+    chunks = [
+        _Chunk(
+            index,
+            min(chunk_size, games - start),
+            f"{seed}:{index}",
+            dim_x,
+            dim_y,
+            swap_rule_allowed,
+            player_1,
+            player_2,
+        )
+        for index, start in enumerate(range(0, games, chunk_size))
+    ]
+    result = TournamentResult()
+    start_time = time.perf_counter()
+
+    def collect(chunk_result: TournamentResult) -> None:
+        result.merge(chunk_result)
+        result.seconds = time.perf_counter() - start_time
+        if on_progress is not None:
+            on_progress(result)
+
+    if workers == 1:
+        for chunk in chunks:
+            collect(_play_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_play_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                collect(future.result())
+    result.seconds = time.perf_counter() - start_time
+    return result
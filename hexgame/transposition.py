@@ -0,0 +1,181 @@
+"""transposition.py: a fixed size table of search results keyed by Zobrist hash"""
+import enum
+from array import array
+from typing import NamedTuple, Optional
+
+__author__ = "Gianpiero Cea"
+
+TT_DEFAULT_SIZE_MB = 16
+
+# bytes taken by one entry across the parallel arrays:
+# key (8), value (8), move (4), depth (2), age (1), bound (1)
+ENTRY_BYTES = 24
+
+NO_MOVE = -1
+
+
+class Bound(enum.IntEnum):
+    """
+    How the stored value relates to the true value of the position
+    """
+
+    Empty = 0
+    Exact = 1
+    # the true value is at least the stored one (fail high)
+    Lower = 2
+    # the true value is at most the stored one (fail low)
+    Upper = 3
+
+
+class TTEntry(NamedTuple):
+    depth: int
+    value: float
+    bound: Bound
+    # flat index y * dim_x + x of the best move, NO_MOVE if unknown
+    move: int
+
+
+class TTStats(NamedTuple):
+    probes: int
+    hits: int
+    misses: int
+    # probes that found the slot taken by another position
+    collisions: int
+    stores: int
+    # stores that evicted another position
+    replacements: int
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+
+class TranspositionTable:
+    """
+    A hash table of search results with a fixed memory budget of
+    @param size_mb megabytes, rounded down to a power of two entries.
+
+    Entries live in parallel typed arrays (no per entry objects), one
+    slot per hash, indexed by the low bits of the key. The full key is
+    stored too, so a slot taken by another position is told apart.
+
+    Replacement: a slot is overwritten when it is empty, holds the same
+    position, was written during an older search (see new_search)
+    or holds a result searched no deeper than the new one
+    """
+
+    def __init__(self, size_mb: float = TT_DEFAULT_SIZE_MB) -> None:
+        entries = max(1, int(size_mb * 2**20) // ENTRY_BYTES)
+        # the largest power of two that fits the budget
+        self._size: int = 1 << (entries.bit_length() - 1)
+        self._mask: int = self._size - 1
+        self._keys: array = array("Q", bytes(8 * self._size))
+        self._values: array = array("d", bytes(8 * self._size))
+        self._moves: array = array("i", [NO_MOVE]) * self._size
+        self._depths: array = array("h", bytes(2 * self._size))
+        self._ages: array = array("B", bytes(self._size))
+        self._bounds: array = array("B", bytes(self._size))
+        self._age: int = 0
+        self.clear_stats()
+
+    def __len__(self) -> int:
+        """
+        Number of slots of the table
+        """
+        return self._size
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size * ENTRY_BYTES
+
+    def new_search(self) -> None:
+        """
+        Marks the entries stored so far as old,
+        so that the next search may replace them first
+        """
+        self._age = (self._age + 1) & 0xFF
+
+    def clear(self) -> None:
+        """
+        Empties the table and resets its counters
+        """
+        self._bounds = array("B", bytes(self._size))
+        self._age = 0
+        self.clear_stats()
+
+    def clear_stats(self) -> None:
+        self._probes = 0
+        self._hits = 0
+        self._collisions = 0
+        self._stores = 0
+        self._replacements = 0
+
+    @property
+    def stats(self) -> TTStats:
+        return TTStats(
+            self._probes,
+            self._hits,
+            self._probes - self._hits,
+            self._collisions,
+            self._stores,
+            self._replacements,
+        )
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        """
+        Returns the entry stored for position @param key, if any
+        """
+        slot = key & self._mask
+        self._probes += 1
+        bound = self._bounds[slot]
+        if bound == Bound.Empty:
+            return None
+        if self._keys[slot] != key:
+            self._collisions += 1
+            return None
+        self._hits += 1
+        return TTEntry(
+            self._depths[slot], self._values[slot], Bound(bound), self._moves[slot]
+        )
+
+    def best_move(self, key: int) -> int:
+        """
+        The best move stored for @param key, NO_MOVE if there is none.
+        Does not count as a probe
+        """
+        slot = key & self._mask
+        if self._bounds[slot] != Bound.Empty and self._keys[slot] == key:
+            return self._moves[slot]
+        return NO_MOVE
+
+    def store(
+        self, key: int, depth: int, value: float, bound: Bound, move: int = NO_MOVE
+    ) -> bool:
+        """
+        Stores the result of searching position @param key to @param depth,
+        if the replacement policy allows it.
+        @return True iff the entry was written
+        """
+        slot = key & self._mask
+        stored = self._bounds[slot]
+        same_position = self._keys[slot] == key
+        if (
+            stored != Bound.Empty
+            and not same_position
+            and self._ages[slot] == self._age
+            and self._depths[slot] > depth
+        ):
+            return False
+        if stored != Bound.Empty and not same_position:
+            self._replacements += 1
+        if same_position and move == NO_MOVE:
+            # keep the move found by an earlier search of the position
+            move = self._moves[slot]
+        self._keys[slot] = key
+        self._depths[slot] = depth
+        self._values[slot] = value
+        self._bounds[slot] = bound
+        self._moves[slot] = move
+        self._ages[slot] = self._age
+        self._stores += 1
+        return True
@@ -1,5 +1,6 @@
 """unionfind.py implements a union find data structure"""
-from typing import TypeVar, Generic
+from array import array
+from typing import TypeVar, Generic, Optional
 
 T = TypeVar("T")
 __author__ = "Gianpiero Cea"
@@ -36,6 +37,9 @@ class UnionFind(Generic[T]):
         # only valid for a "root" node
         self._size: dict[T, int] = {node: 1 for node in nodes}
         self._counts: int = len(nodes)
+        # the roots that got attached to another root, in order,
+        # only kept once track_history has been called
+        self._history: Optional[list[T]] = None
 
     def __len__(self):
         return self._counts
@@ -43,9 +47,87 @@ class UnionFind(Generic[T]):
     def __str__(self) -> str:
         return str(self._parents)
 
+    def copy(self) -> "UnionFind[T]":
+        """
+        An independent copy, made of shallow copies of the
+        parents, sizes and history (the nodes are shared)
+        """
+        clone = object.__new__(type(self))
+        clone._parents = self._parents.copy()
+        clone._size = self._size.copy()
+        clone._counts = self._counts
+        clone._history = None if self._history is None else self._history.copy()
+        return clone
+
+    def __getstate__(self) -> tuple:
+        """
+        Pickles the nodes once, with the parents, sizes
+        and history as integer arrays of node positions
+        """
+        nodes = list(self._parents)
+        position = dict(zip(nodes, range(len(nodes))))
+        history = self._history
+        return (
+            nodes,
+            array("i", map(position.__getitem__, self._parents.values())),
+            array("i", self._size.values()),
+            self._counts,
+            None if history is None else array("i", map(position.__getitem__, history)),
+        )
+
+    def __setstate__(self, state: tuple) -> None:
+        nodes, parents, size, counts, history = state
+        self._parents = {node: nodes[parent] for node, parent in zip(nodes, parents)}
+        self._size = dict(zip(nodes, size))
+        self._counts = counts
+        self._history = None if history is None else [nodes[i] for i in history]
+
+    def track_history(self) -> None:
+        """
+        Starts recording the unions so that they can be rolled back.
+        While recording, find does not compress the paths (a compressed
+        path could not be rolled back): union by size alone keeps
+        the trees O(log n) deep
+        """
+        if self._history is None:
+            self._history = []
+
+    def checkpoint(self) -> int:
+        """
+        Returns a checkpoint that rollback can go back to
+        """
+        return len(self._history)
+
+    def rollback(self, checkpoint: int) -> None:
+        """
+        Undoes, latest first, all the unions done after @param checkpoint
+        """
+        history = self._history
+        while len(history) > checkpoint:
+            child = history.pop()
+            # without path compression the parent of a
+            # non-root node is still the root it was attached to
+            root = self._parents[child]
+            self._parents[child] = child
+            self._size[root] -= self._size[child]
+            self._counts += 1
+
     def __iter__(self):
         return self._parents.__iter__()
 
+    def __contains__(self, a: T) -> bool:
+        return a in self._parents
+
+    def add(self, a: T) -> None:
+        """
+        Adds a new node, in a component of its own
+        """
+        if a in self._parents:
+            return
+        self._parents[a] = a
+        self._size[a] = 1
+        self._counts += 1
+
     def find(self, a: T) -> T:
         """
         Returns the  root of the component tree,
@@ -58,11 +140,13 @@ class UnionFind(Generic[T]):
         while parent != self._parents[parent]:
             # chase ancestors
             parent = self._parents[parent]
+        if self._history is not None:
+            return parent
         # amortized code:
         # this is for speed
         while a != parent:
             newp = self._parents[a]
-            self._parents[a] == parent
+            self._parents[a] = parent
             a = newp
 
         return parent
@@ -84,16 +168,277 @@ class UnionFind(Generic[T]):
             return
 
         if self._size[root_a] < self._size[root_b]:
-            self._parents[root_a] = root_b
-            self._size[root_b] += self._size[root_a]
-        else:
-            self._parents[root_b] = root_a
-            self._size[root_a] += self._size[root_b]
+            root_a, root_b = root_b, root_a
+        self._parents[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        if self._history is not None:
+            self._history.append(root_b)
 
         # we one component less
         self._counts -= 1
 
 
+class ArrayUnionFind:
+    """
+    A union find over the integers 0..size-1, stored in two
+    flat arrays instead of dictionaries.
+
+    It uses union by size and path halving: while walking up
+    to the root every visited node is re-pointed to its grandparent,
+    which keeps the trees almost flat in a single pass.
+
+    It also keeps track of how long the finds are so that
+    the amortized behaviour can be checked on big boards
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        |input
+        size: the number of nodes, named 0..size-1
+        """
+        self._parents: array[int] = array("i", range(size))
+        self._size: array[int] = array("i", [1]) * size
+        self._counts: int = size
+        # number of find calls and of parent links followed by them
+        self._finds: int = 0
+        self._find_steps: int = 0
+        # same as UnionFind._history
+        self._history: Optional[array[int]] = None
+
+    def __len__(self):
+        return self._counts
+
+    def __str__(self) -> str:
+        return str(list(self._parents))
+
+    def copy(self) -> "ArrayUnionFind":
+        """
+        An independent copy, made of copies of the flat arrays
+        """
+        clone = object.__new__(ArrayUnionFind)
+        clone._parents = self._parents[:]
+        clone._size = self._size[:]
+        clone._counts = self._counts
+        clone._finds = self._finds
+        clone._find_steps = self._find_steps
+        clone._history = None if self._history is None else self._history[:]
+        return clone
+
+    def track_history(self) -> None:
+        """
+        Starts recording the unions so that they can be rolled back.
+        While recording, find does not halve the paths
+        """
+        if self._history is None:
+            self._history = array("i")
+
+    def checkpoint(self) -> int:
+        return len(self._history)
+
+    def rollback(self, checkpoint: int) -> None:
+        """
+        Undoes, latest first, all the unions done after @param checkpoint
+        """
+        history = self._history
+        parents = self._parents
+        while len(history) > checkpoint:
+            child = history.pop()
+            root = parents[child]
+            parents[child] = child
+            self._size[root] -= self._size[child]
+            self._counts += 1
+
+    def __iter__(self):
+        return iter(range(len(self._parents)))
+
+    def add(self) -> int:
+        """
+        Adds a new node, in a component of its own,
+        and returns its index
+        """
+        self._parents.append(len(self._parents))
+        self._size.append(1)
+        self._counts += 1
+        return len(self._parents) - 1
+
+    def find(self, a: int) -> int:
+        """
+        Returns the root of the component tree of node @param a,
+        halving the path to it on the way up
+        """
+        parents = self._parents
+        steps = 0
+        parent = parents[a]
+        if self._history is not None:
+            while parent != a:
+                a = parent
+                parent = parents[a]
+                steps += 1
+        while parent != a:
+            grandparent = parents[parent]
+            parents[a] = grandparent
+            a = grandparent
+            parent = parents[a]
+            steps += 1
+        self._finds += 1
+        self._find_steps += steps
+        return a
+
+    def union(self, a: int, b: int) -> None:
+        """
+        Given two nodes,it combines
+        their connected components
+        """
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return
+
+        # the smaller tree goes under the bigger one
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parents[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        if self._history is not None:
+            self._history.append(root_b)
+
+        self._counts -= 1
+
+    def max_depth(self) -> int:
+        """
+        Returns the depth of the deepest node in the forest
+        (a root has depth 0). It does not compress any path
+        """
+        parents = self._parents
+        depths = [-1] * len(parents)
+        deepest = 0
+        for node in range(len(parents)):
+            # climb until a node with a known depth (or a root)
+            path = []
+            while depths[node] < 0 and parents[node] != node:
+                path.append(node)
+                node = parents[node]
+            depth = max(depths[node], 0)
+            depths[node] = depth
+            for visited in reversed(path):
+                depth += 1
+                depths[visited] = depth
+            deepest = max(deepest, depth)
+        return deepest
+
+    @property
+    def average_find_length(self) -> float:
+        """
+        The average number of parent links followed by a find
+        """
+        return self._find_steps / self._finds if self._finds else 0.0
+
+    @property
+    def stats(self) -> dict[str, float]:
+        return {
+            "finds": self._finds,
+            "average_find_length": self.average_find_length,
+            "max_depth": self.max_depth(),
+        }
+
+
+class IndexedUnionFind(UnionFind[T]):
+    """
+    A UnionFind on arbitrary (hashable) nodes backed by an
+    ArrayUnionFind: every node is mapped once to its index
+    in the list of nodes and all the work is done on integers.
+
+    Is a drop in replacement of UnionFind, so it can be handed
+    to a Board or a Graph
+    """
+
+    def __init__(self, nodes: list[T]) -> None:
+        """
+        |input
+        nodes: the nods of the graph
+        """
+        self._nodes: list[T] = list(nodes)
+        self._index: dict[T, int] = {node: i for i, node in enumerate(self._nodes)}
+        self._array: ArrayUnionFind = ArrayUnionFind(len(self._nodes))
+
+    def __len__(self):
+        return len(self._array)
+
+    def __str__(self) -> str:
+        return str(
+            {
+                node: self._nodes[self._array._parents[i]]
+                for node, i in self._index.items()
+            }
+        )
+
+    def copy(self) -> "IndexedUnionFind[T]":
+        clone = object.__new__(type(self))
+        clone._nodes = self._nodes.copy()
+        clone._index = self._index.copy()
+        clone._array = self._array.copy()
+        return clone
+
+    def __getstate__(self) -> tuple:
+        # the index of the nodes follows from their list
+        return self._nodes, self._array
+
+    def __setstate__(self, state: tuple) -> None:
+        self._nodes, self._array = state
+        self._index = {node: i for i, node in enumerate(self._nodes)}
+
+    def __iter__(self):
+        return self._nodes.__iter__()
+
+    def __contains__(self, a: T) -> bool:
+        return a in self._index
+
+    def add(self, a: T) -> None:
+        """
+        Adds a new node, in a component of its own.
+        It gets the next free index
+        """
+        if a in self._index:
+            return
+        self._index[a] = self._array.add()
+        self._nodes.append(a)
+
+    def find(self, a: T) -> T:
+        return self._nodes[self._array.find(self._index[a])]
+
+    def union(self, a: T, b: T) -> None:
+        self._array.union(self._index[a], self._index[b])
+
+    def track_history(self) -> None:
+        self._array.track_history()
+
+    def checkpoint(self) -> int:
+        return self._array.checkpoint()
+
+    def rollback(self, checkpoint: int) -> None:
+        self._array.rollback(checkpoint)
+
+    def index(self, a: T) -> int:
+        """
+        Returns the integer index node @param a is mapped to
+        """
+        return self._index[a]
+
+    @property
+    def backend(self) -> ArrayUnionFind:
+        """
+        The underlying integer union find
+        """
+        return self._array
+
+    def max_depth(self) -> int:
+        return self._array.max_depth()
+
+    @property
+    def average_find_length(self) -> float:
+        return self._array.average_find_length
+
+
 if __name__ == "__main__":
     uf = UnionFind([(0, 0), (1, 1), (1, 0), (2, 1)])
     print(len(uf))
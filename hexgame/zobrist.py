@@ -0,0 +1,69 @@
+"""zobrist.py: Zobrist keys to hash hex positions"""
+import random
+from functools import lru_cache
+from typing import NamedTuple
+
+from hexgame.color import Color
+
+__author__ = "Gianpiero Cea"
+
+"""
+ The Zobrist hash of a position is the xor of one random 64 bit key
+ per stone on the board, plus a key when Blue is to move and a key
+ when the swap move is available. A key of the board size is always
+ in: the empty cells have no key, so without it the empty boards of
+ all sizes would hash to 0. Placing or removing a stone xors
+ a single key in or out, so boards keep their hash up to date
+ in O(1) per move.
+"""
+
+ZOBRIST_BITS = 64
+
+
+class ZobristKeys(NamedTuple):
+    """
+    The keys of a board size: cells[color.value][y * dim_x + x]
+    is the key of the (x, y) cell holding that color,
+    0 for the empty cells
+    """
+
+    cells: tuple[tuple[int, ...], ...]
+    blue_to_move: int
+    swap_available: int
+    board_size: int
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(dim_x: int, dim_y: int) -> ZobristKeys:
+    """
+    Draws (once per board size) the keys of a dim_x * dim_y board.
+    The generator is seeded with the board size,
+    so hashes are the same from run to run and across processes
+    """
+    rng = random.Random(f"zobrist:{dim_x}x{dim_y}")
+    cells = tuple(
+        tuple(
+            0 if color == Color.Empty else rng.getrandbits(ZOBRIST_BITS)
+            for _ in range(dim_x * dim_y)
+        )
+        for color in sorted(Color, key=lambda color: color.value)
+    )
+    return ZobristKeys(
+        cells,
+        rng.getrandbits(ZOBRIST_BITS),
+        rng.getrandbits(ZOBRIST_BITS),
+        rng.getrandbits(ZOBRIST_BITS),
+    )
+
+
+def state_key(keys: ZobristKeys, moves_made: int, swap_available: bool) -> int:
+    """
+    The part of the hash that does not depend on the stones:
+    the board size, the side to move (Red moves first) and the swap move
+    """
+    key = keys.board_size
+    if moves_made % 2:
+        key ^= keys.blue_to_move
+    if swap_available:
+        key ^= keys.swap_available
+    return key
@@ -0,0 +1,92 @@
+from hexgame.alphabeta import (
+    WIN_VALUE,
+    AlphaBeta,
+    _value_from_table,
+    _value_to_table,
+)
+from hexgame.bitboard import BitBoard
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.player import Player
+import pytest
+
+
+class TestAlphaBeta:
+    @pytest.mark.parametrize("board_type", [Board.create, BitBoard])
+    def test_finds_winning_move(self, board_type):
+        board = board_type(dim_x=4, dim_y=4)
+        for x, y, color in [
+            (1, 0, Color.Red),
+            (0, 0, Color.Blue),
+            (1, 1, Color.Red),
+            (3, 3, Color.Blue),
+            (1, 2, Color.Red),
+            (3, 0, Color.Blue),
+        ]:
+            board.place_stone(x, y, color)
+        before = str(board)
+        search = AlphaBeta(time_limit=None, max_depth=3)
+        assert search.search(board, Color.Red) in [(1, 3), (2, 3)]
+        assert search.info.value == WIN_VALUE - 1
+        assert search.info.depth == 1
+        assert str(board) == before
+        assert board._number_of_moves_made == 6
+
+    def test_blocks_opponent_win(self):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        board.place_stone(1, 0, Color.Red)
+        board.place_stone(2, 2, Color.Blue)
+        board.place_stone(1, 1, Color.Red)
+        search = AlphaBeta(time_limit=None, max_depth=3)
+        # red threatens to win at (1, 2)
+        assert search.search(board, Color.Blue) == (1, 2)
+        assert search.info.value > -WIN_VALUE / 2
+
+    def test_info_and_determinism(self):
+        board = Board.create(dim_x=5, dim_y=5)
+        first = AlphaBeta(time_limit=None, max_depth=2)
+        second = AlphaBeta(time_limit=None, max_depth=2)
+        assert first.search(board, Color.Red) == second.search(board, Color.Red)
+        info = first.info
+        assert info.depth == 2
+        assert len(info.pv) == 2
+        assert info.pv[0] == second.info.pv[0]
+        assert info.nodes > 25
+        assert info.nodes_per_second > 0
+
+    def test_time_limit(self):
+        board = Board.create(dim_x=11, dim_y=11)
+        search = AlphaBeta(time_limit=0.2)
+        move = search.search(board, Color.Red)
+        assert board.is_legal_move(move)
+        assert search.info.seconds < 1.0
+        assert search.info.depth >= 1
+
+    @pytest.mark.parametrize("size", [11, 19])
+    def test_time_limit_is_hard(self, size):
+        board = Board.create(dim_x=size, dim_y=size)
+        search = AlphaBeta(time_limit=0.05)
+        move = search.search(board, Color.Red)
+        assert search.info.seconds <= 0.05 + 0.02
+        # even without a finished iteration the move is not a corner
+        centre = size // 2
+        assert abs(move[0] - centre) + abs(move[1] - centre) <= 2
+        assert search.info.pv[0] == move
+
+    def test_win_values_stored_from_the_node(self):
+        # a win in 1 from a node at ply 2 is a win in 1 at any ply
+        stored = _value_to_table(WIN_VALUE - 3, 2)
+        assert stored == _value_to_table(WIN_VALUE - 1, 0)
+        assert _value_from_table(stored, 4) == WIN_VALUE - 5
+        assert _value_from_table(_value_to_table(-WIN_VALUE + 4, 3), 1) == (
+            -WIN_VALUE + 2
+        )
+        assert _value_to_table(2.0, 5) == _value_from_table(2.0, 5) == 2.0
+
+    def test_player_mode(self):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        player = Player(Color.Red, mode=Player.PlayerMode.AlphaBeta, time_limit=0.1)
+        i, j, color = player.play(board)
+        assert color == Color.Red
+        assert board.is_legal_move((i, j))
+        assert player.last_search_stats.depth >= 1
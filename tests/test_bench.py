@@ -0,0 +1,40 @@
+from hexgame.bench import BENCHMARKS, compare, main, report, run_benchmarks
+import json
+
+
+class TestBench:
+    def test_every_benchmark_runs(self):
+        results = run_benchmarks(sizes=(3,), repeat=1)
+        assert [result.name for result in results] == [
+            benchmark.name for benchmark in BENCHMARKS
+        ]
+        for result in results:
+            assert result.size == 3
+            assert result.seconds > 0
+            assert result.ops_per_second > 0
+
+    def test_report_and_compare(self):
+        results = run_benchmarks(sizes=(3, 4), repeat=1, only=["place_stone"])
+        document = json.loads(json.dumps(report(results, repeat=1)))
+        assert len(document["results"]) == 2
+        document["results"][0]["per_op_us"] *= 2
+        del document["results"][1]
+        comparisons = compare(results, document)
+        assert len(comparisons) == 1
+        assert comparisons[0].size == 3
+        assert -0.51 < comparisons[0].change < -0.49
+
+    def test_baseline_regression_exit_code(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        argv = ["--sizes", "3", "--repeat", "1", "--only", "union_find"]
+        assert main(argv + ["--output", str(baseline)]) == 0
+        document = json.loads(baseline.read_text())
+        document["results"][0]["per_op_us"] /= 100
+        baseline.write_text(json.dumps(document))
+        assert (
+            main(
+                argv
+                + ["--output", str(tmp_path / "now.json"), "--baseline", str(baseline)]
+            )
+            == 1
+        )
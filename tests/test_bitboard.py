@@ -0,0 +1,194 @@
+from hexgame.bitboard import BitBoard
+from hexgame.board import Board
+from hexgame.cell import Cell
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.player import Player
+from hexgame.unionfind import UnionFind
+import random
+import pytest
+
+
+class TestBitBoard:
+    def test_empty_cells_on_blank_board(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        for i in range(3):
+            for j in range(3):
+                assert board[i, j].is_empty
+        assert len(board.empty_positions) == 9
+
+    @pytest.mark.parametrize(
+        "board_sizes,expected",
+        [
+            pytest.param((0, 0), ""),
+            pytest.param((3, 4), "- - - \n - - - \n  - - - \n   - - - \n"),
+        ],
+    )
+    def test__str__empty_board(self, board_sizes: tuple[int, int], expected: str):
+        board = BitBoard(dim_x=board_sizes[0], dim_y=board_sizes[1])
+        assert str(board) == expected
+
+    @pytest.mark.parametrize(
+        "dims,tile, expected",
+        [
+            pytest.param((2, 3), (0, 0), {Cell(0, 1), Cell(1, 0), Cell(1, 1)}),
+            pytest.param((2, 3), (1, 0), {Cell(0, 0), Cell(1, 1)}),
+            pytest.param(
+                (2, 3), (0, 1), {Cell(0, 0), Cell(1, 1), Cell(1, 2), Cell(0, 2)}
+            ),
+            pytest.param(
+                (3, 3),
+                (1, 1),
+                {
+                    Cell(0, 0),
+                    Cell(1, 0),
+                    Cell(0, 1),
+                    Cell(1, 2),
+                    Cell(2, 1),
+                    Cell(2, 2),
+                },
+            ),
+        ],
+    )
+    def test_neighbours_of_cell(
+        self, dims: tuple[int, int], tile: tuple[int, int], expected: set[Cell]
+    ):
+        board = BitBoard(dim_x=dims[0], dim_y=dims[1])
+        assert board.find_neighbours(tile) == expected
+
+    def test_place_stone(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        board.place_stone(1, 2, color=Color.Red)
+        assert board[1, 2] == Cell(1, 2, Color.Red)
+        assert (1, 2) not in board.empty_positions
+        assert len(board.possible_moves) == 9
+
+    def test_use_swap_rule(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        board.place_stone(1, 2, color=Color.Red)
+        board.place_stone(1, 2, color=Color.Blue)
+        assert board[1, 2].color == Color.Blue
+        assert board.stones(Color.Red) == 0
+
+    def test_place_stone_already_filled(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        board.place_stone(0, 0, color=Color.Blue)
+        board.place_stone(1, 2, color=Color.Red)
+        with pytest.raises(ValueError):
+            board.place_stone(1, 2, color=Color.Blue)
+
+    def test_place_stone_out_of_range(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        with pytest.raises(ValueError):
+            board.place_stone(3, 0, color=Color.Blue)
+
+    def test_get_borders(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        assert board.get_borders(Color.Red) == ([], [])
+        board.place_stone(1, 0, Color.Red)
+        board.place_stone(2, 1, Color.Blue)
+        assert board.get_borders(Color.Red) == ([Cell(1, 0, Color.Red)], [])
+        assert board.get_borders(Color.Blue) == ([], [Cell(2, 1, Color.Blue)])
+
+    def test_has_color_won(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        assert not board._has_color_won(Color.Red)
+        board.place_stone(0, 0, Color.Red)
+        board.place_stone(0, 1, Color.Red)
+        assert not board._has_color_won(Color.Red)
+        board.place_stone(0, 2, Color.Red)
+        assert not board._has_color_won(Color.Blue)
+        assert board._has_color_won(Color.Red)
+
+    def test_no_wrap_between_rows(self):
+        # (2, 0) and (0, 1) are adjacent in the packed bits
+        # but not on the board
+        board = BitBoard(dim_x=3, dim_y=2)
+        board.place_stone(2, 0, Color.Red)
+        board.place_stone(0, 1, Color.Red)
+        assert not board._has_color_won(Color.Red)
+
+    @pytest.mark.parametrize("dims", [(5, 5), (4, 7), (11, 11)])
+    def test_agrees_with_board(self, dims: tuple[int, int]):
+        dim_x, dim_y = dims
+        nodes = [(x, y) for y in range(dim_y) for x in range(dim_x)]
+        board = Board(
+            dim_x=dim_x,
+            dim_y=dim_y,
+            red_conn_comp=UnionFind(nodes),
+            blue_conn_comp=UnionFind(nodes),
+            swap_rule_allowed=False,
+        )
+        bitboard = BitBoard(dim_x=dim_x, dim_y=dim_y, swap_rule_allowed=False)
+        rng = random.Random(7)
+        moves = list(nodes)
+        rng.shuffle(moves)
+        for move, (x, y) in enumerate(moves):
+            color = Color.Red if move % 2 == 0 else Color.Blue
+            board.place_stone(x, y, color)
+            bitboard.place_stone(x, y, color)
+            assert str(board) == str(bitboard)
+            for c in (Color.Red, Color.Blue):
+                assert board._has_color_won(c) == bitboard._has_color_won(c)
+
+    def test_game_runs_on_bitboard(self):
+        random.seed(3)
+        board = BitBoard(dim_x=5, dim_y=5)
+        game = Game(board=board, player_1=Player(), player_2=Player(Color.Blue))
+        while game.status == Game.GameStatus.Running:
+            game._play()
+        assert board._has_color_won(game.current_player.color)
+
+    def test_undo(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        board.place_stone(1, 1, Color.Red)
+        board.place_stone(1, 1, Color.Blue)
+        with board.probe_stone(0, 0, Color.Red):
+            assert board[0, 0].color == Color.Red
+        assert board[0, 0].is_empty
+        board.undo()
+        assert board[1, 1].color == Color.Red
+        board.undo()
+        assert board.stones(Color.Red) == 0
+        with pytest.raises(ValueError):
+            board.undo()
+
+
+class TestBitBoardZobristHash:
+    def test_same_hash_as_board(self):
+        board = Board.create(dim_x=5, dim_y=5)
+        bitboard = BitBoard(dim_x=5, dim_y=5)
+        rng = random.Random(2)
+        color = Color.Red
+        for _ in range(10):
+            move = board.random_move(rng)
+            board.place_stone(*move, color)
+            bitboard.place_stone(*move, color)
+            assert bitboard.zobrist_hash == board.zobrist_hash
+            color = color.opponent
+        for _ in range(10):
+            board.undo()
+            bitboard.undo()
+            assert bitboard.zobrist_hash == board.zobrist_hash
+
+    def test_illegal_move_keeps_hash(self):
+        bitboard = BitBoard(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        bitboard.place_stone(1, 1, Color.Red)
+        before = bitboard.zobrist_hash
+        with pytest.raises(ValueError):
+            bitboard.place_stone(1, 1, Color.Blue)
+        assert bitboard.zobrist_hash == before
+
+
+class TestBitBoardCopy:
+    def test_copy_is_independent(self):
+        bitboard = BitBoard(dim_x=5, dim_y=5)
+        bitboard.place_stone(2, 2, Color.Red)
+        cloned = bitboard.copy()
+        cloned.place_stone(1, 1, Color.Blue)
+        assert bitboard[1, 1].color == Color.Empty
+        assert cloned.zobrist_hash != bitboard.zobrist_hash
+        cloned.undo()
+        cloned.undo()
+        assert bitboard._number_of_moves_made == 1
+        assert cloned[2, 2].color == Color.Empty
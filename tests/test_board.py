@@ -1,7 +1,18 @@
-from hexgame.board import Board
+from hexgame.board import (
+    Board,
+    BLUE_RIGHT,
+    RED_BOTTOM,
+    RED_TOP,
+    neighbour_coords_table,
+    neighbour_table,
+)
 from hexgame.cell import Cell
 from hexgame.color import Color
-from hexgame.unionfind import UnionFind
+from hexgame.unionfind import IndexedUnionFind, UnionFind
+from array import array
+import copy
+import pickle
+import random
 import pytest
 
 
@@ -111,6 +122,25 @@ class TestBoardProperties:
         nbrs = board.find_neighbours(tile)
         assert nbrs == expected
 
+    def test_neighbour_table_is_shared(self):
+        board_1 = Board.create(dim_x=4, dim_y=3)
+        board_2 = Board.create(dim_x=4, dim_y=3)
+        assert board_1._neighbour_coords is board_2._neighbour_coords
+        assert board_1._neighbour_coords is neighbour_coords_table(4, 3)
+
+    def test_neighbour_table_matches_find_neighbours(self):
+        dim_x, dim_y = 4, 3
+        board = Board.create(dim_x=dim_x, dim_y=dim_y)
+        table = neighbour_table(dim_x, dim_y)
+        for y in range(dim_y):
+            for x in range(dim_x):
+                expected = board.find_neighbours((x, y))
+                assert {board[nbr] for nbr in board.iter_neighbours((x, y))} == expected
+                assert {
+                    board[idx % dim_x, idx // dim_x]
+                    for idx in table[board.index((x, y))]
+                } == expected
+
     def test_swap_rule_allowed(self):
         dim_x = 2
         dim_y = 2
@@ -177,17 +207,19 @@ class TestBoardProperties:
         board = Board(
             dim_x=dim_x, dim_y=dim_y, red_conn_comp=uf_red, blue_conn_comp=uf_blue
         )
-        assert len(board.blue_conn_comp) == 9
+        # each color has two extra virtual border nodes
+        assert len(board.blue_conn_comp) == 11
         print(board.blue_conn_comp)
         color = Color.Red
         board.place_stone(1, 1, color)
         print(str(board))
-        assert len(board.blue_conn_comp) == 9
-        assert len(board.red_conn_comp) == 9
+        assert len(board.blue_conn_comp) == 11
+        assert len(board.red_conn_comp) == 11
         board.place_stone(1, 2, color)
         print(str(board))
-        assert len(board.blue_conn_comp) == 9
-        assert len(board.red_conn_comp) == 8
+        assert len(board.blue_conn_comp) == 11
+        # joined to (1, 1) and to the top border
+        assert len(board.red_conn_comp) == 9
 
     @pytest.mark.parametrize(
         "color_str, expected",
@@ -234,3 +266,318 @@ class TestBoardProperties:
         board.place_stone(0, 2, Color.Red)
         assert not board._has_color_won(Color.Blue)
         assert board._has_color_won(Color.Red)
+
+    def test_border_stones_join_virtual_nodes(self):
+        board = Board.create(dim_x=3, dim_y=3)
+        board.place_stone(1, 0, Color.Red)
+        board.place_stone(2, 1, Color.Blue)
+        assert board.red_conn_comp.find((1, 0)) == board.red_conn_comp.find(RED_BOTTOM)
+        assert board.red_conn_comp.find((1, 0)) != board.red_conn_comp.find(RED_TOP)
+        assert board.blue_conn_comp.find((2, 1)) == board.blue_conn_comp.find(
+            BLUE_RIGHT
+        )
+
+    @pytest.mark.parametrize("union_find", [UnionFind, IndexedUnionFind])
+    def test_has_color_won_blue(self, union_find: type[UnionFind]):
+        board = Board.create(dim_x=3, dim_y=3, union_find=union_find)
+        board.place_stone(0, 0, Color.Blue)
+        board.place_stone(2, 2, Color.Blue)
+        assert not board._has_color_won(Color.Blue)
+        board.place_stone(1, 2, Color.Blue)
+        assert not board._has_color_won(Color.Blue)
+        # (0, 0) and (1, 2) are not neighbours, (1, 1) joins them
+        board.place_stone(1, 1, Color.Blue)
+        assert board._has_color_won(Color.Blue)
+        assert not board._has_color_won(Color.Red)
+
+    # undo
+
+    @pytest.mark.parametrize("union_find", [UnionFind, IndexedUnionFind])
+    def test_undo_restores_every_position(self, union_find: type[UnionFind]):
+        dim_x, dim_y = 5, 4
+        board = Board.create(dim_x=dim_x, dim_y=dim_y, union_find=union_find)
+        moves = [(x, y) for y in range(dim_y) for x in range(dim_x)]
+        random.Random(11).shuffle(moves)
+        snapshots = []
+        for move, (x, y) in enumerate(moves):
+            snapshots.append(
+                (
+                    str(board),
+                    len(board.red_conn_comp),
+                    len(board.blue_conn_comp),
+                    board._has_color_won(Color.Red),
+                    board._has_color_won(Color.Blue),
+                    board._number_of_moves_made,
+                )
+            )
+            board.place_stone(x, y, Color.Red if move % 2 == 0 else Color.Blue)
+        for snapshot in reversed(snapshots):
+            board.undo()
+            assert snapshot == (
+                str(board),
+                len(board.red_conn_comp),
+                len(board.blue_conn_comp),
+                board._has_color_won(Color.Red),
+                board._has_color_won(Color.Blue),
+                board._number_of_moves_made,
+            )
+
+    def test_undo_swap_move(self):
+        board = Board.create(dim_x=3, dim_y=1)
+        # a single row: the first red stone wins on its own
+        board.place_stone(1, 0, Color.Red)
+        assert board._has_color_won(Color.Red)
+        board.place_stone(1, 0, Color.Blue)
+        assert board[1, 0].color == Color.Blue
+        assert not board._has_color_won(Color.Red)
+        board.undo()
+        assert board[1, 0].color == Color.Red
+        assert board._has_color_won(Color.Red)
+        assert board._number_of_moves_made == 1
+
+    def test_undo_without_moves(self):
+        board = Board.create(dim_x=3, dim_y=3)
+        with pytest.raises(ValueError):
+            board.undo()
+
+    def test_probe_stone(self):
+        board = Board.create(dim_x=3, dim_y=3)
+        board.place_stone(0, 0, Color.Red)
+        board.place_stone(2, 2, Color.Blue)
+        board.place_stone(0, 1, Color.Red)
+        with board.probe_stone(0, 2, Color.Red):
+            assert board._has_color_won(Color.Red)
+        assert board[0, 2].is_empty
+        assert not board._has_color_won(Color.Red)
+        assert board._number_of_moves_made == 3
+
+    def test_empty_positions_on_non_square_board(self):
+        board = Board.create(dim_x=3, dim_y=2)
+        board.place_stone(2, 0, Color.Red)
+        assert sorted(board.empty_positions) == [(0, 0), (0, 1), (1, 0), (1, 1), (2, 1)]
+        assert len(board.possible_moves) == 6
+
+    # empty cells
+
+    def test_empty_positions_follow_moves_and_undo(self):
+        board = Board.create(dim_x=4, dim_y=3)
+        all_positions = sorted(board.empty_positions)
+        rng = random.Random(2)
+        played = []
+        for move in range(8):
+            x, y = board.random_move(rng)
+            assert board.is_legal_move((x, y))
+            board.place_stone(x, y, Color.Red if move % 2 == 0 else Color.Blue)
+            if (x, y) not in played:
+                played.append((x, y))
+            assert sorted(board.empty_positions) == sorted(
+                set(all_positions) - set(played)
+            )
+            assert sorted(board.iter_empty_positions()) == sorted(board.empty_positions)
+            assert board.number_of_empty_positions == len(board.empty_positions)
+            assert not board.is_empty_position((x, y))
+        for _ in range(8):
+            board.undo()
+        assert sorted(board.empty_positions) == all_positions
+
+    def test_swap_move_keeps_empty_positions(self):
+        board = Board.create(dim_x=3, dim_y=3)
+        board.place_stone(1, 1, Color.Red)
+        assert board.swap_available
+        assert board.is_legal_move((1, 1))
+        assert len(board.possible_moves) == 9
+        board.place_stone(1, 1, Color.Blue)
+        assert not board.swap_available
+        assert not board.is_legal_move((1, 1))
+        assert board.number_of_empty_positions == 8
+        board.undo()
+        assert board.number_of_empty_positions == 8
+        board.undo()
+        assert board.number_of_empty_positions == 9
+
+    def test_random_move_is_uniform(self):
+        board = Board.create(dim_x=2, dim_y=2, swap_rule_allowed=False)
+        board.place_stone(0, 0, Color.Red)
+        rng = random.Random(0)
+        counts = {}
+        for _ in range(3000):
+            move = board.random_move(rng)
+            counts[move] = counts.get(move, 0) + 1
+        assert set(counts) == {(1, 0), (0, 1), (1, 1)}
+        assert all(800 < count < 1200 for count in counts.values())
+
+    def test_random_move_on_full_board(self):
+        board = Board.create(dim_x=1, dim_y=1)
+        board.place_stone(0, 0, Color.Red)
+        board.place_stone(0, 0, Color.Blue)
+        with pytest.raises(ValueError):
+            board.random_move()
+
+
+class TestZobristHash:
+    def test_hash_follows_moves_and_undo(self):
+        board = Board.create(dim_x=5, dim_y=5)
+        rng = random.Random(4)
+        hashes = [board.zobrist_hash]
+        color = Color.Red
+        for _ in range(12):
+            board.place_stone(*board.random_move(rng), color)
+            color = color.opponent
+            assert board.zobrist_hash not in hashes
+            hashes.append(board.zobrist_hash)
+        for expected in reversed(hashes[:-1]):
+            board.undo()
+            assert board.zobrist_hash == expected
+
+    def test_transpositions_hash_the_same(self):
+        first = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        second = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        for x, y, color in [(0, 0, Color.Red), (1, 1, Color.Blue), (2, 2, Color.Red)]:
+            first.place_stone(x, y, color)
+        for x, y, color in [(2, 2, Color.Red), (1, 1, Color.Blue), (0, 0, Color.Red)]:
+            second.place_stone(x, y, color)
+        assert first.zobrist_hash == second.zobrist_hash
+
+    def test_side_to_move_and_swap_state(self):
+        swap = Board.create(dim_x=4, dim_y=4)
+        no_swap = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        assert swap.zobrist_hash == no_swap.zobrist_hash
+        swap.place_stone(1, 1, Color.Red)
+        no_swap.place_stone(1, 1, Color.Red)
+        assert swap.zobrist_hash != no_swap.zobrist_hash
+
+        # same stones, other side to move
+        other = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        other[1, 1] = Cell(1, 1, Color.Red)
+        assert other.zobrist_hash != no_swap.zobrist_hash
+
+    def test_sizes_hash_apart(self):
+        hashes = {
+            Board.create(dim_x, dim_y, swap_rule_allowed=False).zobrist_hash
+            for dim_x, dim_y in [(2, 4), (4, 2), (4, 4), (11, 11)]
+        }
+        assert len(hashes) == 4
+
+    def test_setitem_keeps_empty_cells(self):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        board[1, 1] = Cell(1, 1, Color.Red)
+        assert (1, 1) not in board.empty_positions
+        assert board.number_of_empty_positions == 8
+        assert not board.is_legal_move((1, 1))
+        rng = random.Random(0)
+        assert all(board.random_move(rng) != (1, 1) for _ in range(50))
+
+        board[1, 1] = Cell(1, 1, Color.Blue)
+        assert board.number_of_empty_positions == 8
+        board[1, 1] = Cell(1, 1, Color.Empty)
+        assert sorted(board.empty_positions) == sorted(
+            (x, y) for x in range(3) for y in range(3)
+        )
+        board.place_stone(1, 1, Color.Red)
+        assert board.number_of_empty_positions == 8
+
+    def test_stones(self):
+        board = Board.create(dim_x=3, dim_y=3)
+        board.place_stone(0, 1, Color.Red)
+        # the swap move takes the cell over
+        board.place_stone(0, 1, Color.Blue)
+        board.place_stone(2, 2, Color.Red)
+        assert sorted(board.stones()) == [(3, Color.Blue), (8, Color.Red)]
+        # stones set outside of place_stone are found too
+        board[1, 0] = Cell(1, 0, Color.Blue)
+        assert sorted(board.stones()) == [
+            (1, Color.Blue),
+            (3, Color.Blue),
+            (8, Color.Red),
+        ]
+
+    def test_swap_move(self):
+        board = Board.create(dim_x=4, dim_y=4)
+        before = board.zobrist_hash
+        board.place_stone(1, 1, Color.Red)
+        after_first = board.zobrist_hash
+        board.place_stone(1, 1, Color.Blue)
+        assert board.zobrist_hash not in (before, after_first)
+        board.undo()
+        assert board.zobrist_hash == after_first
+
+
+def played_board(size=7, moves=20, seed=0, **kwargs) -> Board:
+    board = Board.create(dim_x=size, dim_y=size, **kwargs)
+    rng = random.Random(seed)
+    color = Color.Red
+    for _ in range(moves):
+        board.place_stone(*board.random_move(rng), color)
+        color = color.opponent
+    return board
+
+
+def assert_same_board(clone: Board, board: Board) -> None:
+    assert str(clone) == str(board)
+    assert clone.zobrist_hash == board.zobrist_hash
+    assert clone._number_of_moves_made == board._number_of_moves_made
+    assert sorted(clone.empty_positions) == sorted(board.empty_positions)
+    for color in (Color.Red, Color.Blue):
+        assert clone._has_color_won(color) == board._has_color_won(color)
+
+
+class TestBoardCopy:
+    @pytest.mark.parametrize(
+        "clone",
+        [
+            Board.copy,
+            copy.deepcopy,
+            lambda board: pickle.loads(pickle.dumps(board)),
+        ],
+    )
+    @pytest.mark.parametrize("union_find", [UnionFind, IndexedUnionFind])
+    def test_clone_is_independent(self, clone, union_find):
+        board = played_board(union_find=union_find)
+        before = str(board)
+        cloned = clone(board)
+        assert_same_board(cloned, board)
+        assert type(cloned.red_conn_comp) is union_find
+
+        cloned.place_stone(*cloned.random_move(random.Random(1)), Color.Red)
+        assert str(board) == before
+        # the undo log is copied too
+        while cloned._undo_log:
+            cloned.undo()
+        assert_same_board(cloned, Board.create(dim_x=7, dim_y=7))
+        assert str(board) == before
+
+    def test_clone_plays_on(self):
+        board = played_board(moves=10)
+        cloned = board.copy()
+        rng = random.Random(3)
+        color = Color.Red
+        while board.empty_positions:
+            move = board.random_move(rng)
+            board.place_stone(*move, color)
+            cloned.place_stone(*move, color)
+            color = color.opponent
+            assert_same_board(cloned, board)
+
+    def test_clone_after_first_move_keeps_swap(self):
+        board = played_board(moves=1)
+        x, y = board._undo_log[0][:2]
+        cloned = pickle.loads(pickle.dumps(board))
+        assert cloned.swap_available
+        cloned.place_stone(x, y, Color.Blue)
+        board.place_stone(x, y, Color.Blue)
+        assert_same_board(cloned, board)
+        for node in board.red_conn_comp:
+            assert cloned.red_conn_comp.find(node) == board.red_conn_comp.find(node)
+
+    def test_pickle_is_compact(self):
+        board = played_board(size=11, moves=60)
+        state = board.__getstate__()
+        assert state["colors"] == bytes(
+            board[x, y].color.value for y in range(11) for x in range(11)
+        )
+        assert isinstance(state["undo_log"], array)
+
+    def test_instrumentation_wrappers_not_copied(self):
+        board = played_board()
+        board._update_conn_comp = lambda *args: None
+        assert "_update_conn_comp" not in board.copy().__dict__
@@ -0,0 +1,69 @@
+from hexgame.board import Board
+from hexgame.color import Color
+import pytest
+
+np = pytest.importorskip("numpy")
+from hexgame.boardbatch import BoardBatch  # noqa: E402
+
+
+def to_board(batch: BoardBatch, k: int) -> Board:
+    board = Board.create(dim_x=batch.dim_x, dim_y=batch.dim_y)
+    for x in range(batch.dim_x):
+        for y in range(batch.dim_y):
+            if batch.cells[k, x, y]:
+                board.place_stone(x, y, Color(int(batch.cells[k, x, y])))
+    return board
+
+
+class TestBoardBatch:
+    def test_place_stones_and_legal_moves(self):
+        batch = BoardBatch(3, dim_x=3, dim_y=3)
+        batch.place_stones([0, 1, 2], [0, 1, 2])
+        assert batch.cells[1, 1, 1] == Color.Red.value
+        assert (batch.to_move == Color.Blue.value).all()
+        # the swap rule makes every cell legal on the second move
+        assert batch.legal_moves_mask().all()
+        batch.place_stones([1], [1], boards=[1])
+        assert batch.cells[1, 1, 1] == Color.Blue.value
+        assert batch.legal_moves_mask()[1].sum() == 8
+        with pytest.raises(ValueError):
+            batch.place_stones([1], [1], boards=[1])
+        with pytest.raises(ValueError):
+            batch.place_stones([3], [0], boards=[0])
+
+    def test_winners(self):
+        batch = BoardBatch(3, dim_x=3, dim_y=3)
+        for y in range(3):
+            batch.place_stones([0], [y], colors=[Color.Red.value], boards=[0])
+        for x, y in [(0, 0), (1, 1), (2, 2)]:
+            batch.place_stones([x], [y], colors=[Color.Blue.value], boards=[1])
+        for x, y in [(0, 1), (1, 1), (2, 1)]:
+            batch.place_stones([x], [y], colors=[Color.Red.value], boards=[2])
+        assert batch.winners().tolist() == [
+            Color.Red.value,
+            Color.Blue.value,
+            Color.Empty.value,
+        ]
+
+    @pytest.mark.parametrize("dims", [(5, 5), (4, 6)])
+    def test_random_fill_agrees_with_board(self, dims: tuple[int, int]):
+        rng = np.random.default_rng(0)
+        batch = BoardBatch(40, dim_x=dims[0], dim_y=dims[1])
+        batch.place_stones(*batch.random_moves(rng))
+        winners = batch.random_fill(rng)
+        assert (batch.cells != 0).all()
+        assert (batch.moves_made == dims[0] * dims[1]).all()
+        for k in range(len(batch)):
+            board = to_board(batch, k)
+            assert board._has_color_won(Color(int(winners[k])))
+            assert not board._has_color_won(Color(int(winners[k])).opponent)
+
+    def test_random_games(self):
+        rng = np.random.default_rng(1)
+        batch = BoardBatch(20, dim_x=4, dim_y=4, swap_rule_allowed=False)
+        winners = batch.winners()
+        while (winners == Color.Empty.value).any():
+            winners = batch.step_random(rng)
+        for k in range(len(batch)):
+            board = to_board(batch, k)
+            assert board._has_color_won(Color(int(winners[k])))
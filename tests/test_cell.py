@@ -0,0 +1,51 @@
+from hexgame.board import Board
+from hexgame.cell import Cell, cell_table
+from hexgame.color import Color
+import copy
+import pickle
+import pytest
+
+
+class TestCell:
+    def test_cells_are_interned(self):
+        assert Cell(1, 2) is Cell(1, 2, Color.Empty)
+        assert Cell(1, 2, Color.Red) is Cell(x=1, y=2, color=Color.Red)
+        assert Cell(1, 2, Color.Red) is not Cell(1, 2, Color.Blue)
+
+    def test_cells_are_immutable(self):
+        cell = Cell(0, 0)
+        with pytest.raises(AttributeError):
+            cell.color = Color.Red
+        assert not hasattr(cell, "__dict__")
+
+    def test_hash_and_equality(self):
+        cells = {Cell(0, 0), Cell(0, 0, Color.Red), Cell(0, 0)}
+        assert len(cells) == 2
+        assert hash(Cell(3, 4, Color.Blue)) == hash(Cell(3, 4, Color.Blue))
+        assert Cell(3, 4) != (3, 4)
+
+    def test_match(self):
+        match Cell(3, 4, Color.Blue):
+            case Cell(x, y, Color.Blue):
+                assert (x, y) == (3, 4)
+            case _:
+                pytest.fail("Cell did not match")
+
+    def test_copy_and_pickle_keep_canonical_instance(self):
+        cell = Cell(2, 1, Color.Red)
+        assert copy.copy(cell) is cell
+        assert copy.deepcopy([cell])[0] is cell
+        assert pickle.loads(pickle.dumps(cell)) is cell
+
+    def test_cell_table(self):
+        table = cell_table(3, 2)
+        assert table is cell_table(3, 2)
+        assert table[Color.Blue.value][1 * 3 + 2] is Cell(2, 1, Color.Blue)
+
+    def test_board_reuses_cells(self):
+        board_1 = Board.create(dim_x=3, dim_y=3)
+        board_2 = Board.create(dim_x=3, dim_y=3)
+        board_1.place_stone(1, 2, Color.Red)
+        board_2.place_stone(1, 2, Color.Red)
+        assert board_1[1, 2] is board_2[1, 2]
+        assert board_1[0, 0] is board_2[0, 0]
@@ -0,0 +1,139 @@
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.player import Player
+from hexgame.record import GameRecord
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+from hexgame.dataset import (  # noqa: E402
+    PLANES,
+    Dataset,
+    DatasetWriter,
+    augment,
+    export_records,
+    game_arrays,
+    position_board,
+)
+from hexgame.symmetry import symmetric_variants  # noqa: E402
+
+
+def records(n_games, size=5, seed=0) -> list[GameRecord]:
+    rng = random.Random(seed)
+    result = []
+    for _ in range(n_games):
+        game = Game(
+            board=Board.create(dim_x=size, dim_y=size),
+            player_1=Player(Color.Red, rng=rng),
+            player_2=Player(Color.Blue, rng=rng),
+        )
+        game.run()
+        result.append(GameRecord.from_game(game))
+    return result
+
+
+class TestGameArrays:
+    def test_positions_match_replay(self):
+        record = records(1)[0]
+        planes, moves, winners = game_arrays(record)
+        assert planes.shape == (len(record.moves), len(PLANES), 5, 5)
+        board = Board.create(dim_x=5, dim_y=5)
+        for k, (x, y, color) in enumerate(record.iter_moves()):
+            for i in range(5):
+                for j in range(5):
+                    cell = board[i, j].color
+                    assert planes[k, 0, i, j] == (cell == Color.Red)
+                    assert planes[k, 1, i, j] == (cell == Color.Blue)
+                    assert planes[k, 2, i, j] == (cell == Color.Empty)
+            assert (planes[k, 3] == (color == Color.Red)).all()
+            assert moves[k] == y * 5 + x
+            board.place_stone(x, y, color)
+        assert (winners == record.winner.value).all()
+
+    def test_winner_from_board(self):
+        record = records(1)[0]
+        _, _, winners = game_arrays(record._replace(winner=None))
+        assert (winners == record.winner.value).all()
+
+    def test_position_board(self):
+        record = records(1)[0]
+        planes, _, _ = game_arrays(record)
+        board = position_board(planes[-1])
+        x, y = record.moves[-1]
+        board.place_stone(x, y, record.winner)
+        assert str(board) == str(record.final_board())
+
+
+class TestAugment:
+    def test_matches_symmetric_variants(self):
+        record = records(1)[0]
+        planes, moves, winners = game_arrays(record)
+        k = 6
+        board = position_board(planes[k])
+        move = (int(moves[k]) % 5, int(moves[k]) // 5)
+        variants = list(symmetric_variants(board, move))
+        augmented = list(
+            augment(planes[k : k + 1], moves[k : k + 1], winners[k : k + 1])
+        )
+        assert len(augmented) == len(variants) == 4
+        for variant, (a_planes, a_moves, a_winners) in zip(variants, augmented):
+            colors = [Color.Red, Color.Blue, Color.Empty]
+            for index, color in enumerate(variant.colors):
+                x, y = index % 5, index // 5
+                plane = colors.index(color)
+                assert a_planes[0, plane, x, y] == 1
+            assert (a_planes[0, 3] == (variant.to_move == Color.Red)).all()
+            assert a_moves[0] == variant.move[1] * 5 + variant.move[0]
+            winner = record.winner
+            if variant.transform.swaps_colors:
+                winner = winner.opponent
+            assert a_winners[0] == winner.value
+
+    def test_leaves_input_alone(self):
+        planes, moves, winners = game_arrays(records(1)[0])
+        before = planes.copy()
+        for _ in augment(planes, moves, winners):
+            pass
+        assert (planes == before).all()
+
+
+class TestDataset:
+    def test_shards_round_trip(self, tmp_path):
+        games = records(20)
+        expected = [np.concatenate(arrays) for arrays in zip(*map(game_arrays, games))]
+        n = export_records(games, str(tmp_path), shard_size=64)
+        assert n == len(expected[1])
+
+        dataset = Dataset(str(tmp_path))
+        assert len(dataset) == n
+        assert len(dataset.shards) == -(-n // 64)
+        assert isinstance(dataset.shards[0][0], np.memmap)
+        for got, want in zip(dataset[:], expected):
+            assert (got == want).all()
+        for got, want in zip(dataset[60:70], expected):
+            assert (got == want[60:70]).all()
+        planes, move, winner = dataset[-1]
+        assert (planes == expected[0][-1]).all()
+        assert move == expected[1][-1] and winner == expected[2][-1]
+
+    def test_append_shards(self, tmp_path):
+        games = records(4)
+        for game in games:
+            with DatasetWriter(str(tmp_path), 5, 5) as writer:
+                writer.add_record(game)
+        dataset = Dataset(str(tmp_path))
+        assert len(dataset.shards) == 4
+        assert len(dataset) == sum(len(game.moves) for game in games)
+
+    def test_board_size_mismatch(self, tmp_path):
+        writer = DatasetWriter(str(tmp_path), 7, 7)
+        with pytest.raises(ValueError):
+            writer.add_record(records(1)[0])
+
+    def test_out_of_range(self, tmp_path):
+        export_records(records(1), str(tmp_path))
+        dataset = Dataset(str(tmp_path))
+        with pytest.raises(IndexError):
+            dataset[len(dataset)]
+        assert len(dataset[len(dataset) :][1]) == 0
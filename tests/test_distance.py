@@ -0,0 +1,74 @@
+from hexgame.bitboard import BitBoard
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.distance import UNREACHABLE, ConnectionDistance
+import random
+import pytest
+
+
+def assert_in_step(board: Board, distances: ConnectionDistance):
+    fresh = ConnectionDistance(board)
+    for color in (Color.Red, Color.Blue):
+        assert distances.distance(color) == fresh.distance(color)
+        assert distances.distances_after_move(color) == fresh.distances_after_move(
+            color
+        )
+
+
+class TestConnectionDistance:
+    def test_empty_board(self):
+        distances = ConnectionDistance(Board.create(dim_x=4, dim_y=3))
+        assert distances.distance(Color.Red) == 3
+        assert distances.distance(Color.Blue) == 4
+        assert distances.evaluate(Color.Red) == 1.0
+
+    def test_stones(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        board.place_stone(1, 1, Color.Red)
+        board.place_stone(1, 2, Color.Red)
+        distances = ConnectionDistance(board)
+        assert distances.distance(Color.Red) == 2
+        # blue has to go around the red stones
+        assert distances.distance(Color.Blue) == 4
+
+    def test_blocked(self):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        for x in range(3):
+            board.place_stone(x, 1, Color.Blue)
+        distances = ConnectionDistance(board)
+        assert distances.distance(Color.Red) == UNREACHABLE
+        assert distances.distances_after_move(Color.Red)[0] == UNREACHABLE
+        # capped to one more than the cells of the board
+        assert distances.evaluate(Color.Blue) == 10.0
+
+    def test_distances_after_move(self):
+        board = Board.create(dim_x=5, dim_y=5, swap_rule_allowed=False)
+        board.place_stone(2, 1, Color.Red)
+        board.place_stone(2, 2, Color.Blue)
+        distances = ConnectionDistance(board)
+        after = distances.distances_after_move(Color.Red)
+        for x, y in board.empty_positions:
+            with board.probe_stone(x, y, Color.Red):
+                expected = ConnectionDistance(board).distance(Color.Red)
+            assert after[y * 5 + x] == expected
+
+    @pytest.mark.parametrize("board_type", [Board.create, BitBoard])
+    def test_updates_follow_moves_undo_and_swap(self, board_type):
+        rng = random.Random(7)
+        for _ in range(20):
+            board = board_type(dim_x=rng.randint(2, 6), dim_y=rng.randint(2, 6))
+            distances = ConnectionDistance(board)
+            played = []
+            color = Color.Red
+            while board.number_of_empty_positions:
+                move = board.random_move(rng)
+                board.place_stone(*move, color)
+                distances.update(move)
+                played.append(move)
+                color = color.opponent
+                assert_in_step(board, distances)
+                if rng.random() < 0.3:
+                    board.undo()
+                    distances.update(played.pop())
+                    color = color.opponent
+                    assert_in_step(board, distances)
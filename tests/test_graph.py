@@ -0,0 +1,77 @@
+from hexgame.board import neighbour_table
+from hexgame.graph import Graph
+from hexgame.unionfind import IndexedUnionFind, UnionFind
+import pytest
+
+
+class TestGraph:
+    def test_default_adjacency_is_not_shared(self):
+        first = Graph()
+        first.add_edge("a", "b")
+        assert len(Graph()) == 0
+
+    @pytest.mark.parametrize("union_find", [UnionFind, IndexedUnionFind])
+    def test_add_edge_updates_components(self, union_find: type[UnionFind]):
+        gph = Graph({"a": [], "b": [], "c": []}, union_find=union_find)
+        assert len(gph.conn_comps) == 3
+        gph.add_edge("a", "b")
+        assert len(gph.conn_comps) == 2
+        assert gph.neighbours("a") == ["b"]
+        assert gph.neighbours("b") == ["a"]
+        # new nodes come with their edge
+        gph.add_edge("c", "d")
+        assert "d" in gph
+        assert len(gph.conn_comps) == 2
+        gph.add_edge("d", "a")
+        assert len(gph.conn_comps) == 1
+        # an edge already there is not added twice
+        gph.add_edge("b", "a")
+        assert gph.neighbours("a") == ["b", "d"]
+
+    def test_add_edges_matches_recomputing(self):
+        dim = 6
+        edges = [
+            (index, nbr)
+            for index, nbrs in enumerate(neighbour_table(dim, dim))
+            for nbr in nbrs
+            if index < nbr and index % 3 != 0
+        ]
+        gph = Graph({index: [] for index in range(dim * dim)})
+        gph.add_edges(edges)
+        fresh = gph.get_conn_comps()
+        assert len(gph.conn_comps) == len(fresh)
+        for index in range(dim * dim):
+            for nbr in gph.neighbours(index):
+                assert gph.conn_comps.find(index) == gph.conn_comps.find(nbr)
+
+    def test_add_edges_skips_duplicates(self):
+        gph = Graph({"a": ["b"], "b": ["a"]})
+        gph.add_edges([("a", "b"), ("b", "a"), ("b", "c"), ("c", "b"), ("b", "c")])
+        assert gph.neighbours("a") == ["b"]
+        assert gph.neighbours("b") == ["a", "c"]
+        assert gph.neighbours("c") == ["b"]
+
+    def test_asymmetric_adjacency(self):
+        gph = Graph({"a": ["b"], "b": [], "c": ["d"]})
+        assert gph.neighbours("b") == ["a"]
+        assert gph.neighbours("d") == ["c"]
+        gph.add_edge("b", "a")
+        assert gph.neighbours("a") == ["b"]
+        assert gph.neighbours("b") == ["a"]
+        assert gph.conn_comps.find("c") == gph.conn_comps.find("d")
+
+    def test_get_conn_comps_counts_each_edge_once(self):
+        gph = Graph({"a": ["b", "c"], "b": ["a", "d"], "c": ["a"], "d": ["b"], "e": []})
+        conn_comps = gph.get_conn_comps()
+        assert len(conn_comps) == 2
+        assert conn_comps.find("c") == conn_comps.find("d")
+
+    def test_update_graph(self):
+        gph = Graph({"a": ["b"], "b": ["a"], "c": []})
+        gph.update_graph("a", ["b", "c"])
+        assert gph.neighbours("a") == ["b", "c"]
+        assert gph.neighbours("c") == ["a"]
+        assert len(gph.conn_comps) == 1
+        gph.update_graph("e", [])
+        assert "e" in gph
+        assert len(gph.conn_comps) == 2
@@ -0,0 +1,81 @@
+from hexgame.bitboard import BitBoard
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.instrumentation import PHASES, Instrumentation
+from hexgame.player import Player
+from hexgame.unionfind import IndexedUnionFind
+import io
+import json
+import random
+import pytest
+
+
+def play(board, instrumentation, mode=Player.PlayerMode.AI) -> Game:
+    game = Game(
+        board=board,
+        player_1=Player(Color.Red, rng=random.Random(1)),
+        player_2=Player(Color.Blue, mode=mode, playouts=20, rng=random.Random(2)),
+        instrumentation=instrumentation,
+    )
+    game.run()
+    return game
+
+
+class TestInstrumentation:
+    @pytest.mark.parametrize(
+        "board_type",
+        [
+            Board.create,
+            lambda **dims: Board.create(**dims, union_find=IndexedUnionFind),
+            BitBoard,
+        ],
+    )
+    def test_one_event_per_move(self, board_type):
+        instrumentation = Instrumentation()
+        board = board_type(dim_x=5, dim_y=5)
+        play(board, instrumentation)
+        events = instrumentation.events
+        assert len(events) == board._number_of_moves_made
+        assert [event.move for event in events] == list(range(len(events)))
+        for event in events:
+            assert event.decide_s >= 0
+            assert event.connectivity_s >= 0
+            assert event.total_s >= event.decide_s
+        summary = instrumentation.summary()
+        assert summary["moves"] == len(events)
+        assert set(summary["phases"]) == set(PHASES)
+        assert summary["latency_p50_s"] <= summary["latency_p95_s"]
+
+    def test_union_find_counts_only_the_moves_played(self):
+        instrumentation = Instrumentation()
+        board = Board.create(dim_x=5, dim_y=5)
+        play(board, instrumentation, mode=Player.PlayerMode.MCTS)
+        summary = instrumentation.summary()
+        # every move joins at most its six neighbours and two borders
+        assert 0 < summary["unions"] <= 8 * summary["moves"]
+        assert summary["finds"] >= 2 * summary["unions"]
+        blue_moves = sum(e.color == Color.Blue for e in instrumentation.events)
+        assert 0 < summary["nodes"] <= 21 * blue_moves
+        assert summary["phases"]["connectivity"]["total_s"] > 0
+
+    def test_json_lines(self):
+        stream = io.StringIO()
+        instrumentation = Instrumentation(stream=stream)
+        play(Board.create(dim_x=4, dim_y=4), instrumentation)
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == len(instrumentation.events)
+        first = json.loads(lines[0])
+        assert first["move"] == 0
+        assert first["color"] == "Red"
+        dumped = io.StringIO()
+        instrumentation.write_jsonl(dumped)
+        assert dumped.getvalue() == stream.getvalue()
+
+    def test_detach(self):
+        instrumentation = Instrumentation()
+        board = Board.create(dim_x=3, dim_y=3)
+        instrumentation.attach(board)
+        instrumentation.detach(board)
+        assert "find" not in vars(board.red_conn_comp)
+        assert "_update_conn_comp" not in vars(board)
@@ -0,0 +1,62 @@
+from hexgame.bitboard import BitBoard
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.mcts import MCTS
+from hexgame.player import Player
+import random
+import pytest
+
+
+class TestMCTS:
+    @pytest.mark.parametrize("board_type", ["board", "bitboard"])
+    def test_plays_winning_move(self, board_type: str):
+        if board_type == "board":
+            board = Board.create(dim_x=4, dim_y=4)
+        else:
+            board = BitBoard(dim_x=4, dim_y=4)
+        for x, y, color in [
+            (1, 0, Color.Red),
+            (0, 0, Color.Blue),
+            (1, 1, Color.Red),
+            (3, 3, Color.Blue),
+            (1, 2, Color.Red),
+            (3, 0, Color.Blue),
+        ]:
+            board.place_stone(x, y, color)
+        before = str(board)
+        search = MCTS(playouts=300, rng=random.Random(0))
+        assert search.search(board, Color.Red) in [(1, 3), (2, 3)]
+        # the board is left as it was found
+        assert str(board) == before
+        assert board._number_of_moves_made == 6
+
+    def test_stats(self):
+        board = Board.create(dim_x=5, dim_y=5)
+        search = MCTS(playouts=50, rng=random.Random(1))
+        search.search(board, Color.Red)
+        assert search.stats.playouts == 50
+        assert search.stats.nodes == 51
+        assert search.stats.playouts_per_second > 0
+
+    def test_time_limit(self):
+        board = Board.create(dim_x=5, dim_y=5)
+        search = MCTS(playouts=None, time_limit=0.05)
+        move = search.search(board, Color.Blue)
+        assert board.has_cell(move)
+        assert search.stats.seconds < 1
+
+    def test_needs_a_budget(self):
+        with pytest.raises(ValueError):
+            MCTS(playouts=None, time_limit=None)
+
+    def test_mcts_player_in_game(self):
+        random.seed(5)
+        board = Board.create(dim_x=4, dim_y=4)
+        player_1 = Player(mode=Player.PlayerMode.MCTS, playouts=50)
+        player_2 = Player(Color.Blue)
+        game = Game(board=board, player_1=player_1, player_2=player_2)
+        while game.status == Game.GameStatus.Running:
+            game._play()
+        assert board._has_color_won(game.current_player.color)
+        assert player_1.last_search_stats.playouts == 50
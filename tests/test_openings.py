@@ -0,0 +1,132 @@
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.openings import OpeningBook, OpeningStats, main
+from hexgame.player import Player
+from hexgame.record import GameRecord, RecordWriter
+from hexgame.symmetry import Transform, transform_cell
+import pickle
+import random
+import pytest
+
+
+def random_records(n_games, size=5, seed=0) -> list[GameRecord]:
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n_games):
+        game = Game(
+            board=Board.create(dim_x=size, dim_y=size),
+            player_1=Player(Color.Red, rng=rng),
+            player_2=Player(Color.Blue, rng=rng),
+        )
+        game.run()
+        records.append(GameRecord.from_game(game))
+    return records
+
+
+def fixed_record(moves, winner) -> GameRecord:
+    return GameRecord(5, 5, False, Color.Red, moves, winner)
+
+
+@pytest.fixture
+def book_path(tmp_path):
+    stats = OpeningStats(5, 5, plies=2)
+    for _ in range(3):
+        stats.add_record(fixed_record([(2, 2), (1, 3), (0, 0)], Color.Red))
+    stats.add_record(fixed_record([(2, 2), (3, 1), (0, 0)], Color.Blue))
+    stats.add_record(fixed_record([(0, 1), (2, 2), (0, 0)], Color.Blue))
+    path = str(tmp_path / "book.hexb")
+    stats.write(path)
+    return path
+
+
+class TestOpeningStats:
+    def test_counts_first_plies(self):
+        stats = OpeningStats(5, 5, plies=3)
+        records = random_records(50)
+        stats.add_records(records)
+        assert stats.games == 50
+        visits = sum(counts[0] for counts in stats._counts.values())
+        assert visits == sum(min(3, len(record.moves)) for record in records)
+
+    def test_size_mismatch(self):
+        with pytest.raises(ValueError):
+            OpeningStats(7, 7).add_record(random_records(1)[0])
+
+
+class TestOpeningBook:
+    def test_lookup(self, book_path):
+        with OpeningBook(book_path, min_visits=1) as book:
+            board = Board.create(dim_x=5, dim_y=5, swap_rule_allowed=False)
+            moves = book.lookup(board)
+            assert [(move.x, move.y) for move in moves][0] == (2, 2)
+            assert moves[0].visits == 4 and moves[0].wins == 3
+            board.place_stone(2, 2, Color.Red)
+            moves = book.lookup(board)
+            # (1, 3) and (3, 1) are the same move up to the rotation
+            assert sum(move.visits for move in moves) == 4
+            assert book.best_move(board) in [(1, 3), (3, 1)]
+            board.place_stone(1, 3, Color.Blue)
+            # beyond the plies of the book
+            assert book.lookup(board) == []
+
+    def test_symmetric_position(self, book_path):
+        with OpeningBook(book_path, min_visits=1) as book:
+            board = Board.create(dim_x=5, dim_y=5, swap_rule_allowed=False)
+            x, y = transform_cell(Transform.Rotate180, (0, 1), 5, 5)
+            board.place_stone(x, y, Color.Red)
+            moves = book.lookup(board)
+            assert len(moves) == 1
+            assert (moves[0].x, moves[0].y) == (2, 2)
+
+    def test_min_visits(self, book_path):
+        with OpeningBook(book_path, min_visits=5) as book:
+            board = Board.create(dim_x=5, dim_y=5, swap_rule_allowed=False)
+            assert book.lookup(board)
+            assert book.best_move(board) is None
+
+    def test_unknown_positions(self, book_path):
+        with OpeningBook(book_path, min_visits=1) as book:
+            assert book.lookup(Board.create(dim_x=7, dim_y=7)) == []
+            board = Board.create(dim_x=5, dim_y=5, swap_rule_allowed=False)
+            board.place_stone(4, 4, Color.Red)
+            assert book.best_move(board) is None
+
+    def test_pickle(self, book_path):
+        book = OpeningBook(book_path, min_visits=2)
+        clone = pickle.loads(pickle.dumps(book))
+        assert len(clone) == len(book) and clone.min_visits == 2
+        book.close()
+        clone.close()
+
+    def test_not_a_book(self, tmp_path):
+        path = tmp_path / "nope"
+        path.write_bytes(b"not a book at all, really not")
+        with pytest.raises(ValueError):
+            OpeningBook(str(path))
+
+
+class TestPlayerBook:
+    def test_player_follows_book(self, book_path):
+        book = OpeningBook(book_path, min_visits=1)
+        player = Player(Color.Red, rng=random.Random(0), opening_book=book)
+        board = Board.create(dim_x=5, dim_y=5, swap_rule_allowed=False)
+        assert player.play(board) == (2, 2, Color.Red)
+        board.place_stone(4, 4, Color.Red)
+        board.place_stone(0, 0, Color.Blue)
+        # out of the book, back to the random policy
+        assert board.is_empty_position(player.play(board)[:2])
+        book.close()
+
+
+class TestMain:
+    def test_builds_book_from_records(self, tmp_path):
+        records_path = str(tmp_path / "games.hexr")
+        with RecordWriter.open(records_path) as writer:
+            for record in random_records(30):
+                writer.write(record)
+        book_path = str(tmp_path / "book.hexb")
+        assert main([records_path, "--output", book_path, "--plies", "2"]) == 0
+        with OpeningBook(book_path, min_visits=1) as book:
+            assert book.plies == 2
+            assert book.lookup(Board.create(dim_x=5, dim_y=5))
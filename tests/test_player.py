@@ -0,0 +1,25 @@
+from hexgame.bitboard import BitBoard
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.player import Player
+import pytest
+
+
+class TestPlayer:
+    @pytest.mark.parametrize("board_type", [Board.create, BitBoard])
+    def test_random_policy_plays_legal_moves(self, board_type):
+        board = board_type(dim_x=3, dim_y=3)
+        players = [Player(), Player(Color.Blue)]
+        for move in range(9):
+            i, j, color = players[move % 2].play(board)
+            assert board.is_legal_move((i, j))
+            board.place_stone(i, j, color)
+        assert board.number_of_empty_positions <= 1
+
+    def test_keyboard_rejects_illegal_moves(self, monkeypatch):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        board.place_stone(1, 1, Color.Red)
+        inputs = iter(["1", "1", "5", "0", "x", "0", "2"])
+        monkeypatch.setattr("builtins.input", lambda: next(inputs))
+        player = Player(Color.Blue, mode=Player.PlayerMode.Keyboard)
+        assert player.play(board) == (0, 2, Color.Blue)
@@ -0,0 +1,43 @@
+from hexgame.bitboard import BitBoard
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.playout import random_playout
+import random
+import pytest
+
+
+class TestRandomPlayout:
+    @pytest.mark.parametrize("dims", [(3, 3), (5, 4), (11, 11)])
+    @pytest.mark.parametrize("to_move", [Color.Red, Color.Blue])
+    def test_winner_matches_final_board(self, dims: tuple[int, int], to_move: Color):
+        rng = random.Random(4)
+        for _ in range(10):
+            board = Board.create(dim_x=dims[0], dim_y=dims[1])
+            board.place_stone(1, 1, to_move.opponent)
+            before = str(board)
+            winner, final_board = random_playout(board, to_move, rng, return_board=True)
+            assert str(board) == before
+            assert final_board.empty_positions == []
+            assert final_board._has_color_won(winner)
+            assert not final_board._has_color_won(winner.opponent)
+
+    def test_seeded_playouts_are_reproducible(self):
+        board = Board.create(dim_x=7, dim_y=7)
+        winners_1 = [
+            random_playout(board, Color.Red, random.Random(s)) for s in range(20)
+        ]
+        winners_2 = [
+            random_playout(board, Color.Red, random.Random(s)) for s in range(20)
+        ]
+        assert winners_1 == winners_2
+
+    def test_decided_position(self):
+        board = BitBoard(dim_x=3, dim_y=3)
+        for x, y in [(0, 0), (1, 0), (2, 0)]:
+            board.place_stone(x, y, Color.Blue)
+        for _ in range(10):
+            assert random_playout(board, Color.Red) == Color.Blue
+
+    def test_empty_board(self):
+        board = Board.create(dim_x=0, dim_y=0)
+        assert random_playout(board, Color.Red) == Color.Blue
@@ -0,0 +1,104 @@
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.game import Game
+from hexgame.player import Player
+from hexgame.record import (
+    MAGIC,
+    GameRecord,
+    RecordWriter,
+    encode_record,
+    iter_records,
+    read_records,
+)
+import io
+import random
+import pytest
+
+
+def play(size=5, seed=0) -> Game:
+    rng = random.Random(seed)
+    game = Game(
+        board=Board.create(dim_x=size, dim_y=size),
+        player_1=Player(Color.Red, rng=rng),
+        player_2=Player(Color.Blue, rng=rng),
+    )
+    game.run()
+    return game
+
+
+class TestGameHistory:
+    def test_history_replays_to_board(self):
+        game = play()
+        assert len(game.history) == game.board._number_of_moves_made
+        board = Board.create(dim_x=5, dim_y=5)
+        for i, j, color in game.history:
+            board.place_stone(i, j, color)
+        assert str(board) == str(game.board)
+
+    def test_winner(self):
+        game = play()
+        assert game.winner == game.history[-1][2]
+        assert game.board._has_color_won(game.winner)
+
+
+class TestRecord:
+    def test_round_trip(self):
+        games = [play(size, seed) for size, seed in [(5, 0), (7, 1), (11, 2)]]
+        stream = io.BytesIO()
+        writer = RecordWriter(stream)
+        for game in games:
+            writer.write_game(game)
+        assert writer.records == 3
+
+        stream.seek(0)
+        records = list(read_records(stream))
+        assert len(records) == 3
+        for game, record in zip(games, records):
+            assert record.dim_x == game.board.dim_x
+            assert record.winner == game.winner
+            assert list(record.iter_moves()) == game.history
+            assert str(record.final_board()) == str(game.board)
+
+    def test_one_byte_per_move(self):
+        game = play(size=11)
+        data = encode_record(GameRecord.from_game(game))
+        assert len(data) == 4 + len(game.history)
+        assert len(data) < len(str(game.board))
+
+    def test_large_board_indices(self):
+        record = GameRecord(19, 19, False, Color.Blue, [(18, 18), (0, 0)], None)
+        stream = io.BytesIO(MAGIC + encode_record(record))
+        assert list(read_records(stream)) == [record]
+
+    def test_replay_is_lazy(self):
+        record = GameRecord.from_game(play())
+        replay = record.replay()
+        board = next(replay)
+        assert board._number_of_moves_made == 1
+        x, y = record.moves[0]
+        assert board[x, y].color == record.first_color
+        assert sum(1 for _ in replay) == len(record.moves) - 1
+
+    def test_append_to_file(self, tmp_path):
+        path = str(tmp_path / "games.hexr")
+        for seed in range(2):
+            with RecordWriter.open(path) as writer:
+                writer.write_game(play(seed=seed))
+        with open(path, "rb") as stream:
+            assert stream.read().count(MAGIC) == 1
+        assert [record.moves for record in iter_records(path)] == [
+            GameRecord.from_game(play(seed=seed)).moves for seed in range(2)
+        ]
+
+    def test_moves_out_of_turn(self):
+        game = play()
+        game.history.append(game.history[-1])
+        with pytest.raises(ValueError):
+            GameRecord.from_game(game)
+
+    def test_bad_stream(self):
+        with pytest.raises(ValueError):
+            list(read_records(io.BytesIO(b"nope!")))
+        truncated = MAGIC + encode_record(GameRecord.from_game(play()))[:-1]
+        with pytest.raises(ValueError):
+            list(read_records(io.BytesIO(truncated)))
@@ -0,0 +1,56 @@
+from hexgame.board import Board
+from hexgame.color import Color
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+from hexgame.resistance import (  # noqa: E402
+    ResistanceNetwork,
+    evaluate,
+    evaluate_moves,
+)
+
+
+class TestResistance:
+    def test_empty_board_is_symmetric(self):
+        board = Board.create(dim_x=5, dim_y=5)
+        red = ResistanceNetwork(board, Color.Red).resistance
+        blue = ResistanceNetwork(board, Color.Blue).resistance
+        assert red == pytest.approx(blue)
+        assert evaluate(board, Color.Red) == pytest.approx(0.0, abs=1e-9)
+
+    def test_chain_is_a_short_circuit(self):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        for y in range(3):
+            board.place_stone(1, y, Color.Red)
+        assert ResistanceNetwork(board, Color.Red).resistance < 0.01
+        # blue is cut off
+        assert ResistanceNetwork(board, Color.Blue).resistance > 1e3
+        assert evaluate(board, Color.Red) > 0
+        assert evaluate(board, Color.Blue) < 0
+
+    def test_stones_lower_the_resistance(self):
+        board = Board.create(dim_x=5, dim_y=5, swap_rule_allowed=False)
+        before = ResistanceNetwork(board, Color.Red).resistance
+        board.place_stone(2, 2, Color.Red)
+        assert ResistanceNetwork(board, Color.Red).resistance < before
+
+    def test_batched_moves_match_placing_them(self):
+        board = Board.create(dim_x=6, dim_y=6, swap_rule_allowed=False)
+        rng = random.Random(5)
+        color = Color.Red
+        for _ in range(10):
+            board.place_stone(*board.random_move(rng), color)
+            color = color.opponent
+        moves = board.empty_positions
+        batched = evaluate_moves(board, Color.Blue, moves)
+        for move, value in zip(moves, batched):
+            with board.probe_stone(*move, Color.Blue):
+                assert value == pytest.approx(evaluate(board, Color.Blue), abs=1e-8)
+
+    def test_occupied_cells_are_rejected(self):
+        board = Board.create(dim_x=3, dim_y=3)
+        board.place_stone(1, 1, Color.Red)
+        with pytest.raises(ValueError):
+            evaluate_moves(board, Color.Blue, [(1, 1)])
@@ -0,0 +1,158 @@
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.player import Player
+from hexgame.server import (
+    ExecutorPlayer,
+    GameServer,
+    GameSession,
+    opponent_factory,
+    parse_move,
+)
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import json
+import random
+import pytest
+
+
+def random_player(color, seed=0, executor=None) -> ExecutorPlayer:
+    return ExecutorPlayer(Player(color, rng=random.Random(seed)), executor)
+
+
+class SlowPlayer:
+    def __init__(self, color):
+        self.color = color
+
+    async def play(self, board):
+        await asyncio.sleep(10)
+
+    async def notify(self, event):
+        pass
+
+
+class TestGameSession:
+    def test_plays_to_the_end(self):
+        session = GameSession(
+            Board.create(dim_x=5, dim_y=5),
+            random_player(Color.Red, 1),
+            random_player(Color.Blue, 2),
+        )
+        result = asyncio.run(session.run())
+        assert result.reason == "connected"
+        assert result.moves == len(session.game.history)
+        assert session.game.board._has_color_won(result.winner)
+
+    def test_many_concurrent_sessions(self):
+        async def main():
+            sessions = [
+                GameSession(
+                    Board.create(dim_x=5, dim_y=5),
+                    random_player(Color.Red, 2 * k),
+                    random_player(Color.Blue, 2 * k + 1),
+                    game_id=k,
+                )
+                for k in range(1000)
+            ]
+            return await asyncio.gather(*(session.run() for session in sessions))
+
+        results = asyncio.run(main())
+        assert [result.game for result in results] == list(range(1000))
+        assert all(result.winner is not None for result in results)
+
+    def test_timeout_forfeits(self):
+        session = GameSession(
+            Board.create(dim_x=5, dim_y=5),
+            random_player(Color.Red),
+            SlowPlayer(Color.Blue),
+            move_timeout=0.05,
+        )
+        result = asyncio.run(session.run())
+        assert result.reason == "timeout"
+        assert result.winner == Color.Red
+        assert result.moves == 1
+
+    @pytest.mark.parametrize("pool", [ThreadPoolExecutor, ProcessPoolExecutor])
+    def test_executor_player(self, pool):
+        with pool(2) as executor:
+            player = random_player(Color.Blue, executor=executor)
+            session = GameSession(
+                Board.create(dim_x=5, dim_y=5), random_player(Color.Red), player
+            )
+            result = asyncio.run(session.run())
+        assert result.winner is not None
+        # the random state comes back from the pool
+        assert player.player.rng.getstate() != random.Random(0).getstate()
+
+
+class TestGameServer:
+    def test_remote_client(self):
+        async def client(port, moves):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            events = []
+            while True:
+                event = json.loads(await reader.readline())
+                events.append(event)
+                if event["type"] in ("turn", "error"):
+                    x, y = moves.pop(0)
+                    writer.write(f"{x} {y}\n".encode())
+                    await writer.drain()
+                elif event["type"] == "end":
+                    writer.close()
+                    return events
+
+        async def main():
+            server = GameServer(
+                opponent_factory(Player.PlayerMode.AI, seed=0), dim_x=5, dim_y=5
+            )
+            listener = await server.start_tcp("127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+            moves = [(x, y) for y in range(5) for x in range(5)]
+            async with listener:
+                clients = [client(port, list(moves)) for _ in range(20)]
+                events = await asyncio.gather(*clients)
+                while server.active_games:
+                    await asyncio.sleep(0.01)
+            return server, events
+
+        server, events = asyncio.run(main())
+        assert len(server.results) == 20
+        for game_events in events:
+            assert game_events[0]["type"] == "start"
+            assert game_events[0]["color"] == "Red"
+            assert game_events[-1]["type"] == "end"
+            assert game_events[-1]["reason"] == "connected"
+
+    def test_disconnect_forfeits(self):
+        async def main():
+            server = GameServer(
+                opponent_factory(Player.PlayerMode.AI, seed=0),
+                dim_x=5,
+                dim_y=5,
+                human_color=Color.Blue,
+            )
+            listener = await server.start_tcp("127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+            async with listener:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                while json.loads(await reader.readline())["type"] != "turn":
+                    pass
+                writer.close()
+                while not server.results:
+                    await asyncio.sleep(0.01)
+            return server.results[0]
+
+        result = asyncio.run(main())
+        assert result.reason == "disconnected"
+        assert result.winner == Color.Red
+
+
+class TestParseMove:
+    def test_formats(self):
+        assert parse_move("3 4\n") == (3, 4)
+        assert parse_move("3,4") == (3, 4)
+        assert parse_move('{"x": 3, "y": 4}') == (3, 4)
+
+    @pytest.mark.parametrize("line", ["", "3", "a b", '{"x": 3}', "1 2 3"])
+    def test_bad_moves(self, line):
+        with pytest.raises(ValueError):
+            parse_move(line)
@@ -0,0 +1,228 @@
+import random
+
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.player import Player
+from hexgame.solver import (
+    ENTRY_BYTES,
+    INFINITY,
+    NO_MOVE,
+    SolveResult,
+    Solver,
+    SolverTable,
+    winning_cells,
+)
+import pytest
+
+
+def brute_force_wins(board: Board, color: Color, memo: dict = None) -> bool:
+    """
+    True iff color to move wins @param board, by plain minimax
+    """
+    if memo is None:
+        memo = {}
+    key = (board.zobrist_hash, color)
+    if key in memo:
+        return memo[key]
+    wins = False
+    if not board._has_color_won(color.opponent):
+        for x, y in board.possible_moves:
+            with board.probe_stone(x, y, color):
+                wins = board._has_color_won(color) or not brute_force_wins(
+                    board, color.opponent, memo
+                )
+            if wins:
+                break
+    memo[key] = wins
+    return wins
+
+
+def play(board: Board, moves: list[tuple[int, int]]) -> Color:
+    """
+    Plays @param moves alternating colors from Red, returns the side to move
+    """
+    color = Color.Red
+    for x, y in moves:
+        board.place_stone(x, y, color)
+        color = color.opponent
+    return color
+
+
+class TestSolverTable:
+    def test_size_fits_the_budget(self):
+        table = SolverTable(size_mb=1)
+        assert table.size_bytes <= 2**20
+        assert len(table) & (len(table) - 1) == 0
+        assert 2 * len(table) * ENTRY_BYTES > 2**20
+
+    def test_store_and_probe(self):
+        table = SolverTable(size_mb=0.01)
+        assert table.probe(12345) is None
+        assert table.numbers(12345) == (1, 1)
+        table.store(12345, 3, 5, 7, work=10)
+        assert table.probe(12345) == (3, 5, 7)
+        table.store(12345, 0, INFINITY, 8, work=20)
+        assert table.probe(12345) == (0, INFINITY, 8)
+        assert table.used == 1
+        table.clear()
+        assert table.probe(12345) is None
+        assert table.used == 0
+
+    def test_proven_entries_stay(self):
+        table = SolverTable(size_mb=0.01)
+        proven, unproven, other = 4, 4 + len(table), 4 + 2 * len(table)
+        table.store(proven, 0, INFINITY, 1, work=100)
+        table.store(unproven, 2, 2, 2, work=1000)
+        # the bucket is full: the unproven entry gives way
+        table.store(other, 3, 3, NO_MOVE, work=1)
+        assert table.probe(proven) == (0, INFINITY, 1)
+        assert table.probe(unproven) is None
+        assert table.probe(other) == (3, 3, NO_MOVE)
+
+
+class TestWinningCells:
+    def test_cells_joining_the_borders(self):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        board.place_stone(1, 0, Color.Red)
+        board.place_stone(1, 2, Color.Red)
+        # (1, 1) is the only cell next to both stones
+        assert winning_cells(board, Color.Red) == [4]
+        assert winning_cells(board, Color.Red, cells=[0, 2, 3, 5]) == []
+        assert winning_cells(board, Color.Blue) == []
+
+
+class TestSolver:
+    @pytest.mark.parametrize("size", [3, 4])
+    def test_first_player_wins_empty_board(self, size):
+        board = Board.create(dim_x=size, dim_y=size, swap_rule_allowed=False)
+        result = Solver(time_limit=None).solve(board, Color.Red)
+        assert result.winner == Color.Red
+        board.place_stone(*result.move, Color.Red)
+        reply = Solver(time_limit=None).solve(board, Color.Blue)
+        assert reply.winner == Color.Red
+
+    def test_immediate_win(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        color = play(board, [(1, 0), (0, 0), (1, 1), (0, 1), (1, 2), (0, 2)])
+        result = Solver().solve(board, color)
+        assert result.winner == Color.Red
+        assert result.move in [(1, 3), (2, 3)]
+        assert result.nodes == 1
+
+    def test_double_threat_loses(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        # red threatens both (1, 3) and (2, 3), blue cannot block both
+        color = play(board, [(1, 0), (3, 3), (1, 1), (3, 2), (1, 2), (3, 0)])
+        result = Solver().solve(board, color.opponent)
+        assert result.winner == Color.Red
+        result = Solver().solve(board, Color.Blue)
+        assert result.winner == Color.Red
+        assert result.move is None
+
+    def test_finished_game(self):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        color = play(board, [(0, 0), (2, 0), (0, 1), (2, 1), (0, 2)])
+        assert Solver().solve(board, color).winner == Color.Red
+        result = Solver().solve(board, Color.Red)
+        assert (result.winner, result.move) == (Color.Red, None)
+
+    def test_board_left_as_found(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=True)
+        color = play(board, [(2, 1)])
+        key = board.zobrist_hash
+        log = list(board._undo_log)
+        Solver(time_limit=None).solve(board, color)
+        assert board.zobrist_hash == key
+        assert list(board._undo_log) == log
+
+    def test_proven_positions_are_answered_at_once(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        solver = Solver(time_limit=None)
+        first = solver.solve(board, Color.Red)
+        assert first.nodes > 0
+        second = solver.solve(board, Color.Red)
+        assert second.nodes == 0
+        assert (second.winner, second.move) == (first.winner, first.move)
+
+    def test_stats(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        solver = Solver(time_limit=None, size_mb=0.5)
+        result = solver.solve(board, Color.Red)
+        assert isinstance(result, SolveResult)
+        assert solver.result is result
+        assert result.table_bytes == solver.table.size_bytes <= 2**19
+        assert 0 < result.table_used <= len(solver.table)
+        assert result.nodes_per_second > 0
+
+    def test_budget_runs_out(self):
+        board = Board.create(dim_x=7, dim_y=7, swap_rule_allowed=False)
+        result = Solver(time_limit=None, max_nodes=50).solve(board, Color.Red)
+        assert result.winner is None
+        assert result.move is None
+        assert result.nodes == 51
+        assert board.number_of_empty_positions == 49
+
+    @pytest.mark.parametrize("size_mb", [1, 0.001])
+    def test_agrees_with_brute_force(self, size_mb):
+        # the tiny table holds 32 entries, fewer than the searches need
+        rng = random.Random(7)
+        for _ in range(12):
+            dim_x, dim_y = rng.choice([(3, 3), (3, 4), (4, 3)])
+            board = Board.create(dim_x, dim_y, swap_rule_allowed=rng.random() < 0.5)
+            color = Color.Red
+            for _ in range(rng.randrange(dim_x * dim_y // 2)):
+                x, y = board.random_move(rng)
+                board.place_stone(x, y, color)
+                color = color.opponent
+                if board._has_color_won(color.opponent):
+                    break
+            result = Solver(time_limit=None, size_mb=size_mb).solve(board, color)
+            wins = brute_force_wins(board, color)
+            assert result.winner == (color if wins else color.opponent)
+            if wins:
+                with board.probe_stone(*result.move, color):
+                    assert board._has_color_won(color) or not brute_force_wins(
+                        board, color.opponent
+                    )
+
+    def test_solver_shared_across_sizes(self):
+        solver = Solver(time_limit=None)
+        assert solver.solve(Board.create(4, 4, False), Color.Red).winner == Color.Red
+        # the empty cells have no keys: only the size tells the boards apart
+        board = Board.create(dim_x=2, dim_y=4, swap_rule_allowed=False)
+        result = solver.solve(board, Color.Red)
+        assert result.nodes > 0
+        assert result.winner == Color.Blue
+        assert not brute_force_wins(board, Color.Red)
+
+    def test_side_to_move_off_turn(self):
+        board = Board.create(dim_x=3, dim_y=3, swap_rule_allowed=False)
+        solver = Solver(time_limit=None)
+        # blue moving first on the empty board wins too
+        assert solver.solve(board, Color.Blue).winner == Color.Blue
+        assert solver.solve(board, Color.Red).winner == Color.Red
+
+
+class TestPlayerSolver:
+    def test_plays_proven_move(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        color = play(board, [(1, 0), (0, 0), (1, 1), (0, 1), (1, 2), (0, 2)])
+        player = Player(color, solver=Solver())
+        assert player.play(board) in [(1, 3, Color.Red), (2, 3, Color.Red)]
+        assert player.last_search_stats.winner == Color.Red
+
+    def test_too_many_empty_cells(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        color = play(board, [(1, 0), (0, 0), (1, 1), (0, 1), (1, 2), (0, 2)])
+        player = Player(color, solver=Solver(max_empty=5), rng=random.Random(1))
+        player.play(board)
+        assert player.last_search_stats is None
+
+    def test_lost_position_falls_back_to_policy(self):
+        board = Board.create(dim_x=4, dim_y=4, swap_rule_allowed=False)
+        play(board, [(1, 0), (3, 3), (1, 1), (3, 2), (1, 2), (3, 0)])
+        player = Player(Color.Blue, solver=Solver(), rng=random.Random(1))
+        i, j, color = player.play(board)
+        assert board.is_legal_move((i, j))
+        assert color == Color.Blue
+        assert player.last_search_stats.winner == Color.Red
@@ -0,0 +1,141 @@
+from hexgame.bitboard import BitBoard
+from hexgame.board import Board, neighbour_table
+from hexgame.cell import Cell
+from hexgame.color import Color
+from hexgame.symmetry import (
+    Transform,
+    canonical_key,
+    cell_permutation,
+    symmetric_variants,
+    transform_cell,
+    transforms,
+)
+import random
+import pytest
+
+
+def played_board(size=5, moves=7, seed=0, board_type=Board.create) -> Board:
+    board = board_type(dim_x=size, dim_y=size)
+    rng = random.Random(seed)
+    color = Color.Red
+    for _ in range(moves):
+        board.place_stone(*board.random_move(rng), color)
+        color = color.opponent
+    return board
+
+
+def place(board, stones):
+    for x, y, color in stones:
+        board.place_stone(x, y, color)
+    return board
+
+
+class TestTransforms:
+    @pytest.mark.parametrize("transform", list(Transform))
+    def test_keeps_adjacency(self, transform):
+        nbrs = neighbour_table(5, 5)
+        permutation = cell_permutation(transform, 5, 5)
+        for index, index_nbrs in enumerate(nbrs):
+            assert {permutation[nbr] for nbr in index_nbrs} == set(
+                nbrs[permutation[index]]
+            )
+
+    @pytest.mark.parametrize("transform", list(Transform))
+    def test_self_inverse(self, transform):
+        for cell in [(0, 0), (1, 3), (4, 2)]:
+            image = transform_cell(transform, cell, 5, 5)
+            assert transform_cell(transform, image, 5, 5) == cell
+
+    def test_rectangular_boards(self):
+        assert transforms(4, 6) == (Transform.Identity, Transform.Rotate180)
+        with pytest.raises(ValueError):
+            cell_permutation(Transform.Transpose, 4, 6)
+
+
+class TestCanonicalKey:
+    def test_least_of_the_hashes(self):
+        board = played_board()
+        key, transform = canonical_key(board)
+        assert key <= board.zobrist_hash
+        if transform == Transform.Identity:
+            assert key == board.zobrist_hash
+
+    def test_symmetric_positions_share_key(self):
+        # the same position turned by every transform, Red to move
+        stones = [(0, 1, Color.Red), (3, 3, Color.Blue)]
+        keys = set()
+        for transform in (Transform.Identity, Transform.Rotate180):
+            board = Board.create(dim_x=5, dim_y=5)
+            place(
+                board,
+                [(*transform_cell(transform, (x, y), 5, 5), c) for x, y, c in stones],
+            )
+            keys.add(canonical_key(board))
+        assert len({key for key, _ in keys}) == 1
+
+    def test_stones_set_directly(self):
+        # one stone of each board set outside of place_stone, so the
+        # two undo logs hold different stones of the same position
+        board = Board.create(dim_x=5, dim_y=5)
+        board.place_stone(0, 1, Color.Red)
+        board[3, 3] = Cell(3, 3, Color.Blue)
+        turned = Board.create(dim_x=5, dim_y=5)
+        x, y = transform_cell(Transform.Rotate180, (3, 3), 5, 5)
+        turned.place_stone(x, y, Color.Blue)
+        x, y = transform_cell(Transform.Rotate180, (0, 1), 5, 5)
+        turned[x, y] = Cell(x, y, Color.Red)
+        assert canonical_key(board)[0] == canonical_key(turned)[0]
+
+    def test_transpose_swaps_colors(self):
+        # a red stone with Blue to move is the transpose of a blue
+        # stone with Red to move, which the swap move reaches
+        red = Board.create(dim_x=5, dim_y=5, swap_rule_allowed=False)
+        red.place_stone(0, 1, Color.Red)
+        swapped = Board.create(dim_x=5, dim_y=5)
+        place(swapped, [(1, 0, Color.Red), (1, 0, Color.Blue)])
+        assert canonical_key(red)[0] == canonical_key(swapped)[0]
+        # the swap move being available is part of the position
+        red_swap = place(Board.create(dim_x=5, dim_y=5), [(0, 1, Color.Red)])
+        assert canonical_key(red_swap)[0] != canonical_key(swapped)[0]
+
+    def test_bitboard_same_key(self):
+        board = played_board()
+        bitboard = BitBoard(dim_x=5, dim_y=5)
+        for i, j, previous, *_ in board._undo_log:
+            bitboard.place_stone(i, j, board[i, j].color)
+        assert canonical_key(bitboard) == canonical_key(board)
+
+    def test_canonical_move_maps_back(self):
+        board = played_board(moves=4)
+        key, transform = canonical_key(board)
+        variant = next(v for v in symmetric_variants(board) if v.transform == transform)
+        # a move found on the canonical position maps back to a legal move
+        empty = [i for i, color in enumerate(variant.colors) if color == Color.Empty]
+        x, y = empty[0] % 5, empty[0] // 5
+        assert board.is_empty_position(transform_cell(transform, (x, y), 5, 5))
+
+
+class TestSymmetricVariants:
+    def test_four_variants_on_square_boards(self):
+        board = played_board(moves=6)
+        variants = list(symmetric_variants(board, move=(1, 2)))
+        assert [v.transform for v in variants] == list(Transform)
+        identity = variants[0]
+        assert identity.move == (1, 2) and identity.to_move == Color.Red
+        for variant in variants:
+            red, blue = variant.colors.count(Color.Red), variant.colors.count(
+                Color.Blue
+            )
+            if variant.transform.swaps_colors:
+                red, blue = blue, red
+            assert red == identity.colors.count(Color.Red)
+            assert blue == identity.colors.count(Color.Blue)
+        assert variants[2].to_move == Color.Blue
+        assert variants[2].move == (2, 1)
+
+    def test_two_variants_on_rectangular_boards(self):
+        board = Board.create(dim_x=3, dim_y=4)
+        board.place_stone(0, 0, Color.Red)
+        variants = list(symmetric_variants(board))
+        assert len(variants) == 2
+        assert variants[1].colors[3 * 4 - 1] == Color.Red
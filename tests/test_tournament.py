@@ -0,0 +1,54 @@
+from hexgame.color import Color
+from hexgame.player import Player
+from hexgame.tournament import PlayerSpec, TournamentResult, run_tournament
+
+
+class TestTournament:
+    def test_counts_add_up(self):
+        result = run_tournament(games=20, dim_x=4, dim_y=4, workers=1, chunk_size=6)
+        assert result.games == 20
+        assert result.color_wins[Color.Red] + result.color_wins[Color.Blue] == 20
+        assert result.player_wins[1] == result.color_wins[Color.Red]
+        assert sum(result.lengths.values()) == 20
+        assert 4 <= result.average_length <= 16
+        assert result.as_dict()["games"] == 20
+
+    def test_seeded_results_do_not_depend_on_workers(self):
+        in_process = run_tournament(games=12, dim_x=4, dim_y=4, workers=1, seed=3)
+        pooled = run_tournament(games=12, dim_x=4, dim_y=4, workers=2, seed=3)
+        assert in_process.color_wins == pooled.color_wins
+        assert in_process.lengths == pooled.lengths
+
+    def test_progress_is_streamed(self):
+        seen = []
+        run_tournament(
+            games=10,
+            dim_x=3,
+            dim_y=3,
+            workers=1,
+            chunk_size=4,
+            on_progress=lambda result: seen.append(result.games),
+        )
+        assert seen == [4, 8, 10]
+
+    def test_mcts_beats_random(self):
+        result = run_tournament(
+            games=8,
+            dim_x=4,
+            dim_y=4,
+            player_1=PlayerSpec(),
+            player_2=PlayerSpec(Player.PlayerMode.MCTS, playouts=100),
+            workers=1,
+        )
+        assert result.player_wins[2] >= 6
+
+    def test_merge(self):
+        first = TournamentResult()
+        first.add_game(Color.Red, 1, 7)
+        second = TournamentResult()
+        second.add_game(Color.Blue, 2, 7)
+        second.add_game(Color.Blue, 2, 9)
+        first.merge(second)
+        assert first.games == 3
+        assert first.lengths == {7: 2, 9: 1}
+        assert first.win_rate(Color.Blue) == 2 / 3
@@ -0,0 +1,55 @@
+from hexgame.transposition import (
+    ENTRY_BYTES,
+    NO_MOVE,
+    Bound,
+    TranspositionTable,
+)
+
+
+class TestTranspositionTable:
+    def test_size_fits_the_budget(self):
+        table = TranspositionTable(size_mb=1)
+        assert table.size_bytes <= 2**20
+        assert len(table) & (len(table) - 1) == 0
+        assert 2 * len(table) * ENTRY_BYTES > 2**20
+
+    def test_store_and_probe(self):
+        table = TranspositionTable(size_mb=0.01)
+        assert table.probe(12345) is None
+        assert table.store(12345, depth=3, value=0.5, bound=Bound.Exact, move=7)
+        entry = table.probe(12345)
+        assert entry.depth == 3
+        assert entry.value == 0.5
+        assert entry.bound == Bound.Exact
+        assert entry.move == 7
+        assert table.best_move(12345) == 7
+        stats = table.stats
+        assert (stats.probes, stats.hits, stats.misses) == (2, 1, 1)
+        assert stats.hit_rate == 0.5
+
+    def test_collisions_and_replacement(self):
+        table = TranspositionTable(size_mb=0.01)
+        key = 5
+        other = key + len(table)  # same slot, other position
+        table.store(key, depth=4, value=1.0, bound=Bound.Lower)
+        assert table.probe(other) is None
+        assert table.stats.collisions == 1
+
+        # a shallower result does not evict a deeper one of the same search
+        assert not table.store(other, depth=2, value=0.0, bound=Bound.Exact)
+        assert table.probe(key).depth == 4
+        # but it does once the stored one is from an older search
+        table.new_search()
+        assert table.store(other, depth=2, value=0.0, bound=Bound.Exact)
+        assert table.probe(key) is None
+        assert table.probe(other).depth == 2
+        assert table.stats.replacements == 1
+
+    def test_same_position_keeps_its_move(self):
+        table = TranspositionTable(size_mb=0.01)
+        table.store(9, depth=1, value=0.0, bound=Bound.Upper, move=3)
+        table.store(9, depth=2, value=0.0, bound=Bound.Upper)
+        assert table.probe(9).move == 3
+        table.clear()
+        assert table.probe(9) is None
+        assert table.best_move(9) == NO_MOVE
@@ -0,0 +1,166 @@
+from hexgame.board import Board
+from hexgame.color import Color
+from hexgame.graph import Graph
+from hexgame.unionfind import ArrayUnionFind, IndexedUnionFind, UnionFind
+import pickle
+import random
+import pytest
+
+
+class TestUnionFind:
+    def test_find_compresses_path(self):
+        uf = UnionFind([0, 1, 2, 3])
+        # build the chain 0 -> 1 -> 2 -> 3 by hand
+        uf._parents = {0: 1, 1: 2, 2: 3, 3: 3}
+        assert uf.find(0) == 3
+        assert uf._parents == {0: 3, 1: 3, 2: 3, 3: 3}
+
+    @pytest.mark.parametrize("union_find", [UnionFind, IndexedUnionFind])
+    def test_add_node(self, union_find: type[UnionFind]):
+        uf = union_find(["a", "b"])
+        uf.add("c")
+        uf.add("c")
+        assert "c" in uf
+        assert len(uf) == 3
+        uf.union("a", "c")
+        assert uf.find("a") == uf.find("c")
+        assert len(uf) == 2
+
+    @pytest.mark.parametrize("union_find", [UnionFind, IndexedUnionFind])
+    def test_rollback(self, union_find: type[UnionFind]):
+        nodes = list(range(8))
+        uf = union_find(nodes)
+        uf.track_history()
+        uf.union(0, 1)
+        uf.union(2, 3)
+        checkpoint = uf.checkpoint()
+        uf.union(1, 3)
+        uf.union(4, 5)
+        uf.union(5, 0)
+        assert len(uf) == 3
+        uf.rollback(checkpoint)
+        assert len(uf) == 6
+        assert uf.find(0) == uf.find(1)
+        assert uf.find(1) != uf.find(3)
+        assert uf.find(4) != uf.find(5)
+        uf.rollback(0)
+        assert len(uf) == 8
+        assert {uf.find(node) for node in nodes} == set(nodes)
+
+
+class TestArrayUnionFind:
+    def test_union_and_find(self):
+        uf = ArrayUnionFind(5)
+        assert len(uf) == 5
+        uf.union(0, 1)
+        uf.union(3, 4)
+        assert len(uf) == 3
+        assert uf.find(0) == uf.find(1)
+        assert uf.find(3) == uf.find(4)
+        assert uf.find(0) != uf.find(3)
+        uf.union(1, 4)
+        uf.union(0, 3)
+        assert len(uf) == 2
+        assert uf.find(4) == uf.find(0)
+        assert uf.find(2) == 2
+
+    def test_path_halving(self):
+        uf = ArrayUnionFind(5)
+        # the chain 0 -> 1 -> 2 -> 3 -> 4
+        for node in range(4):
+            uf._parents[node] = node + 1
+        assert uf.max_depth() == 4
+        assert uf.find(0) == 4
+        assert list(uf._parents) == [2, 2, 4, 4, 4]
+        assert uf.max_depth() == 2
+
+    def test_union_by_size_keeps_trees_shallow(self):
+        size = 1 << 10
+        uf = ArrayUnionFind(size)
+        rng = random.Random(0)
+        pairs = [(rng.randrange(size), rng.randrange(size)) for _ in range(4 * size)]
+        for a, b in pairs:
+            uf.union(a, b)
+        # union by size alone bounds the depth by log2(size)
+        assert uf.max_depth() <= 10
+        assert uf.average_find_length < 2
+        assert uf.stats["finds"] == 2 * len(pairs)
+
+    def test_empty_stats(self):
+        uf = ArrayUnionFind(0)
+        assert uf.max_depth() == 0
+        assert uf.average_find_length == 0.0
+
+
+class TestIndexedUnionFind:
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_agrees_with_union_find(self, seed: int):
+        nodes = [(x, y) for y in range(6) for x in range(6)]
+        uf = UnionFind(nodes)
+        indexed_uf = IndexedUnionFind(nodes)
+        rng = random.Random(seed)
+        for _ in range(20):
+            a, b = rng.choice(nodes), rng.choice(nodes)
+            uf.union(a, b)
+            indexed_uf.union(a, b)
+            assert len(uf) == len(indexed_uf)
+        for a in nodes:
+            for b in nodes:
+                assert (uf.find(a) == uf.find(b)) == (
+                    indexed_uf.find(a) == indexed_uf.find(b)
+                )
+
+    def test_index_is_the_position_in_nodes(self):
+        indexed_uf = IndexedUnionFind(["a", "b", "c"])
+        assert indexed_uf.index("c") == 2
+        assert list(indexed_uf) == ["a", "b", "c"]
+
+    def test_board_with_indexed_union_find(self):
+        board = Board.create(dim_x=3, dim_y=3, union_find=IndexedUnionFind)
+        assert board.red_conn_comp.index((1, 2)) == 2 * 3 + 1
+        board.place_stone(0, 0, Color.Red)
+        board.place_stone(2, 2, Color.Blue)
+        board.place_stone(0, 1, Color.Red)
+        assert not board._has_color_won(Color.Red)
+        board.place_stone(0, 2, Color.Red)
+        assert board._has_color_won(Color.Red)
+        assert len(board.red_conn_comp) == 7
+
+    def test_graph_with_indexed_union_find(self):
+        gph = Graph(
+            {"a": ["b", "c"], "b": ["a"], "c": ["a"], "d": []},
+            union_find=IndexedUnionFind,
+        )
+        conn_comps = gph.get_conn_comps()
+        assert isinstance(conn_comps, IndexedUnionFind)
+        assert len(conn_comps) == 2
+        assert conn_comps.find("b") == conn_comps.find("c")
+
+
+class TestUnionFindCopy:
+    @pytest.mark.parametrize("union_find", [UnionFind, IndexedUnionFind])
+    def test_copy_and_pickle(self, union_find):
+        uf = union_find(list(range(10)))
+        uf.track_history()
+        uf.union(0, 1)
+        checkpoint = uf.checkpoint()
+        uf.union(2, 3)
+        uf.union(1, 3)
+        for clone in (uf.copy(), pickle.loads(pickle.dumps(uf))):
+            assert len(clone) == len(uf)
+            assert clone.find(0) == clone.find(3)
+            clone.union(5, 6)
+            assert uf.find(5) != uf.find(6)
+            clone.rollback(checkpoint)
+            assert clone.find(0) == clone.find(1)
+            assert clone.find(0) != clone.find(3)
+            assert uf.find(0) == uf.find(3)
+
+    def test_array_copy(self):
+        uf = ArrayUnionFind(6)
+        uf.union(0, 1)
+        clone = uf.copy()
+        clone.union(2, 3)
+        assert uf.find(2) != uf.find(3)
+        assert clone.find(0) == clone.find(1)
+        assert len(clone) == 4 and len(uf) == 5